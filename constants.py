@@ -1,7 +1,8 @@
 import os
 
 DIRECTORY = os.path.dirname(__file__)
-APP_DATA = os.path.join(os.getenv('LOCALAPPDATA'), "Gizmo")
+# LOCALAPPDATA is only set on Windows
+APP_DATA = os.path.join(os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.local', 'share'), "Gizmo")
 
 
 class LOGO:
@@ -2,5 +2,6 @@ from . import joint_orient
 from . import renamer
 from . import utils
 from . import joint_on_curve
+from . import dg_network
 from . import maya_node_editor
 from .userSetup import create_menu
@@ -0,0 +1 @@
+from .core import add_node, node_ports, compile_graph, import_network, CompileError
@@ -0,0 +1,355 @@
+"""Build node editor graphs as Maya DG networks, and read networks back.
+
+A graph node's type is a Maya node type, its ports are attribute names, eg.
+'input1X' or 'input3D[0].input3Dx', and its params are attribute values.
+
+Compiling queues every node, then every value, then every connection on one
+modifier, which runs once and is a single undo step. That avoids a
+createNode/connectAttr command per node and edge, which is what makes large
+networks slow to build:
+
+    handles = compile_graph(scene.graph)
+
+Importing walks the network with one MItDependencyGraph, then reads the
+connections of the nodes it visited. Only connected attributes become ports,
+attributes changed from their default become params:
+
+    graph = import_network(mc.ls(selection=True))
+
+Nodes of any Maya type can be added to a graph with add_node, their ports are
+the type's keyable inputs and its outputs.
+
+Shapes can't be created on their own, each shape is built under a new
+transform named after it, eg. curveShape1 under curve1.
+"""
+from __future__ import annotations
+import logging
+import re
+import typing
+from maya.api import OpenMaya as om
+import maya.cmds as mc
+from gizmo.standalone.node_editor import layout
+from gizmo.standalone.node_editor.model import Graph, Node, Port
+from .. import utils
+
+log = logging.getLogger("DG Network")
+
+DIRECTIONS = {
+    'upstream': om.MItDependencyGraph.kUpstream,
+    'downstream': om.MItDependencyGraph.kDownstream
+}
+""": direction the importer follows connections from the roots"""
+
+_ELEMENT = re.compile(r'^(\w+)(?:\[(\d+)\])?$')
+
+_SHAPE_NAME = re.compile(r'Shape(\d*)$')
+
+_INT_TYPES = (
+    om.MFnNumericData.kShort, om.MFnNumericData.kInt, om.MFnNumericData.kLong,
+    om.MFnNumericData.kByte, om.MFnNumericData.kChar
+)
+
+
+class CompileError(Exception):
+    """The graph can't be built in Maya, nothing has been created."""
+
+
+def _node_types(types: typing.Iterable[str]) -> tuple[set[str], set[str]]:
+    """DAG types and shape types among node types, the rest are DG types.
+
+    Raises:
+        CompileError: a type isn't a Maya node type.
+    """
+    types = set(types)
+    known = set(mc.allNodeTypes())
+    unknown = sorted(types - known)
+    if unknown:
+        raise CompileError(f"not Maya node types: {', '.join(unknown)}")
+
+    dag = set()
+    shapes = set()
+    for node_type in types:
+        inherited = mc.nodeType(node_type, isTypeName=True, inherited=True) or []
+        if 'shape' in inherited:
+            shapes.add(node_type)
+        elif 'dagNode' in inherited:
+            dag.add(node_type)
+    return dag, shapes
+
+
+def _transform_name(shape_name: str) -> str:
+    """Name of the transform made for a shape, curveShape1 -> curve1."""
+    name = _SHAPE_NAME.sub(r'\1', shape_name)
+    return name if name != shape_name else f'{shape_name}Transform'
+
+
+def node_ports(node_type: str) -> tuple[list[Port], list[Port]]:
+    """Inputs and outputs for a Maya node type, without creating a node.
+
+    Inputs are the keyable attributes, outputs the connectable ones that can't
+    be written, eg. output1D or worldMatrix. Only top level attributes are used,
+    array attributes as their first element.
+
+    Raises:
+        CompileError: the type isn't a Maya node type.
+    """
+    if node_type not in mc.allNodeTypes():
+        raise CompileError(f"not a Maya node type: {node_type}")
+
+    inputs = []
+    outputs = []
+    attributes = om.MNodeClass(node_type).getAttributes()
+    for i in range(len(attributes)):
+        attr = om.MFnAttribute(attributes[i])
+        if not attr.parent.isNull() or attr.hidden or not attr.connectable:
+            continue
+        name = f'{attr.name}[0]' if attr.array else attr.name
+        if attr.writable and attr.keyable:
+            inputs.append(Port(name))
+        elif attr.readable and not attr.writable:
+            outputs.append(Port(name))
+    return inputs, outputs
+
+
+def add_node(graph: Graph, node_type: str, position: tuple[float, float] = (0.0, 0.0), name: str = None) -> Node:
+    """Add a node of a Maya type to a graph, see node_ports.
+
+    Raises:
+        CompileError: the type isn't a Maya node type.
+    """
+    inputs, outputs = node_ports(node_type)
+    return graph.add_node(name or node_type, node_type, position, inputs, outputs, {})
+
+
+def _node_key(obj: om.MObject) -> str:
+    """Name identifying a node, unlike MObjectHandle.hashCode which isn't unique.
+
+    DAG nodes use their first full path, DG node names are unique already.
+    """
+    if obj.hasFn(om.MFn.kDagNode):
+        return om.MDagPath.getAPathTo(obj).fullPathName()
+    return om.MFnDependencyNode(obj).name()
+
+
+def _plug(fn: om.MFnDependencyNode, path: str) -> om.MPlug:
+    """Plug for an attribute path like 'input3D[0].input3Dx', works on nodes a modifier hasn't created yet.
+
+    Raises:
+        CompileError: the node has no such attribute.
+    """
+    plug = None
+    for part in path.split('.'):
+        match = _ELEMENT.match(part)
+        if match is None or not fn.hasAttribute(match.group(1)):
+            raise CompileError(f"{fn.typeName} has no attribute {path}")
+        name, index = match.groups()
+        plug = fn.findPlug(name, False) if plug is None else plug.child(fn.attribute(name))
+        if index is not None:
+            plug = plug.elementByLogicalIndex(int(index))
+    return plug
+
+
+def _set_value(modifier: om.MDGModifier, plug: om.MPlug, value) -> bool:
+    """Queue setting a plug, returns False for values that can't be set this way."""
+    if isinstance(value, bool):
+        modifier.newPlugValueBool(plug, value)
+    elif isinstance(value, int):
+        modifier.newPlugValueInt(plug, value)
+    elif isinstance(value, float):
+        modifier.newPlugValueDouble(plug, value)
+    elif isinstance(value, str):
+        modifier.newPlugValueString(plug, value)
+    elif isinstance(value, (list, tuple)) and plug.isCompound and len(value) == plug.numChildren():
+        return all(_set_value(modifier, plug.child(i), v) for i, v in enumerate(value))
+    else:
+        return False
+    return True
+
+
+def _get_value(plug: om.MPlug):
+    """Value of a plug as it'd be passed to _set_value, None for values that can't be read this way."""
+    attr = plug.attribute()
+    if plug.isCompound:
+        values = [_get_value(plug.child(i)) for i in range(plug.numChildren())]
+        return None if any(v is None for v in values) else values
+    if attr.hasFn(om.MFn.kNumericAttribute):
+        unit = om.MFnNumericAttribute(attr).numericType()
+        if unit == om.MFnNumericData.kBoolean:
+            return plug.asBool()
+        if unit in _INT_TYPES:
+            return plug.asInt()
+        return plug.asDouble()
+    if attr.hasFn(om.MFn.kEnumAttribute):
+        return plug.asInt()
+    if attr.hasFn(om.MFn.kUnitAttribute):
+        return plug.asDouble()
+    if attr.hasFn(om.MFn.kTypedAttribute) and om.MFnTypedAttribute(attr).attrType() == om.MFnData.kString:
+        return plug.asString()
+    return None
+
+
+def _changed_values(fn: om.MFnDependencyNode) -> dict:
+    """Values of a node's top level attributes that differ from their defaults and aren't connected."""
+    values = {}
+    for i in range(fn.attributeCount()):
+        attr = om.MFnAttribute(fn.attribute(i))
+        if not attr.parent.isNull() or attr.array or not attr.writable or not attr.storable:
+            continue
+        plug = fn.findPlug(attr.object(), False)
+        if plug.isDestination or plug.isDefaultValue():
+            continue
+        value = _get_value(plug)
+        if value is not None:
+            values[attr.name] = value
+    return values
+
+
+def compile_graph(graph: Graph, node_ids: typing.Iterable[int] = None, undoable: bool = True) -> dict[int, om.MObjectHandle]:
+    """Create Maya nodes and connections for a graph, in one modifier.
+
+    DG nodes are created through the MDGModifier base of an MDagModifier, so
+    graphs holding DAG nodes like transforms still use a single modifier.
+    Shapes are created under a new transform each, see _transform_name.
+
+    Args:
+        graph: graph to build.
+        node_ids: only build these nodes, edges to other nodes are skipped.
+        undoable: put the build on Maya's undo queue as one step.
+
+    Returns:
+        handle of the Maya node created for each graph node.
+
+    Raises:
+        CompileError: a node type or attribute doesn't exist in Maya, checked
+            before anything is created.
+    """
+    ids = list(graph.nodes if node_ids is None else node_ids)
+    wanted = set(ids)
+    nodes = [graph.nodes[i] for i in ids]
+    dag_types, shape_types = _node_types(n.type for n in nodes)
+
+    modifier = om.MDagModifier()
+    objects = {}
+    fns = {}
+    # nodes, nothing is added to the scene until doIt, so an error part way leaves no trace
+    for node in nodes:
+        if node.type in shape_types:
+            parent = modifier.createNode('transform')
+            modifier.renameNode(parent, _transform_name(node.name))
+            # with a parent given, the shape itself is returned rather than a new transform
+            obj = modifier.createNode(node.type, parent)
+        elif node.type in dag_types:
+            obj = modifier.createNode(node.type)
+        else:
+            obj = om.MDGModifier.createNode(modifier, node.type)
+        modifier.renameNode(obj, node.name)
+        objects[node.id] = obj
+        fns[node.id] = om.MFnDependencyNode(obj)
+
+    # values
+    for node in nodes:
+        fn = fns[node.id]
+        for name, value in node.params.items():
+            if not fn.hasAttribute(name.split('.')[0].split('[')[0]):
+                continue
+            if not _set_value(modifier, _plug(fn, name), value):
+                log.warning(f"Can't set {node.name}.{name} to {value!r}, skipped")
+
+    # connections
+    for edge in graph.edges.values():
+        if edge.source not in wanted or edge.target not in wanted:
+            continue
+        source = graph.nodes[edge.source]
+        target = graph.nodes[edge.target]
+        modifier.connect(
+            _plug(fns[source.id], source.outputs[edge.source_port].name),
+            _plug(fns[target.id], target.inputs[edge.target_port].name)
+        )
+
+    if undoable:
+        utils.do_modifier(modifier)
+    else:
+        modifier.doIt()
+    return {node_id: om.MObjectHandle(obj) for node_id, obj in objects.items()}
+
+
+def _plug_name(plug: om.MPlug) -> str:
+    return plug.partialName(
+        includeNonMandatoryIndices=True, includeInstancedIndices=True, useFullAttributePath=True, useLongNames=True)
+
+
+def import_network(
+        roots: typing.Iterable[str | om.MObject],
+        graph: Graph = None,
+        direction: str = 'upstream',
+        origin: tuple[float, float] = (0.0, 0.0)
+        ) -> Graph:
+    """Read the DG network connected to some nodes into a graph.
+
+    Args:
+        roots: nodes to start from, names or MObjects.
+        graph: graph to add to, a new one if not given.
+        direction: 'upstream' or 'downstream', which way to follow connections.
+        origin: top left of the imported nodes, they're laid out in layers.
+
+    Returns:
+        the graph.
+    """
+    graph = Graph() if graph is None else graph
+    sel = om.MSelectionList()
+    for root in roots:
+        sel.add(root)
+    if sel.isEmpty():
+        return graph
+
+    # one traversal, moved to each root in turn, nodes seen from an earlier root aren't revisited
+    handles: dict[str, om.MObjectHandle] = {}
+    it = om.MItDependencyGraph(
+        sel.getDependNode(0), om.MFn.kInvalid, DIRECTIONS[direction],
+        om.MItDependencyGraph.kBreadthFirst, om.MItDependencyGraph.kNodeLevel)
+    for i in range(sel.length()):
+        root = sel.getDependNode(i)
+        if _node_key(root) in handles:
+            continue
+        it.resetTo(root, om.MFn.kInvalid, DIRECTIONS[direction],
+                   om.MItDependencyGraph.kBreadthFirst, om.MItDependencyGraph.kNodeLevel)
+        while not it.isDone():
+            node = it.currentNode()
+            key = _node_key(node)
+            if key in handles:
+                it.prune()
+            else:
+                handles[key] = om.MObjectHandle(node)
+            it.next()
+
+    # connections between visited nodes, each edge is found from its destination
+    inputs = {key: [] for key in handles}
+    outputs = {key: [] for key in handles}
+    connections = []
+    for key, handle in handles.items():
+        fn = om.MFnDependencyNode(handle.object())
+        for plug in fn.getConnections():
+            if not plug.isDestination:
+                continue
+            source = plug.source()
+            source_key = _node_key(source.node())
+            if source_key not in handles:
+                continue
+            source_name = _plug_name(source)
+            target_name = _plug_name(plug)
+            if source_name not in outputs[source_key]:
+                outputs[source_key].append(source_name)
+            inputs[key].append(target_name)
+            connections.append((source_key, source_name, key, target_name))
+
+    ids = {}
+    for key, handle in handles.items():
+        fn = om.MFnDependencyNode(handle.object())
+        ids[key] = graph.add_node(
+            fn.name(), fn.typeName, inputs=inputs[key], outputs=outputs[key], params=_changed_values(fn)).id
+    for source_key, source_name, key, target_name in connections:
+        graph.connect(ids[source_key], outputs[source_key].index(source_name), ids[key], inputs[key].index(target_name))
+
+    for node_id, (x, y) in layout.layered_layout(graph, ids.values(), origin).items():
+        graph.move_node(node_id, x, y)
+    return graph
@@ -1,12 +1,57 @@
+import logging
+from PySide2.QtWidgets import QInputDialog
 from gizmo.standalone import node_editor
+from gizmo.standalone.node_editor import history
 from gizmo.maya.utils.widgets import *
 import maya.cmds as mc
+from . import dg_network
+
+log = logging.getLogger("Node Editor")
 
 
 class MayaNodeEditor(GMainWindow, node_editor.core.NodeUI):
     def __init__(self):
         super().__init__()
-        pass
+        maya_menu = self.menuBar().addMenu('Maya')
+        maya_menu.addAction('Add Maya Node...', self.add_maya_node)
+        maya_menu.addAction('Build Graph', self.build_graph)
+        maya_menu.addAction('Import Selected Network', self.import_selected)
+
+    def add_maya_node(self):
+        """Add a node of any Maya type to the graph, at the centre of the view."""
+        node_types = sorted(mc.allNodeTypes())
+        node_type, ok = QInputDialog.getItem(self, 'Add Maya Node', 'Node type', node_types, 0, True)
+        if not ok or not node_type:
+            return
+
+        centre = self.view.mapToScene(self.view.viewport().rect().center())
+        try:
+            node = dg_network.add_node(self.scene.graph, node_type, (centre.x(), centre.y()))
+        except dg_network.CompileError as e:
+            log.warning(f"Couldn't add node: {e}")
+            return
+        self.scene.history.push(history.AddNode(node), apply=False)
+
+    def build_graph(self):
+        """Create the graph, or the selected nodes, as Maya nodes in one undo step."""
+        node_ids = self._selected_ids() or None
+        try:
+            handles = dg_network.compile_graph(self.scene.graph, node_ids)
+        except dg_network.CompileError as e:
+            log.warning(f"Couldn't build graph: {e}")
+            return
+        log.info(f"Built {len(handles)} nodes")
+
+    def import_selected(self):
+        """Add the network upstream of the selected Maya nodes to the graph."""
+        selection = mc.ls(selection=True)
+        if not selection:
+            log.warning("Select the Maya nodes to import the network of")
+            return
+        graph = self.scene.graph
+        with self.scene.batch_update(index=True), history.Record.capture(graph, 'Import Network') as command:
+            dg_network.import_network(selection, graph)
+        self.scene.history.push(command, apply=False)
 
 
 def launch():
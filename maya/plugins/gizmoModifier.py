@@ -0,0 +1,66 @@
+"""
+Undoable wrapper for OpenMaya modifiers.
+
+Changes made with an MDGModifier/MDagModifier from a script skip Maya's undo
+queue. gizmo.maya.utils.do_modifier queues a modifier and calls this command,
+which executes it and keeps hold of it so the whole batch is a single undo step.
+"""
+import maya.api.OpenMaya as om
+import sys
+
+from gizmo.maya.utils import general
+
+kPluginCmdName = "gizmoModifier"
+
+
+def maya_useNewAPI():
+    """Tell Maya this plugin uses the Python API 2.0."""
+    pass
+
+
+class GizmoModifierCmd(om.MPxCommand):
+    """ Execute the last queued modifier. """
+
+    def __init__(self):
+        super().__init__()
+        self._modifier = None
+
+    @staticmethod
+    def creator():
+        return GizmoModifierCmd()
+
+    def doIt(self, args):
+        if not general._modifier_queue:
+            raise RuntimeError("No modifier queued, use gizmo.maya.utils.do_modifier()")
+
+        self._modifier = general._modifier_queue.pop()
+        self.redoIt()
+
+    def redoIt(self):
+        self._modifier.doIt()
+
+    def undoIt(self):
+        self._modifier.undoIt()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    _plugin = om.MFnPlugin(plugin)
+    try:
+        _plugin.registerCommand(kPluginCmdName, GizmoModifierCmd.creator)
+    except Exception as e:
+        sys.stderr.write(f"Failed to register command: {kPluginCmdName}\n")
+        sys.stderr.write(f"{e}\n")
+        raise
+
+
+def uninitializePlugin(plugin):
+    _plugin = om.MFnPlugin(plugin)
+    try:
+        _plugin.deregisterCommand(kPluginCmdName)
+    except Exception as e:
+        sys.stderr.write(f"Failed to unregister command: {kPluginCmdName}\n")
+        sys.stderr.write(f"{e}\n")
+        raise
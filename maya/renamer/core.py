@@ -0,0 +1,348 @@
+"""Plan and apply batch renames.
+
+The new name for every object is worked out before anything in the scene
+changes. Objects are tracked by MObjectHandle rather than long name, so renaming
+a parent can't invalidate the path of a child, and the whole batch is applied
+with one MDagModifier, which is a single undo step. Like mc.rename, shapes
+named after a renamed transform, eg. pCube1Shape, are renamed with it.
+
+Doesn't depend on the UI, so it can be used from batch scripts:
+
+    plan = plan_rename(mc.ls(type='joint'), prefix='bind_')
+    apply_plan(plan)
+"""
+from __future__ import annotations
+import typing
+from collections import Counter
+from maya.api import OpenMaya as om
+import maya.cmds as mc
+from .. import utils
+from ..utils import naming
+
+TRAVERSAL = {
+    'depth': om.MItDag.kDepthFirst,
+    'breadth': om.MItDag.kBreadthFirst
+}
+""": DAG traversal used to order objects when re-indexing"""
+
+TEMP_PREFIX = '_gizmoRename'
+""": temporary names objects pass through when the batch swaps or shifts names"""
+
+SHAPE_SUFFIX = 'Shape'
+""": shapes named after their transform plus this are renamed with it"""
+
+
+class RenamePlan:
+    """Old and new names for a batch of objects, stored as pure data."""
+
+    def __init__(self):
+        self.handles: list[om.MObjectHandle] = []
+        self.old_names: list[str] = []
+        self.new_names: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.handles)
+
+    def __iter__(self) -> typing.Iterator[tuple[om.MObjectHandle, str, str]]:
+        return zip(self.handles, self.old_names, self.new_names)
+
+    def add(self, handle: om.MObjectHandle, old_name: str, new_name: str) -> None:
+        self.handles.append(handle)
+        self.old_names.append(old_name)
+        self.new_names.append(new_name)
+
+    def changes(self) -> typing.Iterator[tuple[om.MObjectHandle, str, str]]:
+        """Entries where the name is actually changing."""
+        return ((h, o, n) for h, o, n in self if o != n)
+
+
+def get_handles(objs: typing.Iterable[str | om.MObject]) -> list[om.MObjectHandle]:
+    """Resolve names or MObjects to handles using a single selection list."""
+    sel = om.MSelectionList()
+    for obj in objs:
+        sel.add(obj)
+    return [om.MObjectHandle(sel.getDependNode(i)) for i in range(sel.length())]
+
+
+def get_short_name(handle: om.MObjectHandle) -> str:
+    return om.MFnDependencyNode(handle.object()).name()
+
+
+def get_shapes(handle: om.MObjectHandle) -> list[om.MObjectHandle]:
+    """Shapes under a transform that are named after it, eg. pCube1Shape."""
+    obj = handle.object()
+    if not obj.hasFn(om.MFn.kTransform):
+        return []
+
+    prefix = get_short_name(handle) + SHAPE_SUFFIX
+    fn = om.MFnDagNode(obj)
+    shapes = []
+    for i in range(fn.childCount()):
+        child = fn.child(i)
+        if child.hasFn(om.MFn.kShape) and om.MFnDependencyNode(child).name().startswith(prefix):
+            shapes.append(om.MObjectHandle(child))
+    return shapes
+
+
+def get_scene_names() -> Counter:
+    """Count short names of every node in the scene."""
+    return Counter(n.rpartition('|')[2] for n in mc.ls())
+
+
+def plan_names(
+        handles: list[om.MObjectHandle],
+        names: typing.Iterable[str],
+        index: int = 1,
+        number_padding: int = 2,
+        taken: Counter = None,
+        shapes: bool = True
+        ) -> RenamePlan:
+    """Resolve collisions for target names.
+
+    Every current name in the batch is released before any new name is picked,
+    so objects can swap or shift names within one batch. Entries are resolved
+    in order, an earlier entry wins when targets collide.
+
+    Args:
+        handles: objects to rename.
+        names: target name for each object.
+        index: suffix used when a name has to be made unique.
+        number_padding: padding for index. eg 2 = 01, 3 = 001.
+        taken: count of names in use, queried from the scene if not given.
+        shapes: also rename shapes named after a renamed transform, see get_shapes.
+
+    Returns:
+        unique name for every object, then for every shape renamed with them.
+    """
+    if taken is None:
+        taken = get_scene_names()
+
+    handles = list(handles)
+    old_names = [get_short_name(h) for h in handles]
+
+    children = []
+    if shapes:
+        in_batch = {_path_key(h.object()) for h in handles if h.object().hasFn(om.MFn.kDagNode)}
+        for i, handle in enumerate(handles):
+            for shape in get_shapes(handle):
+                if _path_key(shape.object()) not in in_batch:
+                    children.append((shape, get_short_name(shape), i))
+
+    for old in old_names + [old for _, old, _ in children]:
+        if taken[old] > 0:
+            taken[old] -= 1
+
+    def exists(x):
+        return taken[x] > 0
+
+    plan = RenamePlan()
+    for handle, old, name in zip(handles, old_names, names):
+        new = naming.increment_name(name, index, number_padding, exists)
+        taken[new] += 1
+        plan.add(handle, old, new)
+
+    # shapes follow their transform, pCube1Shape of pCube1 -> boxShape of box
+    for shape, old, i in children:
+        parent_old = plan.old_names[i]
+        new = naming.increment_name(plan.new_names[i] + old[len(parent_old):], index, number_padding, exists)
+        taken[new] += 1
+        plan.add(shape, old, new)
+
+    return plan
+
+
+def plan_rename(
+        objs: typing.Iterable[str | om.MObject],
+        index: int = 1,
+        number_padding: int = 2,
+        **kwargs
+        ) -> RenamePlan:
+    """Work out new names for objects without changing the scene.
+
+    Args:
+        objs: objects to rename.
+        index: suffix used when a name has to be made unique.
+        number_padding: padding for index. eg 2 = 01, 3 = 001.
+        **kwargs: renamer options, see naming.compile_rename_rule.
+
+    Returns:
+        plan to pass to apply_plan.
+    """
+    handles = get_handles(objs)
+    rule = naming.compile_rename_rule(number_padding=number_padding, **kwargs)
+    names = rule.apply([get_short_name(h) for h in handles])
+    return plan_names(handles, names, index, number_padding)
+
+
+def apply_plan(plan: RenamePlan) -> int:
+    """Rename everything in the plan as a single undo step.
+
+    When an object takes a name another object in the batch gives up, every
+    object is first given a temporary name in the same modifier, so swaps and
+    shifted numbering come out exactly as planned.
+
+    Returns:
+        number of objects renamed.
+    """
+    changes = [(h, new) for h, _, new in plan.changes() if h.isValid()]
+    if not changes:
+        return 0
+
+    released = set(old for h, old, _ in plan.changes() if h.isValid())
+    modifier = om.MDagModifier()
+    if any(new in released for _, new in changes):
+        for i, (handle, _) in enumerate(changes):
+            modifier.renameNode(handle.object(), f'{TEMP_PREFIX}{i}')
+    for handle, new in changes:
+        modifier.renameNode(handle.object(), new)
+
+    utils.do_modifier(modifier)
+    return len(changes)
+
+
+def _path_key(obj: om.MObject) -> str:
+    # MObjectHandle.hashCode isn't unique, a full path is, instances use their first path
+    return om.MDagPath.getAPathTo(obj).fullPathName()
+
+
+def _dag_order(handles: list[om.MObjectHandle]) -> list[om.MObjectHandle]:
+    """Sort objects, none of them below another, into depth first DAG order.
+
+    One MItDag pass from their closest common ancestor, or the world.
+    """
+    if len(handles) < 2:
+        return list(handles)
+
+    paths = [om.MDagPath.getAPathTo(h.object()) for h in handles]
+    remaining = {p.fullPathName(): h for p, h in zip(paths, handles)}
+
+    ancestor = om.MDagPath(paths[0])
+    ancestor.pop()
+    while ancestor.length() and not all(n.startswith(ancestor.fullPathName() + '|') for n in remaining):
+        ancestor.pop()
+
+    it = om.MItDag(om.MItDag.kDepthFirst)
+    if ancestor.length():
+        it.reset(ancestor.node(), om.MItDag.kDepthFirst)
+
+    order = []
+    while remaining and not it.isDone():
+        h = remaining.pop(it.fullPathName(), None)
+        if h is not None:
+            order.append(h)
+            # nothing else is below a found object
+            it.prune()
+        it.next()
+
+    return order + list(remaining.values())
+
+
+def order_by_hierarchy(
+        handles: list[om.MObjectHandle],
+        traversal: str = 'depth'
+        ) -> tuple[list[om.MObjectHandle], list[int]]:
+    """Sort objects into hierarchy order, ignoring the order they were selected.
+
+    Top most objects are sorted into DAG order, then each is traversed once and
+    objects are collected as they're visited. A branch is a run of objects where
+    each is the only selected child of the one before, a new branch starts
+    wherever the hierarchy splits.
+
+    Args:
+        handles: objects to sort.
+        traversal: 'depth' or 'breadth' first.
+
+    Returns:
+        objects in order and the branch each belongs to. Non DAG objects are
+        kept at the end in their original order, each in its own branch.
+    """
+    selected = {}
+    others = []
+    for h in handles:
+        if h.object().hasFn(om.MFn.kDagNode):
+            selected[_path_key(h.object())] = h
+        else:
+            others.append(h)
+
+    def selected_parent(path: om.MDagPath) -> str | None:
+        path = om.MDagPath(path)
+        while path.length() > 1:
+            path.pop()
+            key = _path_key(path.node())
+            if key in selected:
+                return key
+        return None
+
+    roots = []
+    for key, h in selected.items():
+        if selected_parent(om.MDagPath.getAPathTo(h.object())) is None:
+            roots.append(h)
+
+    order = []
+    parents = {}
+    visited = set()
+    it = om.MItDag()
+    for root in _dag_order(roots):
+        it.reset(root.object(), TRAVERSAL[traversal])
+        while not it.isDone():
+            key = _path_key(it.currentItem())
+            if key in selected and key not in visited:
+                visited.add(key)
+                order.append(key)
+                parents[key] = selected_parent(it.getPath())
+            it.next()
+
+    child_count = {}
+    for parent in parents.values():
+        child_count[parent] = child_count.get(parent, 0) + 1
+
+    branches = {}
+    for key in order:
+        parent = parents[key]
+        if parent is None or child_count[parent] > 1:
+            branches[key] = len(branches)
+        else:
+            branches[key] = branches[parent]
+
+    branch_ids = [branches[k] for k in order]
+    branch_ids.extend(range(len(branches), len(branches) + len(others)))
+
+    return [selected[k] for k in order] + others, branch_ids
+
+
+def plan_reindex(
+        objs: typing.Iterable[str | om.MObject],
+        traversal: str = 'depth',
+        per_branch: bool = False,
+        start: int = 1,
+        padding: int = 2
+        ) -> RenamePlan:
+    """Replace trailing digits with an index following the hierarchy.
+
+    Args:
+        objs: objects to re-index.
+        traversal: 'depth' or 'breadth' first.
+        per_branch: restart numbering for each branch of the hierarchy.
+        start: first index.
+        padding: padding for index. eg 2 = 01, 3 = 001.
+
+    Returns:
+        plan to pass to apply_plan.
+    """
+    handles, branch_ids = order_by_hierarchy(get_handles(objs), traversal)
+
+    counters = {}
+    names = []
+    for handle, branch in zip(handles, branch_ids):
+        key = branch if per_branch else None
+        i = counters.get(key, start)
+        counters[key] = i + 1
+        base = naming.TRAILING_DIGITS.sub('', get_short_name(handle))
+        names.append(base + str(i).zfill(padding))
+
+    return plan_names(handles, names, start, padding)
+
+
+def rename(objs: typing.Iterable[str | om.MObject], **kwargs) -> int:
+    """Plan and apply a rename in one go, see plan_rename."""
+    return apply_plan(plan_rename(objs, **kwargs))
@@ -0,0 +1,147 @@
+"""Persistent history of renames.
+
+Every batch of renames is appended to a journal file per scene, stored locally
+next to the other Gizmo records. Nodes are tracked by UUID so the history
+survives reopening the scene, and any batch can be reverted in one undo step.
+
+Each line in the file is one batch:
+
+    {"id": 3, "time": 1700000000.0, "label": "rename", "entries": [[uuid, old, new], ...]}
+
+Unsaved scenes have nothing to key a file on, so their journal is only kept
+in memory for the session.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import time
+from maya.api import OpenMaya as om
+import maya.cmds as mc
+from .. import constants as c
+from . import core
+
+log = logging.getLogger("Rename Journal")
+log.setLevel(logging.INFO)
+
+
+class RenameJournal:
+    """Append only rename history for a scene, indexed by batch id and UUID."""
+
+    _folder = os.path.join('Record', 'rename_journal')
+
+    def __init__(self, scene: str = None):
+        """
+        Args:
+            scene: path of the scene, the open scene if not given, empty for an unsaved scene.
+        """
+        if scene is None:
+            scene = mc.file(query=True, sceneName=True) or ''
+
+        self.scene = scene
+        self._path = None
+        if scene:
+            key = hashlib.md5(os.path.normcase(scene).encode('utf-8')).hexdigest()[:12]
+            name = os.path.splitext(os.path.basename(scene))[0]
+            self._path = os.path.join(c.APP_DATA, self._folder, f'{name}_{key}.jsonl')
+
+        self._batches: dict[int, dict] = {}
+        self._uuids: dict[str, list[int]] = {}
+        self.load()
+
+    def load(self) -> None:
+        """Read the journal file and build the indices."""
+        self._batches.clear()
+        self._uuids.clear()
+        if self._path is None or not os.path.exists(self._path):
+            return
+
+        with open(self._path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    self._index(json.loads(line))
+
+        log.info(f"Loaded {len(self._batches)} batch(es): {self._path}")
+
+    def _index(self, batch: dict) -> None:
+        self._batches[batch['id']] = batch
+        for uuid, _, _ in batch['entries']:
+            self._uuids.setdefault(uuid, []).append(batch['id'])
+
+    def record(self, plan: core.RenamePlan, label: str = 'rename') -> int | None:
+        """Append the changes in a plan that has been applied.
+
+        Returns:
+            id of the new batch, None if nothing changed.
+        """
+        entries = []
+        for handle, old, new in plan.changes():
+            if not handle.isValid():
+                continue
+            uuid = om.MFnDependencyNode(handle.object()).uuid().asString()
+            entries.append([uuid, old, new])
+
+        if not entries:
+            return None
+
+        batch = {
+            'id': max(self._batches, default=0) + 1,
+            'time': time.time(),
+            'label': label,
+            'entries': entries
+        }
+
+        if self._path is not None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            with open(self._path, 'a') as f:
+                f.write(json.dumps(batch, separators=(',', ':')) + '\n')
+
+        self._index(batch)
+        return batch['id']
+
+    def batches(self) -> list[dict]:
+        """All batches, oldest first."""
+        return list(self._batches.values())
+
+    def batch(self, batch_id: int) -> dict:
+        return self._batches[batch_id]
+
+    def history(self, uuid: str) -> list[dict]:
+        """Batches that renamed a node, oldest first."""
+        return [self._batches[i] for i in self._uuids.get(uuid, [])]
+
+    def revert(self, batch_id: int) -> int:
+        """Restore the names from before a batch, as a single undo step.
+
+        The recorded names are applied as they are, not made unique again, so
+        a batch that swapped names swaps them back. The revert is recorded as
+        a new batch so it can be reverted too. Nodes that no longer exist are
+        skipped.
+
+        Returns:
+            number of objects renamed.
+        """
+        plan = core.RenamePlan()
+        sel = om.MSelectionList()
+        for uuid, old, _ in reversed(self._batches[batch_id]['entries']):
+            length = sel.length()
+            try:
+                sel.add(om.MUuid(uuid))
+            except RuntimeError:
+                continue
+            if sel.length() > length:
+                handle = om.MObjectHandle(sel.getDependNode(length))
+                plan.add(handle, core.get_short_name(handle), old)
+
+        count = core.apply_plan(plan)
+        self.record(plan, label=f'revert {batch_id}')
+        return count
+
+    def delete(self) -> None:
+        """Delete the journal file for the scene."""
+        if self._path is not None and os.path.exists(self._path):
+            os.remove(self._path)
+            log.info(f"Deleted file: {self._path}")
+        self._batches.clear()
+        self._uuids.clear()
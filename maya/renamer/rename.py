@@ -7,12 +7,20 @@ replace the name entirely.
 The history is stored allowing you to easily undo all name changes.
 """
 import re
+import time
 import maya.cmds as mc
-from PySide2.QtCore import Signal
+from maya.api import OpenMaya as om
+from PySide2.QtCore import Signal, Qt, QAbstractTableModel, QModelIndex, QTimer
+from PySide2.QtGui import QColor
 from PySide2.QtWidgets import *
 
 from ..utils import widgets
-from .. import utils
+from ..utils import naming
+from . import core
+from .journal import RenameJournal
+
+PREVIEW_DELAY = 150
+""": milliseconds to wait after the last edit before updating the preview"""
 
 
 class GizmoRenameUI(widgets.GMainWindow):
@@ -21,15 +29,38 @@ class GizmoRenameUI(widgets.GMainWindow):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.setWindowTitle('Renamer v1.0')
-        self.setFixedSize(276, 500)
+        self.setFixedSize(400, 880)
         self._prefix_line_edit = None
         self._suffix_line_edit = None
         self._name_lyt = None
         self._start_spin_box = None
         self._end_spin_box = None
         self.sr_lyt = None
+        self._traversal_combo = None
+        self._branch_check = None
+        self._padding_spin_box = None
+        self._history_combo = None
+        self._journal = None
+        self.preview_model = None
+        self._selection_dirty = True
+        self._selection_callback = None
+        self._scene_callbacks = []
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.setInterval(PREVIEW_DELAY)
+        self._preview_timer.timeout.connect(self.update_preview)
         self.setup()
         self.do_filter_child_events()
+        self.update_history()
+        self._selection_callback = om.MEventMessage.addEventCallback(
+            'SelectionChanged', self._selection_changed
+        )
+        # an unsaved scene's journal is only in memory, drop it with the scene
+        self._scene_callbacks = [
+            om.MSceneMessage.addCallback(message, self._scene_changed)
+            for message in (om.MSceneMessage.kAfterNew, om.MSceneMessage.kAfterOpen)
+        ]
+        self.update_preview()
 
     def setup(self):
         """Main UI setup"""
@@ -93,11 +124,58 @@ class GizmoRenameUI(widgets.GMainWindow):
             lambda x: setattr(replace_grp, 'active', x)
         )
 
+        # Preview of old -> new names for the current selection
+        preview_grp = widgets.GroupBoxText('Preview')
+        preview_grp.setStatusTip("preview new names before renaming.")
+        preview_lyt = QVBoxLayout()
+        preview_grp.setLayout(preview_lyt)
+        self.preview_model = RenamePreviewModel(self)
+        preview_view = QTableView()
+        preview_view.setModel(self.preview_model)
+        preview_view.setSelectionMode(QAbstractItemView.NoSelection)
+        preview_view.setWordWrap(False)
+        preview_view.verticalHeader().hide()
+        # fixed row heights so the view never has to measure 100k rows
+        preview_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        preview_view.verticalHeader().setDefaultSectionSize(18)
+        preview_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        preview_lyt.addWidget(preview_view)
+
+        for lyt in (self._name_lyt, self._prefix_line_edit, self._suffix_line_edit):
+            lyt.userEdit.connect(self._preview_timer.start)
+            lyt.line_edit.textChanged.connect(self._preview_timer.start)
+        for lyt in (self._start_spin_box, self._end_spin_box):
+            lyt.userEnabled.connect(self._preview_timer.start)
+            lyt.spin_box.valueChanged.connect(self._preview_timer.start)
+        self.sr_lyt.userEnabled.connect(self._preview_timer.start)
+        self.sr_lyt.search_text.textChanged.connect(self._preview_timer.start)
+        self.sr_lyt.replace_text.textChanged.connect(self._preview_timer.start)
+        self.sr_lyt.regex_check.stateChanged.connect(self._preview_timer.start)
+
         # Button layout
         go_button = QPushButton("RENAME SELECTED")
         go_button.setFixedHeight(30)
         go_button.clicked.connect(self.rename_selected)
 
+        # Re-index option layout
+        index_grp = widgets.GroupBoxText('Re-Index')
+        index_grp.setStatusTip("number selected object(s) in hierarchy order.")
+        index_lyt = QHBoxLayout()
+        index_grp.setLayout(index_lyt)
+        self._traversal_combo = QComboBox()
+        self._traversal_combo.addItem('Depth First', 'depth')
+        self._traversal_combo.addItem('Breadth First', 'breadth')
+        self._branch_check = QCheckBox('Per Branch')
+        self._branch_check.setStatusTip("restart numbering where the hierarchy splits.")
+        padding_label = QLabel('Padding')
+        self._padding_spin_box = QSpinBox()
+        self._padding_spin_box.setRange(1, 6)
+        self._padding_spin_box.setValue(2)
+        index_lyt.addWidget(self._traversal_combo)
+        index_lyt.addWidget(self._branch_check)
+        index_lyt.addWidget(padding_label)
+        index_lyt.addWidget(self._padding_spin_box)
+
         oder_btn = QPushButton("Re-Index")
         oder_btn.clicked.connect(self.re_order)
         oder_btn.setFixedHeight(30)
@@ -106,8 +184,22 @@ class GizmoRenameUI(widgets.GMainWindow):
         main_layout.addWidget(add_grp)
         main_layout.addWidget(remove_grp)
         main_layout.addWidget(replace_grp)
+        main_layout.addWidget(preview_grp, stretch=1)
         main_layout.addWidget(go_button)
+        # History layout
+        history_grp = widgets.GroupBoxText('History')
+        history_grp.setStatusTip("revert a previous rename, history is kept when the scene is reopened.")
+        history_lyt = QHBoxLayout()
+        history_grp.setLayout(history_lyt)
+        self._history_combo = QComboBox()
+        revert_btn = QPushButton("Revert")
+        revert_btn.clicked.connect(self.revert_selected_batch)
+        history_lyt.addWidget(self._history_combo, stretch=1)
+        history_lyt.addWidget(revert_btn)
+
+        main_layout.addWidget(index_grp)
         main_layout.addWidget(oder_btn)
+        main_layout.addWidget(history_grp)
 
     @staticmethod
     def get_state(*widgets: QWidget) -> bool:
@@ -122,19 +214,8 @@ class GizmoRenameUI(widgets.GMainWindow):
         """
         return True if any(w.user_enabled for w in widgets) else False
 
-    @utils.undo_chunk
-    def rename_selected(self):
-        """Rename objects in scene"""
-
-        # Re-order duplicate names so child names are first
-        sel = mc.ls(selection=True, long=True) or []
-        sel.sort(key=lambda obj: obj.count('|'), reverse=True)
-
-        if not sel:
-            self.status_bar.showMessage("nothing selected in scene!")
-            return
-
-        # Build key word arguments
+    def rename_options(self) -> dict:
+        """Build key word arguments from enabled options in the UI."""
         kwargs = {}
         if self._name_lyt.user_enabled:
             kwargs['name'] = self._name_lyt.user_text
@@ -152,32 +233,111 @@ class GizmoRenameUI(widgets.GMainWindow):
             kwargs['remove_end'] = self._end_spin_box.user_value
 
         if self.sr_lyt.user_enabled:
-            kwargs['search_replace'] = self.sr_lyt.search_replace
+            if self.sr_lyt.use_regex:
+                kwargs['regex'] = self.sr_lyt.regex
+            else:
+                kwargs['search_replace'] = self.sr_lyt.search_replace
 
+        return kwargs
+
+    def rename_selected(self):
+        """Rename objects in scene"""
+
+        sel = mc.ls(selection=True, long=True) or []
+        if not sel:
+            self.status_bar.showMessage("nothing selected in scene!")
+            return
+
+        kwargs = self.rename_options()
         if not kwargs:
             self.status_bar.showMessage("no options selected in UI!")
             return
 
-        new_names = []
-        for s in sel:
-            words = s.split('|') or [s]
-            name = utils.rename_string(words[-1], **kwargs)
-            mc.rename(s, name)
-            new_names.append(name)
+        # names are resolved for the whole selection before the scene changes,
+        # then applied in a single undo step.
+        try:
+            plan = core.plan_rename(sel, **kwargs)
+        except re.error as e:
+            self.status_bar.showMessage(f"invalid regex: {e}")
+            return
 
-        if not self.increment_unique:
-            for n in new_names:
-                if len(mc.ls(f'{n[:-1]}*')) >= 2:
-                    continue
-                mc.rename(n, n[:-3])
+        count = core.apply_plan(plan)
+        self.journal.record(plan, 'rename')
+        self.update_history()
 
-        self.status_bar.showMessage(f"Renamed {len(sel)} object(s)")
+        self._selection_changed()
+        self.status_bar.showMessage(f"Renamed {count} object(s)")
+
+    @property
+    def journal(self) -> RenameJournal:
+        """Rename history for the open scene."""
+        scene = mc.file(query=True, sceneName=True) or ''
+        if self._journal is None or self._journal.scene != scene:
+            self._journal = RenameJournal(scene)
+        return self._journal
+
+    def update_history(self):
+        """List past batches, newest first."""
+        self._history_combo.clear()
+        for batch in reversed(self.journal.batches()):
+            stamp = time.strftime('%d/%m %H:%M', time.localtime(batch['time']))
+            label = f"{batch['id']}: {batch['label']} ({len(batch['entries'])}) {stamp}"
+            self._history_combo.addItem(label, batch['id'])
+
+    def revert_selected_batch(self):
+        """Restore names from before the batch chosen in the history."""
+        batch_id = self._history_combo.currentData()
+        if batch_id is None:
+            self.status_bar.showMessage("no history for this scene!")
+            return
+
+        count = self.journal.revert(batch_id)
+        self.update_history()
+        self._selection_changed()
+        self.status_bar.showMessage(f"Reverted {count} object(s)")
+
+    def update_preview(self):
+        """Refresh preview with the current selection and options."""
+        if self._selection_dirty:
+            sel = mc.ls(selection=True) or []
+            self.preview_model.set_names([s.rpartition('|')[2] for s in sel])
+            self._selection_dirty = False
+
+        kwargs = self.rename_options()
+        try:
+            rule = naming.compile_rename_rule(**kwargs) if kwargs else None
+        except re.error as e:
+            self.status_bar.showMessage(f"invalid regex: {e}")
+            return
+
+        self.preview_model.set_rule(rule)
+
+    def _selection_changed(self, *args):
+        self._selection_dirty = True
+        self._preview_timer.start()
+
+    def _scene_changed(self, *args):
+        self._journal = None
+        self.update_history()
+
+    def _remove_callbacks(self):
+        if self._selection_callback is not None:
+            om.MMessage.removeCallback(self._selection_callback)
+            self._selection_callback = None
+        for callback in self._scene_callbacks:
+            om.MMessage.removeCallback(callback)
+        self._scene_callbacks = []
+
+    def dockCloseEventTriggered(self):
+        self._remove_callbacks()
+        super().dockCloseEventTriggered()
+
+    def closeEvent(self, event):
+        self._remove_callbacks()
+        super().closeEvent(event)
 
-    @utils.undo_chunk
     def re_order(self) -> None:
         """Re-index selected objects in hierarchy order"""
-        # Todo: update so user selection doesn't define the order
-        # selected joints should be checked an placed into heirarchy order
 
         sel = mc.ls(selection=True, long=True) or []
 
@@ -185,18 +345,94 @@ class GizmoRenameUI(widgets.GMainWindow):
             self.status_bar.showMessage("nothing selected in scene!")
             return
 
-        for i, x in zip(range(len(sel), 0, -1), reversed(sel)):
-            s = x.split("|")[-1]
-            pattern = re.compile(r'\d+$')
-            match = pattern.search(s)
-            if not match:
-                mc.rename(x, s + str(i).zfill(2))
+        plan = core.plan_reindex(
+            sel,
+            traversal=self._traversal_combo.currentData(),
+            per_branch=self._branch_check.isChecked(),
+            padding=self._padding_spin_box.value()
+        )
+        count = core.apply_plan(plan)
+        self.journal.record(plan, 're-index')
+        self.update_history()
+
+        self._selection_changed()
+        self.status_bar.showMessage(f"Re-indexed {count} object(s)")
+
+class RenamePreviewModel(QAbstractTableModel):
+    """Old -> new names for the selection.
+
+    New names are only worked out when the view asks for a row, so only visible
+    rows are computed. Results are cached per old name until the rule changes,
+    and updating the selection only signals the rows that actually changed.
+    """
+
+    headers = ('Old', 'New')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._names = []
+        self._rule = None
+        self._cache = {}
+        self._changed_colour = QColor('orange')
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else 2
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        old = self._names[index.row()]
+        if role == Qt.DisplayRole:
+            return old if index.column() == 0 else self.new_name(index.row())
+
+        if role == Qt.ForegroundRole and index.column() == 1:
+            if self.new_name(index.row()) != old:
+                return self._changed_colour
+
+        return None
+
+    def new_name(self, row: int) -> str:
+        """New name for row, before any uniqueness fixes."""
+        old = self._names[row]
+        if self._rule is None:
+            return old
+
+        new = self._cache.get(old)
+        if new is None:
+            new = self._cache[old] = self._rule.transform(old)
+        return self._rule.number(new, row)
+
+    def set_names(self, names: list[str]):
+        """Update old names, only rows that differ are refreshed."""
+        if len(names) != len(self._names):
+            self.beginResetModel()
+            self._names = names
+            self.endResetModel()
+            return
+
+        changed = [i for i, (a, b) in enumerate(zip(self._names, names)) if a != b]
+        self._names = names
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], 0), self.index(changed[-1], 1))
+
+    def set_rule(self, rule: naming.RenameRule | None):
+        """Update the rename rule, the new name column is recomputed lazily."""
+        if rule is self._rule:
+            return
 
-            if match:
-                original = match.group(0)
-                _index = int(original) + 1
-                new_str = s[:len(original) * -1] + str(i).zfill(2)
-                mc.rename(x, new_str)
+        self._rule = rule
+        self._cache = {}
+        if self._names:
+            self.dataChanged.emit(self.index(0, 1), self.index(len(self._names) - 1, 1))
 
 
 class GroupLineEdit(QHBoxLayout):
@@ -284,6 +520,7 @@ class GroupSearchReplaceWidget(QVBoxLayout):
     """
 
     search_replace = []
+    use_regex = False
     userEnabled = Signal(bool)
 
     def __init__(self, *args, **kwargs):
@@ -310,8 +547,13 @@ class GroupSearchReplaceWidget(QVBoxLayout):
         replace_label.setMinimumWidth(40)
         self.replace_text = QLineEdit()
         self.replace_text.setEnabled(False)
+        self.regex_check = QCheckBox('Regex')
+        self.regex_check.setEnabled(False)
+        self.regex_check.setStatusTip("treat the search field as one regular expression, commas and spaces included.")
+        self.regex_check.stateChanged.connect(lambda x: setattr(self, 'use_regex', bool(x)))
         replace_layout.addWidget(replace_label)
         replace_layout.addWidget(self.replace_text)
+        replace_layout.addWidget(self.regex_check)
         replace_layout.addStretch(1)
 
         self.search_text.textChanged.connect(
@@ -332,8 +574,14 @@ class GroupSearchReplaceWidget(QVBoxLayout):
         self._user_enabled = value
         self.replace_text.setEnabled(value)
         self.search_text.setEnabled(value)
+        self.regex_check.setEnabled(value)
         self.userEnabled.emit(value)
 
+    @property
+    def regex(self):
+        """Pattern and replacement as typed, one pair, regexes can hold commas and spaces."""
+        return [(self.search_text.text(), self.replace_text.text())]
+
     def create_args(self, search_text, replace_text):
         """Create list of tuples for search and replace.
 
@@ -1,6 +1,7 @@
 from .general import (
     undo_chunk,
     UndoChunk,
+    do_modifier,
     get_m_object,
     get_m_dagpath,
     get_m_transform,
@@ -17,4 +18,5 @@ from .maths import (
     zero_joint_orient
 )
 
+from . import naming
 from . import widgets
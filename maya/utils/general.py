@@ -3,10 +3,17 @@
 General purpose functions to be shared across the codebase.
 """
 import functools
-import re
+import os
 from maya.api import OpenMaya as om
 import maya.cmds as mc
 from maya import mel
+from . import naming
+from .. import constants as c
+
+MODIFIER_PLUGIN = 'gizmoModifier'
+""": plugin command used to put modifiers on the undo queue"""
+
+_modifier_queue = []
 
 
 def get_m_dagpath(obj: str) -> om.MDagPath:
@@ -65,6 +72,23 @@ class UndoChunk:
         print("...undo chunk end.")
 
 
+def do_modifier(modifier: om.MDGModifier) -> None:
+    """Execute a modifier as a single undoable command.
+
+    Modifiers executed from a script aren't recorded by Maya's undo queue, so the
+    modifier is handed to the gizmoModifier plugin command which keeps hold of it
+    for undo/redo.
+
+    Args:
+        modifier: MDGModifier or MDagModifier with queued operations.
+    """
+    if not mc.pluginInfo(MODIFIER_PLUGIN, query=True, loaded=True):
+        mc.loadPlugin(os.path.join(c.PLUGINS, f'{MODIFIER_PLUGIN}.py'), quiet=True)
+
+    _modifier_queue.append(modifier)
+    mc.gizmoModifier()
+
+
 class ProgressBar:
     def __init__(self, max_value, status):
         super().__init__()
@@ -113,29 +137,9 @@ def split_string(name: str) -> list[str, str, str]:
 
 def increment_string(x: str, i: int, padding: int = 2) -> str:
     """Sanity check, if name exists then increment until unique name found."""
-    if not mc.objExists(x):
-        return x
-
-    pattern = re.compile(r'\d+$')
-    match = pattern.search(x)
-    if match:
-        original = match.group(0)
-        _index = int(original) + 1
-        new_str = x[:len(original) * -1]
-        if not new_str.endswith('_'):
-            new_str += '_'
-        new_str += str(_index).zfill(padding)
-        return increment_string(new_str, i, padding)
+    return naming.increment_name(x, i, padding, mc.objExists)
 
-    n = x
-    if not n.endswith('_'):
-        n += '_'
-    n += str(i).zfill(padding)
 
-    return increment_string(n, i, padding)
-
-
-@undo_chunk
 def rename_string(
         obj: str,
         name: str = '',
@@ -144,6 +148,7 @@ def rename_string(
         remove_start=None,
         remove_end=None,
         search_replace: list[tuple[str]] = None,
+        regex: list[tuple[str]] = None,
         index: int = 1,
         number_padding: int = 2
         ) -> str:
@@ -157,6 +162,7 @@ def rename_string(
         remove_start: remove x amount of digit from the beginning.
         remove_end: remove x amount of digits from the end.
         search_replace: search and replace keywords, each tuple is a separate check.
+        regex: regex pattern and replacement pairs.
         index: Optional suffix.
         number_padding: padding for index. eg 2 = 01, 3 = 001.
 
@@ -164,30 +170,16 @@ def rename_string(
         new name after user changes.
     """
 
-    if search_replace is None:
-        search_replace = [('', '')]
-
-    if name:
-        obj = name
-
-    if remove_start and remove_end:
-        obj = obj[remove_start:(remove_end * -1)]
-    elif remove_start and not remove_end:
-        obj = obj[remove_start:]
-    elif not remove_start and remove_end:
-        obj = obj[:(remove_end * -1)]
-    else:
-        pass
-
-    for search, replace in search_replace:
-        obj = obj.replace(search, replace)
-
-    if prefix:
-        obj = f"{prefix}{obj}"
-
-    if suffix:
-        obj += suffix
-
+    rule = naming.compile_rename_rule(
+        name=name,
+        prefix=prefix,
+        suffix=suffix,
+        remove_start=remove_start,
+        remove_end=remove_end,
+        search_replace=search_replace,
+        regex=regex
+    )
+    obj = rule(obj)
     obj = increment_string(obj, index, number_padding)
 
     return obj
@@ -0,0 +1,186 @@
+"""Pure name manipulation.
+
+Nothing in here touches the Maya scene, so these functions can be used to
+plan renames up front and are safe to call outside of Maya.
+"""
+from __future__ import annotations
+import functools
+import re
+import typing
+
+TRAILING_DIGITS = re.compile(r'\d+$')
+""": digits at the end of a name"""
+
+
+class RenameRule:
+    """Renamer options compiled into a single transform.
+
+    Inactive options are dropped when the rule is built, so applying the rule only
+    runs the steps that change something. Search/replace pairs can optionally be
+    fused into one alternation regex so the name is scanned once. Note a fused rule
+    replaces in a single pass, so a replacement can't be matched by a later pair.
+    """
+
+    def __init__(
+            self,
+            name: str = '',
+            prefix: str = '',
+            suffix: str = '',
+            remove_start: int = None,
+            remove_end: int = None,
+            search_replace: tuple[tuple[str, str], ...] = (),
+            regex: tuple[tuple[str, str], ...] = (),
+            number_start: int = None,
+            number_step: int = 1,
+            number_padding: int = 2,
+            fuse: bool = False
+            ):
+        self.number_start = number_start
+        self.number_step = number_step
+        self.number_padding = number_padding
+        self._steps = []
+
+        if name:
+            self._steps.append(lambda x: name)
+
+        if remove_start or remove_end:
+            _slice = slice(remove_start or None, (remove_end * -1) if remove_end else None)
+            self._steps.append(lambda x: x[_slice])
+
+        pairs = [(search, replace) for search, replace in search_replace if search]
+        if fuse and len(pairs) > 1:
+            lookup = {}
+            for search, replace in pairs:
+                lookup.setdefault(search, replace)
+            pattern = re.compile('|'.join(re.escape(t) for t in sorted(lookup, key=len, reverse=True)))
+            self._steps.append(lambda x: pattern.sub(lambda m: lookup[m.group(0)], x))
+        else:
+            for search, replace in pairs:
+                self._steps.append(lambda x, s=search, r=replace: x.replace(s, r))
+
+        for pattern, replace in regex:
+            if not pattern:
+                continue
+            self._steps.append(functools.partial(re.compile(pattern).sub, replace))
+
+        if prefix or suffix:
+            self._steps.append(lambda x: f"{prefix}{x}{suffix}")
+
+    def __call__(self, obj: str, i: int = 0) -> str:
+        """Rename a single name, i is its position when numbering."""
+        return self.number(self.transform(obj), i)
+
+    def apply(self, names: typing.Iterable[str]) -> list[str]:
+        """Rename a list of names, repeated names are only transformed once."""
+        cache = {}
+        result = []
+        for i, name in enumerate(names):
+            new = cache.get(name)
+            if new is None:
+                new = cache[name] = self.transform(name)
+            result.append(self.number(new, i))
+
+        return result
+
+    def transform(self, obj: str) -> str:
+        """Rename a single name, without numbering."""
+        for step in self._steps:
+            obj = step(obj)
+        return obj
+
+    def number(self, obj: str, i: int) -> str:
+        """Add the number for position i, if numbering is enabled."""
+        if self.number_start is None:
+            return obj
+        return obj + str(self.number_start + i * self.number_step).zfill(self.number_padding)
+
+
+def compile_rename_rule(
+        name: str = '',
+        prefix: str = '',
+        suffix: str = '',
+        remove_start: int = None,
+        remove_end: int = None,
+        search_replace: typing.Iterable[tuple[str, str]] = None,
+        regex: typing.Iterable[tuple[str, str]] = None,
+        number_start: int = None,
+        number_step: int = 1,
+        number_padding: int = 2,
+        fuse: bool = False
+        ) -> RenameRule:
+    """Build a rename rule from the renamer options.
+
+    Rules are cached, so calling this with the same options is cheap.
+
+    Args:
+        name: replace existing name with this one.
+        prefix: add text at the beginning.
+        suffix: add text at the end.
+        remove_start: remove x amount of digit from the beginning.
+        remove_end: remove x amount of digits from the end.
+        search_replace: search and replace keywords, each tuple is a separate check.
+        regex: regex pattern and replacement pairs, applied after search_replace.
+        number_start: if set, number names in order starting from this value.
+        number_step: increment between numbered names.
+        number_padding: padding for numbers. eg 2 = 01, 3 = 001.
+        fuse: replace all search_replace pairs in a single pass.
+
+    Returns:
+        compiled rule.
+    """
+    return _compile_rename_rule(
+        name or '',
+        prefix or '',
+        suffix or '',
+        remove_start,
+        remove_end,
+        tuple(tuple(p) for p in search_replace or ()),
+        tuple(tuple(p) for p in regex or ()),
+        number_start,
+        number_step,
+        number_padding,
+        fuse
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _compile_rename_rule(*args) -> RenameRule:
+    return RenameRule(*args)
+
+
+def format_name(obj: str, **kwargs) -> str:
+    """Apply the renamer options to a single name, see compile_rename_rule.
+
+    Returns:
+        new name, not guaranteed to be unique.
+    """
+    return compile_rename_rule(**kwargs)(obj)
+
+
+def increment_name(x: str, i: int, padding: int, exists: typing.Callable[[str], bool]) -> str:
+    """Increment name until exists returns False.
+
+    Args:
+        x: name to check.
+        i: index to add if the name has no trailing digits.
+        padding: padding for index. eg 2 = 01, 3 = 001.
+        exists: returns True if a name is already taken.
+
+    Returns:
+        unique name.
+    """
+    while exists(x):
+        match = TRAILING_DIGITS.search(x)
+        if match:
+            original = match.group(0)
+            x = x[:len(original) * -1]
+            if not x.endswith('_'):
+                x += '_'
+            x += str(int(original) + 1).zfill(padding)
+            continue
+
+        if not x.endswith('_'):
+            x += '_'
+        x += str(i).zfill(padding)
+
+    return x
@@ -0,0 +1,263 @@
+"""
+Performance measurements for the node editor.
+
+Generates graphs through GraphicsScene.add_node/add_edge, as the editor does,
+and times building them, repainting at each zoom level, panning, dragging a
+selection and deleting everything, plus the memory each node takes. Results
+are printed as json, or appended to a json lines file to compare over time:
+
+    python -m gizmo.standalone.node_editor.benchmark --nodes 1000 5000 --output results.jsonl
+
+On Linux it runs on Qt's offscreen platform unless QT_QPA_PLATFORM is set, so
+it doesn't need a display. Also used to tune the level of detail thresholds in
+graphics.lod, see lod_frame_times.
+"""
+from __future__ import annotations
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+if sys.platform.startswith('linux'):
+    # must be set before the QApplication is created
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import PySide2
+from PySide2.QtCore import *
+from PySide2.QtWidgets import *
+
+from .graphics.graphics_scene import GraphicsScene
+from .graphics.graphics_view import GraphicsView
+from .graphics.graphics_node import GraphicsNode
+from .graphics.graphics_edge import GraphicsEdgeBezier
+
+ZOOM_LEVELS = (1.0, 0.6, 0.4, 0.3, 0.2, 0.1)
+
+VIEW_SIZE = (1275, 750)
+""": viewport size, the same as NodeUI"""
+
+PAN_STEP = 40
+""": pixels the view moves per pan frame"""
+
+DRAG_NODES = 50
+""": nodes in the dragged selection"""
+
+
+def build_grid(scene: GraphicsScene, count: int, columns: int = 50, spacing: float = 260.0) -> list[GraphicsNode]:
+    """Add count nodes to the scene laid out in a grid."""
+    nodes = []
+    for i in range(count):
+        position = [(i % columns) * spacing, (i // columns) * spacing]
+        node = GraphicsNode(f'Node{i}', scene, position=position, inputs=['a', 'b'], outputs=['c'])
+        scene.add_node(node)
+        nodes.append(node)
+    return nodes
+
+
+def build_graph(
+        scene: GraphicsScene,
+        nodes: int,
+        edges: int,
+        max_sockets: int = 4,
+        columns: int = 50,
+        spacing: float = 300.0,
+        seed: int = 0
+        ) -> tuple[list[GraphicsNode], list[GraphicsEdgeBezier]]:
+    """Add a random graph to the scene, laid out in a grid.
+
+    Nodes get 1 to max_sockets inputs and outputs. Edges only run from a node to
+    one after it, so there are no cycles, and an input takes at most one edge,
+    so fewer edges than asked for are made if inputs run out.
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(nodes):
+        inputs = [f'in{p}' for p in range(rng.randint(1, max_sockets))]
+        outputs = [f'out{p}' for p in range(rng.randint(1, max_sockets))]
+        position = [(i % columns) * spacing, (i // columns) * spacing]
+        item = GraphicsNode(f'Node{i}', scene, position=position, inputs=inputs, outputs=outputs)
+        scene.add_node(item)
+        items.append(item)
+
+    free = [(i, s) for i, item in enumerate(items) if i for s in item.inputs]
+    rng.shuffle(free)
+    lines = []
+    for target_index, target in free[:edges]:
+        # mostly short edges, like a hand built graph
+        source_index = max(0, target_index - int(rng.expovariate(1 / 20.0)) - 1)
+        source = rng.choice(items[source_index].outputs)
+        line = GraphicsEdgeBezier(scene)
+        line.set_source(source.scenePos(), source)
+        scene.add_edge(line)
+        line.set_destination(target.scenePos(), target)
+        if scene.connect_edge(line) is None:
+            scene.delete_edge(line)
+        else:
+            lines.append(line)
+    return items, lines
+
+
+def frame_time(view: GraphicsView, frames: int = 10) -> float:
+    """Average time in milliseconds to repaint the whole viewport."""
+    view.viewport().repaint()
+    start = time.perf_counter()
+    for _ in range(frames):
+        view.viewport().repaint()
+    return (time.perf_counter() - start) * 1000.0 / frames
+
+
+def lod_frame_times(view: GraphicsView, zoom_levels=ZOOM_LEVELS, frames: int = 10) -> dict[float, float]:
+    """Frame time at each zoom level, centred on the scene's items."""
+    centre = view.scene().itemsBoundingRect().center()
+    results = {}
+    for zoom in zoom_levels:
+        view.resetTransform()
+        view.scale(zoom, zoom)
+        view.centerOn(centre)
+        results[zoom] = frame_time(view, frames)
+    return results
+
+
+def _summary(times: list[float]) -> dict[str, float]:
+    times = sorted(times)
+    return {
+        'mean': statistics.fmean(times),
+        'median': statistics.median(times),
+        'p95': times[min(len(times) - 1, int(len(times) * 0.95))],
+        'max': times[-1],
+    }
+
+
+def pan_frame_times(view: GraphicsView, frames: int = 60, zoom: float = 0.6) -> dict[str, float]:
+    """Time to scroll the view and repaint, in milliseconds, panning diagonally across the graph."""
+    view.resetTransform()
+    view.scale(zoom, zoom)
+    view.centerOn(view.scene().itemsBoundingRect().topLeft())
+    QApplication.processEvents()
+    times = []
+    for _ in range(frames):
+        start = time.perf_counter()
+        view.horizontalScrollBar().setValue(view.horizontalScrollBar().value() + PAN_STEP)
+        view.verticalScrollBar().setValue(view.verticalScrollBar().value() + PAN_STEP // 2)
+        view.viewport().repaint()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return _summary(times)
+
+
+def drag_frame_times(view: GraphicsView, items: list[GraphicsNode], frames: int = 60) -> dict[str, float]:
+    """Time to move a selection and repaint, in milliseconds, including updating its edges."""
+    selection = items[:DRAG_NODES]
+    view.resetTransform()
+    view.centerOn(view.scene().nodes_rect([i.model.id for i in selection]).center())
+    view.scene().select_nodes([i.model.id for i in selection])
+    times = []
+    for frame in range(frames):
+        offset = 5.0 if frame % 20 < 10 else -5.0
+        start = time.perf_counter()
+        for item in selection:
+            item.moveBy(offset, offset)
+        view.viewport().repaint()
+        times.append((time.perf_counter() - start) * 1000.0)
+    view.scene().clearSelection()
+    return _summary(times)
+
+
+def _rss() -> int | None:
+    """Resident memory of this process in bytes, None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def run(nodes: int, edges: int, max_sockets: int = 4, frames: int = 10, seed: int = 0) -> dict:
+    """Measure everything for one graph size, see the module docstring."""
+    scene = GraphicsScene()
+    view = GraphicsView(scene)
+    view.resize(*VIEW_SIZE)
+    view.show()
+    QApplication.processEvents()
+
+    # resident memory rather than tracemalloc, which misses Qt's allocations and slows the build
+    gc.collect()
+    rss = _rss()
+    start = time.perf_counter()
+    items, lines = build_graph(scene, nodes, edges, max_sockets, seed=seed)
+    build = time.perf_counter() - start
+    rss_after = _rss()
+
+    result = {
+        'nodes': len(items),
+        'edges': len(lines),
+        'max_sockets': max_sockets,
+        'build_s': build,
+        'rss_bytes_per_node': None if rss is None else (rss_after - rss) / max(len(items), 1),
+        'repaint_ms': {str(zoom): t for zoom, t in lod_frame_times(view, frames=frames).items()},
+        'pan_ms': pan_frame_times(view, frames=frames * 6),
+        'drag_ms': drag_frame_times(view, items, frames=frames * 6),
+    }
+
+    start = time.perf_counter()
+    scene.delete_items(list(scene.nodes) + list(scene.edges))
+    QApplication.processEvents()
+    result['delete_s'] = time.perf_counter() - start
+
+    view.close()
+    scene.scheduler.shutdown()
+    return result
+
+
+def main(argv: list[str] = None) -> list[dict]:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--nodes', type=int, nargs='+', default=[500, 2000], help='graph sizes to run')
+    parser.add_argument('--edges-per-node', type=float, default=1.5, help='edges per node, capped by free inputs')
+    parser.add_argument('--max-sockets', type=int, default=4, help='most inputs and outputs on a node')
+    parser.add_argument('--frames', type=int, default=10, help='frames per repaint measurement')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='json lines file to append results to, printed if not given')
+    parser.add_argument('--lod', action='store_true', help='only print frame times at each zoom level of a grid')
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    if args.lod:
+        scene = GraphicsScene()
+        view = GraphicsView(scene)
+        view.resize(*VIEW_SIZE)
+        view.show()
+        build_grid(scene, 2000)
+        print(json.dumps(lod_frame_times(view), indent=4))
+        return []
+
+    meta = {
+        'time': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pyside': PySide2.__version__,
+        'qt': qVersion(),
+        'platform': app.platformName(),
+        'machine': platform.machine(),
+    }
+    results = []
+    for count in args.nodes:
+        result = run(count, int(count * args.edges_per_node), args.max_sockets, args.frames, args.seed)
+        result.update(meta)
+        results.append(result)
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+    else:
+        print(json.dumps(results, indent=4))
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Cache of operator outputs.
+
+Outputs are keyed by node id and a digest of the operator, its input values and
+params, so a node whose inputs go back to values it has seen before doesn't
+recompute. Entries are evicted least recently used first once the cache holds
+more than max_bytes. Large entries can be spilled to disk instead of dropped,
+and are read back on their next hit. Entries larger than max_bytes go straight
+to disk when spilling, and stay there.
+
+Only operators registered with cached=True go through the cache, hashing the
+inputs of cheap operators costs more than computing them.
+"""
+from __future__ import annotations
+import collections
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import tempfile
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+log = logging.getLogger("Output Cache")
+log.setLevel(logging.INFO)
+
+MAX_BYTES = 256 * 1024 * 1024
+""": default memory budget"""
+
+SPILL_MIN_BYTES = 1024 * 1024
+""": smallest entry worth writing to disk when evicted"""
+
+
+def sizeof(value) -> int:
+    """Rough size of a value in bytes, exact for arrays and buffers."""
+    if np is not None and isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (bytes, bytearray, str)):
+        return len(value)
+    if isinstance(value, memoryview):
+        return value.nbytes
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _update(h, value) -> None:
+    if np is not None and isinstance(value, np.ndarray):
+        h.update(f'{value.dtype.str}{value.shape}'.encode())
+        h.update(memoryview(np.ascontiguousarray(value)).cast('B'))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        h.update(value)
+    elif isinstance(value, (list, tuple)):
+        h.update(f'{type(value).__name__}{len(value)}'.encode())
+        for v in value:
+            _update(h, v)
+    else:
+        h.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def digest(*values) -> str | None:
+    """Hash of values, None if a value can't be hashed."""
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        for value in values:
+            _update(h, value)
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return None
+    return h.hexdigest()
+
+
+class NodeStats:
+    """Cache and compute timings for a node."""
+    __slots__ = ('hits', 'misses', 'computes', 'time', 'last_time')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.computes = 0
+        self.time = 0.0
+        self.last_time = 0.0
+
+    def __repr__(self):
+        return f"NodeStats(hits={self.hits}, misses={self.misses}, time={self.time:.4f})"
+
+    def summary(self) -> str:
+        """Short text for display, eg. '3/1 2.1ms', hits/misses and last compute time."""
+        return f"{self.hits}/{self.misses} {self.last_time * 1000.0:.1f}ms"
+
+
+class OutputCache:
+    """LRU cache of node outputs bounded by their total size."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES, spill: bool = False, spill_dir: str = None,
+                 spill_max_bytes: int = None):
+        """
+        Args:
+            max_bytes: memory budget, least recently used entries are evicted above it.
+            spill: write evicted entries of at least SPILL_MIN_BYTES to disk.
+            spill_dir: folder for spilled entries, a temporary folder if not given.
+            spill_max_bytes: disk budget, defaults to 4 * max_bytes.
+        """
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self.spill_max_bytes = spill_max_bytes or max_bytes * 4
+        self._spill_dir = spill_dir
+        self._entries: collections.OrderedDict[tuple, tuple[tuple, int]] = collections.OrderedDict()
+        self._spilled: collections.OrderedDict[tuple, tuple[str, int]] = collections.OrderedDict()
+        self.bytes = 0
+        self.spilled_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries) + len(self._spilled)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries or key in self._spilled
+
+    @property
+    def spill_dir(self) -> str:
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix='node_editor_cache_')
+        return self._spill_dir
+
+    def get(self, key: tuple) -> tuple | None:
+        """Cached outputs, None on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry[0]
+
+        spilled = self._spilled.get(key)
+        if spilled is None:
+            return None
+
+        path, size = spilled
+        try:
+            with open(path, 'rb') as f:
+                outputs = pickle.load(f)
+        except (OSError, pickle.UnpicklingError) as e:
+            log.warning(f"Couldn't read spilled entry {path}: {e}")
+            self.discard(key)
+            return None
+
+        if size > self.max_bytes:
+            # too big to hold in memory, it stays on disk
+            self._spilled.move_to_end(key)
+            return outputs
+
+        self.discard(key)
+        self.put(key, outputs)
+        return outputs
+
+    def put(self, key: tuple, outputs: tuple) -> None:
+        size = sizeof(outputs)
+        self.discard(key)
+        if size > self.max_bytes:
+            if self.spill:
+                self._spill(key, outputs, size)
+            return
+
+        self._entries[key] = (outputs, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        key, (outputs, size) = self._entries.popitem(last=False)
+        self.bytes -= size
+        if self.spill and size >= SPILL_MIN_BYTES:
+            self._spill(key, outputs, size)
+
+    def _spill(self, key: tuple, outputs: tuple, size: int) -> None:
+        """Write an entry to disk, within spill_max_bytes."""
+        if size > self.spill_max_bytes:
+            return
+
+        path = os.path.join(self.spill_dir, f'{digest(key)}.pkl')
+        try:
+            with open(path, 'wb') as f:
+                pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            log.warning(f"Couldn't spill entry for node {key[0]}: {e}")
+            self._remove_file(path)
+            return
+
+        self._spilled[key] = (path, size)
+        self.spilled_bytes += size
+        while self.spilled_bytes > self.spill_max_bytes:
+            _, (old_path, old_size) = self._spilled.popitem(last=False)
+            self.spilled_bytes -= old_size
+            self._remove_file(old_path)
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def discard(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+        spilled = self._spilled.pop(key, None)
+        if spilled is not None:
+            self.spilled_bytes -= spilled[1]
+            self._remove_file(spilled[0])
+
+    def discard_node(self, node_id: int) -> None:
+        """Remove every entry for a node, eg. when it's deleted."""
+        for key in [k for k in self._entries if k[0] == node_id] + [k for k in self._spilled if k[0] == node_id]:
+            self.discard(key)
+
+    def clear(self) -> None:
+        for path, _ in self._spilled.values():
+            self._remove_file(path)
+        self._entries.clear()
+        self._spilled.clear()
+        self.bytes = 0
+        self.spilled_bytes = 0
@@ -4,6 +4,11 @@ from gizmo import constants as c
 from .graphics.graphics_view import GraphicsView
 from .graphics.graphics_scene import GraphicsScene
 from .graphics.graphics_node import GraphicsNode
+from .search_panel import SearchPanel
+from . import serializer
+
+FILE_FILTER = f'Graph (*{serializer.EXTENSION});;JSON (*.json)'
+""": file dialog filter for saving and loading graphs"""
 
 
 class NodeUI(QMainWindow):
@@ -29,12 +34,98 @@ class NodeUI(QMainWindow):
         self.view.show()
         lyt.addWidget(self.view, stretch=2)
 
+        self.search_panel = SearchPanel(self.scene, self.view)
+        self.search_panel.hide()
+        lyt.addWidget(self.search_panel)
+
         self.scene.add_node(GraphicsNode('Default', self.scene, position=[500, 500], inputs=["x", "y"],  outputs=['Ross', "h"]))
 
+        file_menu = self.menuBar().addMenu('File')
+        file_menu.addAction('Open...', self.open_graph, 'Ctrl+O')
+        file_menu.addAction('Save', self.save_graph, 'Ctrl+S')
+        file_menu.addAction('Save As...', self.save_graph_as, 'Ctrl+Shift+S')
+
+        edit_menu = self.menuBar().addMenu('Edit')
+        self.undo_action = edit_menu.addAction('Undo', self.scene.undo, 'Ctrl+Z')
+        self.redo_action = edit_menu.addAction('Redo', self.scene.redo, 'Ctrl+Shift+Z')
+        self.scene.history.subscribe(self.update_undo_actions)
+        self.update_undo_actions()
+
+        graph_menu = self.menuBar().addMenu('Graph')
+        graph_menu.addAction('Evaluate Selected', self.evaluate_selected, 'Ctrl+E')
+        graph_menu.addAction('Auto Layout', self.auto_layout, 'Ctrl+L')
+        graph_menu.addAction('Collapse Selected', self.collapse_selected, 'Ctrl+G')
+        graph_menu.addAction('Expand Selected', self.expand_selected, 'Ctrl+Shift+G')
+        stats_action = graph_menu.addAction('Show Stats')
+        stats_action.setCheckable(True)
+        stats_action.toggled.connect(self.scene.set_show_stats)
+
+        view_menu = self.menuBar().addMenu('View')
+        minimap_action = view_menu.addAction('Minimap')
+        minimap_action.setShortcut('M')
+        minimap_action.setCheckable(True)
+        minimap_action.toggled.connect(self.view.show_minimap)
+        view_menu.addAction('Find...', self.find_nodes, 'Ctrl+F')
+
         # menu = QWidget()
         # lyt.addWidget(menu, stretch=1)
         self.show()
 
+    def open_graph(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Open Graph', self.scene.filepath, FILE_FILTER)
+        if path:
+            try:
+                self.scene.load(path)
+            except (OSError, serializer.SerializeError) as e:
+                QMessageBox.warning(self, 'Open Graph', f"Couldn't open {path}: {e}")
+                return
+            self.setWindowTitle(f'Node Editor - {self.scene.filename}')
+
+    def update_undo_actions(self):
+        history = self.scene.history
+        self.undo_action.setEnabled(history.can_undo())
+        self.undo_action.setText(f'Undo {history.undo_text()}'.strip())
+        self.redo_action.setEnabled(history.can_redo())
+        self.redo_action.setText(f'Redo {history.redo_text()}'.strip())
+
+    def find_nodes(self):
+        self.search_panel.show()
+        self.search_panel.focus()
+
+    def evaluate_selected(self):
+        items = [i for i in self.scene.selectedItems() if isinstance(i, GraphicsNode) and i.model is not None]
+        self.scene.evaluate([i.model.id for i in items])
+
+    def _selected_ids(self):
+        return [i.model.id for i in self.scene.selectedItems() if isinstance(i, GraphicsNode) and i.model is not None]
+
+    def collapse_selected(self):
+        node_ids = self._selected_ids()
+        if node_ids:
+            node = self.scene.collapse(node_ids)
+            if node is not None:
+                self.scene.select_nodes([node.id])
+
+    def expand_selected(self):
+        self.scene.select_nodes(self.scene.expand(self._selected_ids()))
+
+    def auto_layout(self):
+        """Lay out the selected nodes, or the whole graph if nothing is selected."""
+        items = [i for i in self.scene.selectedItems() if isinstance(i, GraphicsNode) and i.model is not None]
+        self.scene.auto_layout([i.model.id for i in items] or None)
+
+    def save_graph(self):
+        if not self.scene.filename:
+            self.save_graph_as()
+            return
+        self.scene.save()
+
+    def save_graph_as(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Save Graph', self.scene.filepath, FILE_FILTER)
+        if path:
+            self.scene.save(path)
+            self.setWindowTitle(f'Node Editor - {self.scene.filename}')
+
 
 def launch():
 
@@ -0,0 +1,334 @@
+"""
+Evaluate graphs of registered operators.
+
+Evaluation is pulled: asking for an output computes only the nodes upstream of
+it that are out of date, in topological order. Changes push dirty flags
+downstream, following only the edges leaving dirty output ports, and stop at
+ports that are already dirty. A recomputed output whose value hasn't changed
+keeps its version, so nodes further down skip their compute:
+
+    evaluator = Evaluator(graph)
+    evaluator.value(node.id)
+    graph.set_param(other.id, 'value', 2.0)
+    evaluator.value(node.id)  # recomputes only what other feeds
+"""
+from __future__ import annotations
+import collections
+import time
+import typing
+
+from . import cache
+from . import model
+from . import operators
+from . import subgraph
+from .model import Graph
+
+
+class CycleError(Exception):
+    """The graph can't be evaluated because it contains a loop."""
+
+    def __init__(self, nodes: typing.Iterable[int]):
+        self.nodes = sorted(nodes)
+        super().__init__(f"cycle between nodes {self.nodes}")
+
+
+class EvaluationError(Exception):
+    """An operator raised while computing a node."""
+
+    def __init__(self, node_id: int, error: Exception):
+        self.node_id = node_id
+        self.error = error
+        super().__init__(f"node {node_id}: {error!r}")
+
+
+def topological_sort(graph: Graph, node_ids: typing.Iterable[int] = None) -> list[int]:
+    """Order nodes so every node comes after the nodes feeding it.
+
+    Args:
+        graph: graph to sort.
+        node_ids: only sort these nodes, edges to other nodes are ignored.
+
+    Raises:
+        CycleError: the nodes contain a cycle.
+    """
+    nodes = set(graph.nodes if node_ids is None else node_ids)
+    degree = {n: 0 for n in nodes}
+    for n in nodes:
+        for source in graph.upstream(n):
+            if source in nodes:
+                degree[n] += 1
+
+    ready = collections.deque(n for n, d in degree.items() if d == 0)
+    order = []
+    while ready:
+        n = ready.popleft()
+        order.append(n)
+        for target in graph.downstream(n):
+            if target in degree:
+                degree[target] -= 1
+                if degree[target] == 0:
+                    ready.append(target)
+
+    if len(order) != len(nodes):
+        raise CycleError(n for n, d in degree.items() if d > 0)
+    return order
+
+
+def creates_cycle(graph: Graph, source: int, target: int) -> bool:
+    """Would connecting source to target create a cycle."""
+    if source == target:
+        return True
+    stack = [target]
+    seen = {target}
+    while stack:
+        for n in graph.downstream(stack.pop()):
+            if n == source:
+                return True
+            if n not in seen:
+                seen.add(n)
+                stack.append(n)
+    return False
+
+
+def _changed(old, new) -> bool:
+    if old is new:
+        return False
+    try:
+        return bool(old != new)
+    except (TypeError, ValueError):
+        # eg. arrays, where != doesn't give a single bool
+        return True
+
+
+class Evaluator:
+    """Lazily computes and caches node outputs for a graph.
+
+    Every output port has a version that increases when its value changes.
+    A node remembers the versions of its inputs from its last compute, if they
+    and its params are unchanged it's up to date without computing.
+    """
+
+    def __init__(self, graph: Graph, registry: dict[str, operators.Operator] = None, output_cache: cache.OutputCache = None):
+        """
+        Args:
+            graph: graph to evaluate.
+            registry: operators by node type, defaults to operators.REGISTRY.
+            output_cache: cache for the outputs of operators registered as cached.
+        """
+        self.graph = graph
+        self.registry = operators.REGISTRY if registry is None else registry
+        self.cache = output_cache
+        self.stats: dict[int, cache.NodeStats] = {}
+        self._outputs: dict[int, tuple] = {}
+        self._versions: dict[tuple[int, int], int] = {}
+        self._inputs_seen: dict[int, tuple] = {}
+        self._param_versions: dict[int, int] = {}
+        self._dirty: set[tuple[int, int]] = set()
+        self._compounds: dict[int, subgraph.Compound] = {}
+        self.graph.subscribe(self._graph_changed)
+
+    def close(self) -> None:
+        """Stop following changes to the graph."""
+        self.graph.unsubscribe(self._graph_changed)
+
+    def _graph_changed(self, event: str, item: model.Node | model.Edge) -> None:
+        if event in (model.EDGE_ADDED, model.EDGE_REMOVED):
+            self.mark_dirty(item.target)
+        elif event == model.PARAM_CHANGED:
+            self._param_versions[item.id] = self._param_versions.get(item.id, 0) + 1
+            self.mark_dirty(item.id)
+        elif event == model.NODE_REMOVED:
+            self._forget(item)
+
+    def _forget(self, node: model.Node) -> None:
+        self._outputs.pop(node.id, None)
+        self._inputs_seen.pop(node.id, None)
+        self._param_versions.pop(node.id, None)
+        self.stats.pop(node.id, None)
+        compound = self._compounds.pop(node.id, None)
+        if compound is not None:
+            compound.evaluator.close()
+        if self.cache is not None:
+            self.cache.discard_node(node.id)
+        for port in range(len(node.outputs)):
+            self._versions.pop((node.id, port), None)
+            self._dirty.discard((node.id, port))
+
+    def is_dirty(self, node_id: int, port: int = None) -> bool:
+        """Is an output, or any output if no port is given, out of date."""
+        if node_id not in self._outputs:
+            return True
+        if port is not None:
+            return (node_id, port) in self._dirty
+        return any((node_id, p) in self._dirty for p in range(len(self.graph.nodes[node_id].outputs)))
+
+    def mark_dirty(self, node_id: int) -> None:
+        """Flag every output of a node, and everything they feed, as out of date."""
+        stack = [node_id]
+        while stack:
+            n = stack.pop()
+            for port in range(len(self.graph.nodes[n].outputs)):
+                key = (n, port)
+                if key in self._dirty:
+                    continue
+                self._dirty.add(key)
+                stack.extend(e.target for e in self.graph.output_edges(n, port))
+
+    def schedule(self, node_id: int) -> list[int]:
+        """Nodes that need visiting to bring a node up to date, in the order to visit them.
+
+        Raises:
+            CycleError: the node depends on itself.
+        """
+        needed = set()
+        stack = [node_id]
+        while stack:
+            n = stack.pop()
+            if n in needed or not self.is_dirty(n):
+                continue
+            needed.add(n)
+            stack.extend(self.graph.upstream(n))
+        return topological_sort(self.graph, needed)
+
+    def value(self, node_id: int, port: int = 0) -> typing.Any:
+        """Value of an output, computing whatever is out of date upstream of it."""
+        if self.is_dirty(node_id, port):
+            for n in self.schedule(node_id):
+                self.update(n)
+        return self._outputs[node_id][port]
+
+    def outputs(self, node_id: int) -> tuple:
+        """Every output value of a node."""
+        self.value(node_id)
+        return self._outputs[node_id]
+
+    def gather(self, node_id: int) -> tuple[list, tuple]:
+        """Input values for a node, and the key identifying them.
+
+        Connected inputs must already be up to date.
+        """
+        node = self.graph.nodes[node_id]
+        values = []
+        key = [self._param_versions.get(node_id, 0)]
+        for port, p in enumerate(node.inputs):
+            edge = self.graph.input_edge(node_id, port)
+            if edge is None:
+                values.append(node.params.get(p.name, self.operator(node_id).defaults.get(p.name)))
+                key.append(None)
+            else:
+                values.append(self._outputs[edge.source][edge.source_port])
+                key.append((edge.source, edge.source_port, self._versions[(edge.source, edge.source_port)]))
+        return values, tuple(key)
+
+    def operator(self, node_id: int) -> operators.Operator:
+        node_type = self.graph.nodes[node_id].type
+        if node_type == subgraph.COMPOUND:
+            return subgraph.OPERATOR
+        try:
+            return self.registry[node_type]
+        except KeyError:
+            raise EvaluationError(node_id, KeyError(f"no operator registered for {node_type!r}")) from None
+
+    def needs_compute(self, node_id: int, key: tuple) -> bool:
+        """Have a node's inputs changed since it was last computed, key is from gather."""
+        return node_id not in self._outputs or self._inputs_seen.get(node_id) != key
+
+    def mark_clean(self, node_id: int) -> None:
+        """Flag a node's outputs as up to date without computing them."""
+        for port in range(len(self._outputs[node_id])):
+            self._dirty.discard((node_id, port))
+
+    def compound(self, node_id: int) -> subgraph.Compound:
+        """Interior of a compound node, built with its own evaluator and cache the first time it's needed.
+
+        It's rebuilt if the node's interior is replaced.
+        """
+        data = self.graph.nodes[node_id].params[subgraph.SUBGRAPH_PARAM]
+        compound = self._compounds.get(node_id)
+        if compound is None or compound.data is not data:
+            if compound is not None:
+                compound.evaluator.close()
+            compound = subgraph.Compound(data)
+            output_cache = None if self.cache is None else cache.OutputCache(subgraph.CACHE_BYTES)
+            compound.evaluator = Evaluator(compound.graph, self.registry, output_cache)
+            self._compounds[node_id] = compound
+        return compound
+
+    def node_stats(self, node_id: int) -> cache.NodeStats:
+        stats = self.stats.get(node_id)
+        if stats is None:
+            stats = self.stats[node_id] = cache.NodeStats()
+        return stats
+
+    def lookup(self, node_id: int, inputs: list) -> tuple[tuple | None, tuple | None]:
+        """Look for a node's outputs in the cache.
+
+        Returns:
+            cache key, None if the node isn't cached, and the outputs, None on a miss.
+        """
+        op = self.operator(node_id)
+        if self.cache is None or not op.cached:
+            return None, None
+
+        h = cache.digest(op.name, inputs, op.kwargs(self.graph.nodes[node_id].params))
+        if h is None:
+            return None, None
+
+        key = (node_id, h)
+        outputs = self.cache.get(key)
+        stats = self.node_stats(node_id)
+        if outputs is None:
+            stats.misses += 1
+        else:
+            stats.hits += 1
+        return key, outputs
+
+    def finish(self, node_id: int, cache_key: tuple | None, outputs: tuple, seconds: float) -> None:
+        """Record a compute that took place, and cache its outputs."""
+        stats = self.node_stats(node_id)
+        stats.computes += 1
+        stats.time += seconds
+        stats.last_time = seconds
+        if cache_key is not None:
+            self.cache.put(cache_key, outputs)
+
+    def compute(self, node_id: int, inputs: list) -> tuple:
+        """Run a node's operator on its input values, or take them from the cache."""
+        cache_key, outputs = self.lookup(node_id, inputs)
+        if outputs is not None:
+            return outputs
+
+        node = self.graph.nodes[node_id]
+        start = time.perf_counter()
+        try:
+            if node.type == subgraph.COMPOUND:
+                outputs = self.compound(node_id).compute(inputs)
+            else:
+                outputs = self.operator(node_id).compute(inputs, node.params)
+        except EvaluationError:
+            # from inside a compound node, the interior node is more use than the compound
+            raise
+        except Exception as e:
+            raise EvaluationError(node_id, e) from e
+        self.finish(node_id, cache_key, outputs, time.perf_counter() - start)
+        return outputs
+
+    def store(self, node_id: int, key: tuple, outputs: tuple) -> None:
+        """Keep computed outputs, only outputs that changed get a new version."""
+        old = self._outputs.get(node_id)
+        for port, value in enumerate(outputs):
+            if old is None or _changed(old[port], value):
+                self._versions[(node_id, port)] = self._versions.get((node_id, port), 0) + 1
+            self._dirty.discard((node_id, port))
+        self._outputs[node_id] = outputs
+        self._inputs_seen[node_id] = key
+
+    def update(self, node_id: int) -> None:
+        """Bring one node up to date, its inputs must already be up to date."""
+        inputs, key = self.gather(node_id)
+        if not self.needs_compute(node_id, key):
+            # upstream recomputed to the same values
+            self.mark_clean(node_id)
+            return
+
+        self.store(node_id, key, self.compute(node_id, inputs))
@@ -3,3 +3,6 @@ from . import graphics_edge
 from . import graphics_socket
 from . import graphics_node
 from . import graphics_scene
+from . import graphics_grid
+from . import lod
+from . import graphics_edge_layer
@@ -9,6 +9,9 @@ EDGE_CV_ROUNDNESS = 100
 
 from shiboken2 import isValid
 
+from .graphics_socket import GraphicsSocket
+from . import lod
+
 class GraphicsEdge(QGraphicsPathItem):
     def __init__(self, session, parent=None):
         super(GraphicsEdge, self).__init__(parent)
@@ -23,6 +26,8 @@ class GraphicsEdge(QGraphicsPathItem):
         self._pen_dragging.setStyle(Qt.DashDotLine)
         self._pen.setWidthF(2.0)
         self._pen_selected.setWidthF(2.0)
+        # the item's pen is only used for boundingRect/shape, so they include the line width
+        self.setPen(self._pen)
 
         self.setFlag(QGraphicsItem.ItemIsSelectable)
         self.setZValue(2)
@@ -33,11 +38,19 @@ class GraphicsEdge(QGraphicsPathItem):
         self.end = [200, 100]
         self.is_live = False
         self.session = session
+        self.model = None
+        self.layer = None
+        self._ends = None
+
+    @staticmethod
+    def _owner(item):
+        """Node that moves the given socket or node."""
+        return item.node if isinstance(item, GraphicsSocket) else item
 
     def set_source(self, value, node=None):
         if node:
-            node.UserDeleted.connect(self.remove)
             self.start_parent = node
+            self._owner(node).edges.add(self)
         if isinstance(value, QPointF):
             self.start = value
         else:
@@ -45,8 +58,8 @@ class GraphicsEdge(QGraphicsPathItem):
 
     def set_destination(self, value, node=None):
         if node:
-            node.UserDeleted.connect(self.remove)
             self.end_parent = node
+            self._owner(node).edges.add(self)
             self.is_live = True
 
         if isinstance(value, QPointF):
@@ -55,39 +68,82 @@ class GraphicsEdge(QGraphicsPathItem):
             self.end = QPointF(value[0], value[1])
 
         self.update_path()
+        if node and self.layer is not None:
+            self.layer.mark_dirty(self)
+
+    def itemChange(self, change, value):
+        # selected edges are drawn by themselves rather than the edge layer
+        if change == QGraphicsItem.ItemSelectedHasChanged and self.layer is not None:
+            self.layer.mark_dirty(self)
+
+        return super().itemChange(change, value)
 
     def paint(self, painter, QStyleOptionGraphicsItem, widget=None):
-        self.update_path()
-        if self.edge is None:
+        if self.layer is not None and self.layer.batches(self):
+            return
+
+        if not self.is_live:
             painter.setPen(self._pen_dragging)
         else:
             painter.setPen(self._pen if not self.isSelected() else self._pen_selected)
         painter.setBrush(Qt.NoBrush)
+        if self._ends is not None and lod.get_lod(QStyleOptionGraphicsItem, painter) != lod.FULL:
+            painter.drawLine(QLineF(*self._ends))
+            return
+
         painter.drawPath(self.path())
 
     def update_path(self):
+        """Rebuild the path if either end has moved.
+
+        Called when a connected node moves, not on every paint.
+        """
+        start = self.start_parent.scenePos() if self.start_parent is not None else self.start
+        end = self.end_parent.scenePos() if self.end_parent is not None else self.end
+        ends = (start.x(), start.y(), end.x(), end.y())
+        if ends == self._ends:
+            return
+
+        self._ends = ends
+        old_rect = self.sceneBoundingRect()
+        self.setPath(self.build_path(start, end))
+        if self.layer is not None:
+            self.layer.mark_dirty(self, old_rect)
+
+    def build_path(self, start, end):
         # handle drawing QPainterPath form point A to B
-        raise NotImplemented("This method has to be overwridden in a child class")
+        raise NotImplementedError("This method has to be overwridden in a child class")
+
+    def sockets(self):
+        """Output and input socket this edge connects, None if it doesn't connect an output to an input."""
+        start, end = self.start_parent, self.end_parent
+        if not isinstance(start, GraphicsSocket) or not isinstance(end, GraphicsSocket):
+            return None
+        if start.is_input == end.is_input:
+            return None
+        return (end, start) if start.is_input else (start, end)
+
+    def detach(self):
+        """Stop tracking connected nodes, called when the edge is removed from the scene."""
+        for parent in (self.start_parent, self.end_parent):
+            if parent is not None:
+                self._owner(parent).edges.discard(self)
+        if self.layer is not None:
+            self.layer.remove(self)
 
     def remove(self):
-        # self.edge.remove()
         self.session.delete_edge(self)
 
 
 class GraphicsEdgeDirect(GraphicsEdge):
-    def update_path(self):
-        start = self.start_parent.scenePos() if self.start_parent else self.start
-        end = self.end_parent.scenePos() if self.end_parent else self.end
+    def build_path(self, start, end):
         path = QPainterPath(start)
         path.lineTo(end)
-        self.setPath(path)
+        return path
 
 
 class GraphicsEdgeBezier(GraphicsEdge):
-    def update_path(self):
-        start = self.start_parent.scenePos() if self.start_parent is not None else self.start
-        end = self.end_parent.scenePos() if self.end_parent is not None else self.end
-
+    def build_path(self, start, end):
         path = QPainterPath()
         ctrl1 = QPointF(start.x() + 100, start.y())
         ctrl2 = QPointF(end.x() - 100, end.y())
@@ -95,4 +151,4 @@ class GraphicsEdgeBezier(GraphicsEdge):
         path.moveTo(start)
         path.cubicTo(ctrl1, ctrl2, end)
 
-        self.setPath(path)
+        return path
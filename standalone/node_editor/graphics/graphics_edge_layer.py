@@ -0,0 +1,107 @@
+from PySide2.QtWidgets import *
+from PySide2.QtCore import *
+from PySide2.QtGui import *
+
+from . import lod
+
+BUCKET_SIZE = 256
+""": number of edges combined into each cached path"""
+
+
+class EdgeLayer(QGraphicsItem):
+    """Draw all connected, unselected edges as a few combined paths.
+
+    Edges are split into buckets, each with its own combined QPainterPath. When an
+    edge moves only its bucket is rebuilt, on the next paint, and only the area
+    the edge covered is repainted. Selected and dragged edges still draw
+    themselves so they can use their own pens.
+    """
+
+    def __init__(self, pen: QPen, parent=None):
+        super().__init__(parent)
+        self._rect = QRectF()
+        self._pen = QPen(pen)
+        self._edges = {}
+        self._buckets = []
+        self._dirty = set()
+        self.setZValue(2)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
+
+    def boundingRect(self):
+        # only ever grows, so edges moving inside it don't cause a geometry change
+        return self._rect
+
+    def batches(self, edge) -> bool:
+        """Is the edge drawn by this layer."""
+        return edge.is_live and not edge.isSelected()
+
+    def add(self, edge):
+        if edge in self._edges:
+            return
+
+        for i, bucket in enumerate(self._buckets):
+            if len(bucket['edges']) < BUCKET_SIZE:
+                break
+        else:
+            i = len(self._buckets)
+            self._buckets.append({'edges': set(), 'path': QPainterPath(), 'bounds': QRectF(), 'lines': []})
+
+        self._buckets[i]['edges'].add(edge)
+        self._edges[edge] = i
+        edge.layer = self
+        self.mark_dirty(edge)
+
+    def remove(self, edge):
+        i = self._edges.pop(edge, None)
+        if i is None:
+            return
+
+        self._buckets[i]['edges'].discard(edge)
+        edge.layer = None
+        self._dirty.add(i)
+        self.update(edge.sceneBoundingRect())
+
+    def mark_dirty(self, edge, old_rect: QRectF = None):
+        """Rebuild the edge's bucket on the next paint."""
+        i = self._edges.get(edge)
+        if i is None:
+            return
+
+        self._dirty.add(i)
+        rect = edge.sceneBoundingRect()
+        if not self._rect.contains(rect):
+            self.prepareGeometryChange()
+            self._rect = self._rect.united(rect)
+        self.update(rect if old_rect is None else rect.united(old_rect))
+
+    def _rebuild(self):
+        for i in self._dirty:
+            bucket = self._buckets[i]
+            path = QPainterPath()
+            lines = []
+            for edge in bucket['edges']:
+                if self.batches(edge):
+                    path.addPath(edge.path())
+                    if edge._ends is not None:
+                        lines.append(QLineF(*edge._ends))
+            bucket['path'] = path
+            bucket['bounds'] = path.boundingRect()
+            bucket['lines'] = lines
+        self._dirty.clear()
+
+    def paint(self, painter, option, widget=None):
+        if self._dirty:
+            self._rebuild()
+
+        tier = lod.get_lod(option, painter)
+        exposed = option.exposedRect
+        painter.setPen(self._pen)
+        painter.setBrush(Qt.NoBrush)
+        for bucket in self._buckets:
+            if not bucket['bounds'].intersects(exposed):
+                continue
+            if tier != lod.FULL:
+                painter.drawLines(bucket['lines'])
+            else:
+                painter.drawPath(bucket['path'])
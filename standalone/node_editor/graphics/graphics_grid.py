@@ -0,0 +1,146 @@
+from PySide2.QtWidgets import *
+from PySide2.QtCore import *
+from PySide2.QtGui import *
+import math
+
+TILE_MIN_PIXELS = 8
+""": below this tile size in pixels the grid is drawn with lines"""
+
+TILE_MAX_PIXELS = 2048
+""": above this tile size in pixels the grid is drawn with lines"""
+
+
+class GridRenderer:
+    """Draw the background grid from a cached tile.
+
+    One major cell, with its minor lines, is rendered into a QPixmap at the current
+    zoom level and painted as a tiled brush. Tiles are cached per zoom level and
+    cleared whenever the grid size or colours change. At extreme zoom levels,
+    where a tile would be tiny or huge, the grid falls back to drawing lines.
+    """
+
+    def __init__(self, size=20, square=5, color_light=QColor("#2f2f2f"), color_dark=QColor("#292929")):
+        self._size = size
+        self._square = square
+        self._color_light = QColor(color_light)
+        self._color_dark = QColor(color_dark)
+        self._pen_light = None
+        self._pen_dark = None
+        self._tiles = {}
+        self.invalidate()
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
+        self.invalidate()
+
+    @property
+    def square(self):
+        return self._square
+
+    @square.setter
+    def square(self, value):
+        self._square = value
+        self.invalidate()
+
+    @property
+    def color_light(self):
+        return self._color_light
+
+    @color_light.setter
+    def color_light(self, value):
+        self._color_light = QColor(value)
+        self.invalidate()
+
+    @property
+    def color_dark(self):
+        return self._color_dark
+
+    @color_dark.setter
+    def color_dark(self, value):
+        self._color_dark = QColor(value)
+        self.invalidate()
+
+    def invalidate(self):
+        """Clear cached tiles."""
+        self._tiles.clear()
+        self._pen_light = QPen(self._color_light, 1)
+        self._pen_dark = QPen(self._color_dark, 2)
+
+    def draw(self, painter, rect):
+        scale = painter.worldTransform().m11()
+        cell = self._size * self._square
+        pixels = cell * scale
+        if pixels < TILE_MIN_PIXELS or pixels > TILE_MAX_PIXELS:
+            self.draw_lines(painter, rect)
+            return
+
+        # tiles are rendered at device resolution so they stay crisp, the brush
+        # transform scales them back into scene units and anchors them to the origin
+        tile = self._tile(int(round(pixels)))
+        brush = QBrush(tile)
+        brush.setTransform(QTransform.fromScale(cell / tile.width(), cell / tile.height()))
+        painter.save()
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        painter.fillRect(rect, brush)
+        painter.restore()
+
+    def _tile(self, pixels):
+        tile = self._tiles.get(pixels)
+        if tile is not None:
+            return tile
+
+        tile = QPixmap(pixels, pixels)
+        tile.fill(Qt.transparent)
+        step = pixels / self._square
+        tile_painter = QPainter(tile)
+        tile_painter.setPen(QPen(self._color_light, 1))
+        for i in range(1, self._square):
+            offset = int(round(i * step))
+            tile_painter.drawLine(offset, 0, offset, pixels)
+            tile_painter.drawLine(0, offset, pixels, offset)
+
+        # major line is split over the tile edges so neighbouring tiles join up
+        tile_painter.setPen(QPen(self._color_dark, 1))
+        tile_painter.drawLine(0, 0, 0, pixels)
+        tile_painter.drawLine(0, 0, pixels, 0)
+        tile_painter.drawLine(pixels - 1, 0, pixels - 1, pixels)
+        tile_painter.drawLine(0, pixels - 1, pixels, pixels - 1)
+        tile_painter.end()
+
+        self._tiles[pixels] = tile
+        return tile
+
+    def draw_lines(self, painter, rect):
+        """Draw the grid one line at a time."""
+        left = int(math.floor(rect.left()))
+        right = int(math.ceil(rect.right()))
+        top = int(math.floor(rect.top()))
+        bottom = int(math.ceil(rect.bottom()))
+
+        first_left = left - (left % self._size)
+        first_top = top - (top % self._size)
+
+        lines_light = []
+        lines_dark = []
+        for x in range(first_left, right, self._size):
+            if x % (self._size * self._square) != 0:
+                lines_light.append(QLine(x, top, x, bottom))
+            else:
+                lines_dark.append(QLine(x, top, x, bottom))
+
+        for y in range(first_top, bottom, self._size):
+            if y % (self._size * self._square) != 0:
+                lines_light.append(QLine(left, y, right, y))
+            else:
+                lines_dark.append(QLine(left, y, right, y))
+
+        painter.setPen(self._pen_light)
+        painter.drawLines(lines_light)
+
+        painter.setPen(self._pen_dark)
+        painter.drawLines(lines_dark)
@@ -3,7 +3,62 @@ from PySide2.QtCore import *
 from PySide2.QtGui import *
 
 from .meta import MetaNode
+from .. import serializer
 from .graphics_socket import GraphicsSocket
+from . import lod
+
+_paths = {}
+""": body, title and outline paths shared by nodes of the same size"""
+
+_font_metrics = {}
+""": font metrics shared by nodes using the same font"""
+
+
+def get_paths(width, height, edge_size, text_height):
+    """Get cached, simplified paths for a node of the given size."""
+    key = (width, height, edge_size, text_height)
+    paths = _paths.get(key)
+    if paths is not None:
+        return paths
+
+    # content
+    path_content = QPainterPath()
+    path_content.setFillRule(Qt.WindingFill)
+    path_content.addRoundedRect(0, 0, width, height, edge_size, edge_size)
+    path_content.addRect(0, text_height, edge_size, edge_size)
+    path_content.addRect(width - edge_size, text_height, edge_size, edge_size)
+
+    # title bar
+    title = QPainterPath()
+    title.setFillRule(Qt.WindingFill)
+    title.addRoundedRect(0, 0, width, text_height, edge_size, edge_size)
+    title.addRect(0, text_height - edge_size, edge_size, edge_size)
+    title.addRect(width - edge_size, text_height - edge_size, edge_size, edge_size)
+
+    # outline
+    outline = QPainterPath()
+    outline.addRoundedRect(0, 0, width, height, edge_size, edge_size)
+
+    paths = _paths[key] = (path_content.simplified(), title.simplified(), outline.simplified())
+    return paths
+
+
+def get_font_metrics(font):
+    """Get shared font metrics for a font."""
+    key = font.key()
+    metrics = _font_metrics.get(key)
+    if metrics is None:
+        metrics = _font_metrics[key] = QFontMetrics(font)
+    return metrics
+
+
+class GraphicsTitle(QGraphicsTextItem):
+    """Node title, hidden when zoomed out."""
+
+    def paint(self, painter, option, widget=None):
+        if lod.get_lod(option, painter) != lod.FULL:
+            return
+        super().paint(painter, option, widget)
 
 
 class GraphicsNode(QObject, QGraphicsItem, MetaNode):
@@ -14,7 +69,12 @@ class GraphicsNode(QObject, QGraphicsItem, MetaNode):
     padding = 4.0
     edge_size = 5.0
     text_height = 24.0
+    socket_offset = 30.0
+    socket_spacing = 20.0
     name = ''
+    node_type = ''
+    device_cache = False
+    """: opt-in, cache the node as a pixmap in device coordinates"""
 
     def __init__(self, name, session, position=None, inputs: list = None, outputs: list = None, parent=None):
         QObject.__init__(self)
@@ -27,6 +87,9 @@ class GraphicsNode(QObject, QGraphicsItem, MetaNode):
             outputs = []
         self.name = name
         self.session = session
+        self.model = None
+        self.edges = set()
+        self.status_item = None
         self._create()
 
         if position is None:
@@ -56,65 +119,127 @@ class GraphicsNode(QObject, QGraphicsItem, MetaNode):
         self._brush_background = QBrush(QColor("#7e7e7e"))
 
         # create title
-        self.text_item = QGraphicsTextItem(self)
+        self.text_item = GraphicsTitle(self)
         self.text_item.setPlainText(self.name)
         self.text_item.node = self.name
         self.text_item.setDefaultTextColor(self._title_color)
         self.text_item.setFont(self._title_font)
-        self.text_item.setPos((self.width / 2) - QLabel().fontMetrics().boundingRect(self.name).width(), -22)
+        metrics = get_font_metrics(self._title_font)
+        self.text_item.setPos((self.width / 2) - metrics.boundingRect(self.name).width(), -22)
         self.text_item.setTextWidth(self.width - 2 * self.padding)
 
         self.setFlag(QGraphicsItem.ItemIsSelectable)
         self.setFlag(QGraphicsItem.ItemIsMovable)
+        self.setFlag(QGraphicsItem.ItemSendsScenePositionChanges)
+        self.set_device_cache(self.device_cache)
+
+    def set_device_cache(self, enabled):
+        """Cache the node as a pixmap, faster to pan but re-rendered when zooming."""
+        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache if enabled else QGraphicsItem.NoCache)
+
+    @classmethod
+    def from_model(cls, node, session):
+        """Create a graphics node for a node in the graph model."""
+        item = cls(
+            node.name,
+            session,
+            position=[node.x, node.y],
+            inputs=[p.name for p in node.inputs],
+            outputs=[p.name for p in node.outputs]
+        )
+        item.node_type = node.type
+        return item
+
+    def serialise(self):
+        """Node as a row in the json format, the node must have been added to a scene."""
+        return serializer.node_to_list(self.model)
+
+    def deserialise(self, data):
+        """Restore name and position from serialise, sockets are fixed once created."""
+        node = serializer.node_from_list(data)
+        if self.model is None:
+            self.set_name(node.name)
+        else:
+            self.session.graph.rename_node(self.model.id, node.name)
+            self.model.params = node.params
+        self.setPos(node.x, node.y)
+
+    def set_name(self, name):
+        self.name = name
+        self.text_item.setPlainText(name)
+
+    def set_status(self, text):
+        """Show short text on the right of the title bar, eg. evaluation stats."""
+        if self.status_item is None:
+            if not text:
+                return
+            self.status_item = GraphicsTitle(self)
+            self.status_item.setDefaultTextColor(QColor("#d0d0d0"))
+            self.status_item.setFont(QFont("Ubuntu", 8))
+
+        self.status_item.setPlainText(text)
+        rect = self.status_item.boundingRect()
+        self.status_item.setPos(self.width - self.padding - rect.width(), (self.text_height - rect.height()) / 2)
+
+    @classmethod
+    def socket_position(cls, input, index):
+        """Position of a socket relative to its node, as x, y."""
+        return 0.0 if input else cls.width, cls.socket_offset + index * cls.socket_spacing
 
     def add_socket(self, name, input=True):
-        if input:
-            offset = 30 + len(self.inputs) * 20
-            socket = GraphicsSocket(self, QPointF(0.0, offset))
-            self.inputs.append(socket)
-        else:
-            offset = 30 + len(self.outputs) * 20
-            socket = GraphicsSocket(self, QPointF(self.width, offset))
-            self.outputs.append(socket)
+        sockets = self.inputs if input else self.outputs
+        socket = GraphicsSocket(self, QPointF(*self.socket_position(input, len(sockets))))
+        socket.index = len(sockets)
+        sockets.append(socket)
+        socket.name = name
+        socket.is_input = input
+
+    def itemChange(self, change, value):
+        # only edges connected to this node need their paths updating
+        if change == QGraphicsItem.ItemScenePositionHasChanged:
+            for edge in self.edges:
+                edge.update_path()
+            if self.model is not None:
+                self.session.graph.move_node(self.model.id, value.x(), value.y())
+
+        if change == QGraphicsItem.ItemSelectedHasChanged:
+            self.text_item.setDefaultTextColor(self._title_color if not value else QColor("#FFFFA637"))
+
+        return super().itemChange(change, value)
 
     def boundingRect(self):
         return QRectF(0, 0, 2 * self.edge_size + self.width, 2 * self.edge_size + self.height).normalized()
 
     def paint(self, painter, QstyleOptionGraphicsItem, widget=None):
+        if lod.get_lod(QstyleOptionGraphicsItem, painter) != lod.FULL:
+            self.paint_simple(painter)
+            return
 
-        self.text_item.setDefaultTextColor(self._title_color if not self.isSelected() else QColor("#FFFFA637"))
+        path_content, title, outline = get_paths(self.width, self.height, self.edge_size, self.text_height)
 
         # content
-        path_content = QPainterPath()
-        path_content.setFillRule(Qt.WindingFill)
-        path_content.addRoundedRect(0,
-                                    0,
-                                    self.width,
-                                    self.height,
-                                    self.edge_size,
-                                    self.edge_size)
-
-        path_content.addRect(0, self.text_height, self.edge_size, self.edge_size)
-        path_content.addRect(self.width - self.edge_size, self.text_height, self.edge_size, self.edge_size)
         painter.setPen(Qt.NoPen)
         painter.setBrush(self._brush_background)
-        painter.drawPath(path_content.simplified())
+        painter.drawPath(path_content)
 
         # title bar
-        title = QPainterPath()
-        title.setFillRule(Qt.WindingFill)
-        title.addRoundedRect(0, 0, self.width, self.text_height, self.edge_size, self.edge_size)
-        title.addRect(0, self.text_height - self.edge_size, self.edge_size, self.edge_size)
-        title.addRect(self.width - self.edge_size,
-                      self.text_height - self.edge_size,
-                      self.edge_size, self.edge_size)
-        painter.setPen(Qt.NoPen)
         painter.setBrush(self._brush_title)
-        painter.drawPath(title.simplified())
+        painter.drawPath(title)
 
         # outline
-        outline = QPainterPath()
-        outline.addRoundedRect(0, 0, self.width, self.height, self.edge_size, self.edge_size)
         painter.setPen(self.pen_default if not self.isSelected() else self.pen_selected)
         painter.setBrush(Qt.NoBrush)
-        painter.drawPath(outline.simplified())
+        painter.drawPath(outline)
+
+    def paint_simple(self, painter):
+        """Draw plain rectangles when zoomed out."""
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(self._brush_background)
+        painter.drawRect(QRectF(0, self.text_height, self.width, self.height - self.text_height))
+        painter.setBrush(self._brush_title)
+        painter.drawRect(QRectF(0, 0, self.width, self.text_height))
+
+        if self.isSelected():
+            painter.setPen(self.pen_selected)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(QRectF(0, 0, self.width, self.height))
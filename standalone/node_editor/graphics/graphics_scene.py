@@ -1,10 +1,45 @@
 from PySide2.QtWidgets import *
 from PySide2.QtCore import *
 from PySide2.QtGui import *
+import collections
+import contextlib
+import logging
 import math
+import os
+
+from .graphics_grid import GridRenderer
+from .graphics_edge import GraphicsEdge, GraphicsEdgeBezier
+from .graphics_edge_layer import EdgeLayer
+from .graphics_node import GraphicsNode
+from .. import cache
+from .. import evaluate
+from .. import history
+from .. import layout
+from .. import model
+from .. import operators
+from .. import scheduler
+from .. import serializer
+from .. import spatial
+from .. import subgraph
+
+MATERIALIZE_BATCH = 250
+""": node items created per event loop pass while a graph is loading"""
+
+VIRTUAL_MARGIN = 400.0
+""": scene units around the visible rect that also get items when virtualized"""
+
+POOL_SIZE = 500
+""": hidden node items kept for reuse, per socket layout"""
+
+SOCKET_CELL_SIZE = 64.0
+""": cell size of the socket index, around the spacing between sockets"""
+
+log = logging.getLogger("Node Editor")
 
 
 class GraphicsScene(QGraphicsScene):
+    Loaded = Signal()
+
     def __init__(self, *args, **kwargs):
         super(GraphicsScene, self).__init__(*args, **kwargs)
 
@@ -12,75 +47,641 @@ class GraphicsScene(QGraphicsScene):
         self.filename = ''
         self.rig = ''
 
-        self.nodes = []
-        self.edges = []
+        self.nodes = set()
+        self.edges = set()
         self.graphics_scene = None
+        self.edge_layer = None
+
+        # graphics items mirror the graph, keyed by model id
+        self.graph = model.Graph()
+        self.graph.subscribe(self._graph_changed)
+        self.evaluator = evaluate.Evaluator(self.graph, output_cache=cache.OutputCache())
+        self.show_stats = False
+        self.scheduler = scheduler.Scheduler(self.evaluator)
+        self.history = history.History(self.graph)
+        self._move_start = None
+        self.node_items = {}
+        self.edge_items = {}
+        self._pending_node = None
+        self._pending_edge = None
+
+        # ids of loaded nodes waiting for graphics items, None when not loading
+        self._deferred = None
+        self._materialize_timer = QTimer(self)
+        self._materialize_timer.setInterval(0)
+        self._materialize_timer.timeout.connect(self._materialize_batch)
+
+        # node bounds, used to find nodes in view when virtualized
+        self.index = spatial.GridIndex()
+        self.socket_index = spatial.GridIndex(SOCKET_CELL_SIZE)
+        self.virtualized = False
+        self._visible_rect = None
+        self._pool = {}
 
         # settings
         self.setSceneRect(QRect(10000, 10000, 10000, 10000))
-        self.gris_size = 20
-        self.grid_square = 5
 
         self._color_background = QColor("#393939")
-        self._color_light = QColor("#2f2f2f")
-        self._color_dark = QColor("#292929")
+        self.grid = GridRenderer(20, 5, QColor("#2f2f2f"), QColor("#292929"))
 
-        self._pen_light = QPen(self._color_light)
-        self._pen_light.setWidth(1)
+        self.setBackgroundBrush(self._color_background)
 
-        self._pen_dark = QPen(self._color_dark)
-        self._pen_dark.setWidth(2)
+    @property
+    def gris_size(self):
+        return self.grid.size
 
-        self.setBackgroundBrush(self._color_background)
+    @gris_size.setter
+    def gris_size(self, value):
+        self.grid.size = value
+        self.update()
+
+    @property
+    def grid_square(self):
+        return self.grid.square
+
+    @grid_square.setter
+    def grid_square(self, value):
+        self.grid.square = value
+        self.update()
 
     def drawBackground(self, painter, rect):
         super(GraphicsScene, self).drawBackground(painter, rect)
+        self.grid.draw(painter, rect)
 
-        left = int(math.floor(rect.left()))
-        right = int(math.ceil(rect.right()))
-        top = int(math.floor(rect.top()))
-        bottom = int(math.ceil(rect.bottom()))
+    def add_node(self, item):
+        """Add a graphics node, and a node in the graph for it."""
+        self._pending_node = item
+        try:
+            self.graph.add_node(
+                item.name,
+                item.node_type,
+                (item.pos().x(), item.pos().y()),
+                [s.name for s in item.inputs],
+                [s.name for s in item.outputs]
+            )
+        finally:
+            self._pending_node = None
 
-        first_left = left - (left % self.gris_size)
-        first_top = top - (top % self.gris_size)
+    def create_node(self, node_type, position=(0.0, 0.0)):
+        """Add a node of a registered type, its item is created from the graph.
 
-        lines_light = []
-        lines_dark = []
-        for x in range(first_left, right, self.gris_size):
-            if x % (self.gris_size * self.grid_square) != 0:
-                lines_light.append(QLine(x, top, x, bottom))
-            else:
-                lines_dark.append(QLine(x, top, x, bottom))
+        Returns:
+            the graph node.
+        """
+        node = operators.get(node_type).create(self.graph, position)
+        self.history.push(history.AddNode(node), apply=False)
+        return node
 
-        for y in range(first_top, bottom, self.gris_size):
-            if y % (self.gris_size * self.grid_square) != 0:
-                lines_light.append(QLine(left, y, right, y))
-            else:
-                lines_dark.append(QLine(left, y, right, y))
+    def evaluate(self, node_ids):
+        """Bring nodes up to date, returns False if evaluation failed."""
+        try:
+            for node_id in node_ids:
+                self.scheduler.run(node_id)
+        except (evaluate.CycleError, evaluate.EvaluationError, scheduler.Cancelled) as e:
+            log.warning(f"Evaluation failed: {e}")
+            return False
+        finally:
+            self.update_stats()
+        return True
 
-        painter.setPen(self._pen_light)
-        painter.drawLines(lines_light)
+    def set_show_stats(self, enabled):
+        """Show cache hits/misses and compute time in node title bars."""
+        self.show_stats = enabled
+        self.update_stats()
 
-        painter.setPen(self._pen_dark)
-        painter.drawLines(lines_dark)
+    def update_stats(self):
+        for item in self.node_items.values():
+            self._update_status(item)
 
-    def add_node(self, item):
-        item.scene = self
-        self.addItem(item)
-        self.nodes.append(item)
+    def _update_status(self, item):
+        stats = self.evaluator.stats.get(item.model.id) if self.show_stats else None
+        item.set_status(stats.summary() if stats is not None else '')
 
     def delete_node(self, item):
-        item.UserDeleted.emit(True)
-        self.nodes.remove(item)
-        self.removeItem(item)
+        if item.model is not None and item.model.id in self.graph:
+            self.graph.remove_node(item.model.id)
+        else:
+            self._remove_node_item(item)
+
+    @contextlib.contextmanager
+    def batch_update(self, index=False):
+        """Suspend view updates, and optionally the scene's index, for many changes at once.
+
+        Args:
+            index: also stop indexing items, for changes that move a lot of them.
+        """
+        viewports = [view.viewport() for view in self.views()]
+        for viewport in viewports:
+            viewport.setUpdatesEnabled(False)
+        if index:
+            self.setItemIndexMethod(QGraphicsScene.NoIndex)
+        try:
+            yield
+        finally:
+            if index:
+                self.setItemIndexMethod(QGraphicsScene.BspTreeIndex)
+            for viewport in viewports:
+                viewport.setUpdatesEnabled(True)
+                viewport.update()
+
+    def delete_items(self, items):
+        """Delete nodes and edges in one pass, as a single undo step.
+
+        Edges connected to deleted nodes are deleted with them, anything else is ignored.
+        """
+        nodes = [i for i in items if isinstance(i, GraphicsNode)]
+        edges = [i for i in items if isinstance(i, GraphicsEdge)]
+        if not nodes and not edges:
+            return
+
+        with self.batch_update():
+            # items that never made it into the graph, eg. an edge being dragged
+            for item in edges:
+                if item.model is None or item.model.id not in self.graph.edges:
+                    self._remove_edge_item(item)
+            for item in nodes:
+                if item.model is None or item.model.id not in self.graph:
+                    self._remove_node_item(item)
+
+            node_ids = [i.model.id for i in nodes if i.model is not None and i.model.id in self.graph]
+            edge_ids = [i.model.id for i in edges if i.model is not None and i.model.id in self.graph.edges]
+            if node_ids or edge_ids:
+                self.history.push(history.DeleteItems(node_ids, edge_ids))
+
+    def auto_layout(self, node_ids=None):
+        """Arrange nodes in layers, all nodes if none are given.
+
+        A selection is laid out from its top left, so it stays where it was.
+        Item positions are set in one batch, with the scene's index and view
+        updates suspended until they're all moved.
+        """
+        origin = (0.0, 0.0)
+        if node_ids is not None:
+            node_ids = [n for n in node_ids if n in self.graph]
+            if not node_ids:
+                return
+            nodes = [self.graph.nodes[n] for n in node_ids]
+            origin = (min(n.x for n in nodes), min(n.y for n in nodes))
+
+        positions = layout.layered_layout(self.graph, node_ids, origin)
+        if not positions:
+            return
+
+        with self.batch_update(index=True):
+            command = history.MoveNodes(self.graph, list(positions), positions.values())
+            command.text = 'Auto Layout'
+            self.history.push(command)
+        self.update_visible()
+
+    def collapse(self, node_ids):
+        """Collapse nodes into a compound node, as one undo step.
+
+        Returns:
+            the compound node, None if the nodes can't be collapsed.
+        """
+        try:
+            with self.batch_update(), history.Record.capture(self.graph, 'Collapse') as command:
+                node = subgraph.collapse(self.graph, node_ids)
+        except ValueError as e:
+            log.warning(f"Couldn't collapse nodes: {e}")
+            return None
+        self.history.push(command, apply=False)
+        return node
+
+    def expand(self, node_ids):
+        """Replace compound nodes with the nodes they hold, as one undo step.
+
+        Returns:
+            ids of the restored nodes.
+        """
+        restored = []
+        with self.batch_update(), history.Record.capture(self.graph, 'Expand') as command:
+            for node_id in node_ids:
+                if node_id in self.graph and subgraph.is_compound(self.graph.nodes[node_id]):
+                    restored.extend(subgraph.expand(self.graph, node_id))
+        self.history.push(command, apply=False)
+        self.update_visible()
+        return restored
+
+    def undo(self):
+        with self.batch_update(index=True):
+            self.history.undo()
+        self.update_visible()
+
+    def redo(self):
+        with self.batch_update(index=True):
+            self.history.redo()
+        self.update_visible()
+
+    def begin_move(self, items):
+        """Remember where nodes are before they're dragged, see end_move."""
+        nodes = sorted((i.model.id for i in items if isinstance(i, GraphicsNode) and i.model is not None))
+        self._move_start = (nodes, [(self.graph.nodes[n].x, self.graph.nodes[n].y) for n in nodes])
+
+    def end_move(self):
+        """Add an undo step for nodes dragged since begin_move, if they moved."""
+        if self._move_start is None:
+            return
+        nodes, old = self._move_start
+        self._move_start = None
+        kept = [(n, p) for n, p in zip(nodes, old) if n in self.graph]
+        if not kept:
+            return
+        nodes = [n for n, _ in kept]
+        old = [p for _, p in kept]
+        new = [(self.graph.nodes[n].x, self.graph.nodes[n].y) for n in nodes]
+        self.history.push(history.MoveNodes(self.graph, nodes, new, old), apply=False)
 
     def add_edge(self, item):
+        """Add an edge item, it isn't part of the graph until connect_edge is called."""
         item.scene = self
         self.addItem(item)
-        self.nodes.append(item)
+        self.edges.add(item)
+        if self.edge_layer is not None:
+            self.edge_layer.add(item)
+
+    def connect_edge(self, item):
+        """Add a connection to the graph for an edge item joining two sockets.
+
+        Returns:
+            the graph edge, None if the sockets can't be connected.
+        """
+        sockets = item.sockets()
+        if sockets is None:
+            return None
+
+        source, target = sockets
+        if source.node.model is None or target.node.model is None:
+            return None
+        if evaluate.creates_cycle(self.graph, source.node.model.id, target.node.model.id):
+            return None
+
+        self._pending_edge = item
+        try:
+            edge = self.graph.connect(source.node.model.id, source.index, target.node.model.id, target.index)
+        except ValueError:
+            return None
+        finally:
+            self._pending_edge = None
+        self.history.push(history.Connect(edge), apply=False)
+        return edge
 
     def delete_edge(self, item):
-        self.nodes.remove(item)
+        if item.model is not None and item.model.id in self.graph.edges:
+            self.graph.disconnect(item.model.id)
+        else:
+            self._remove_edge_item(item)
+
+    @property
+    def is_loading(self):
+        """Graphics items are still being created for a loaded graph."""
+        return self._deferred is not None
+
+    def save(self, path=None):
+        """Save the graph, as json if the path ends with .json, otherwise binary."""
+        path = path or os.path.join(self.filepath, self.filename)
+        serializer.save(self.graph, path)
+        self.filepath, self.filename = os.path.split(path)
+
+    def load(self, path, lazy=True):
+        """Replace the graph with one from a file.
+
+        Args:
+            path: file to load.
+            lazy: create graphics items in batches from the event loop, nearest
+                the view first, so the editor is usable while a large graph loads.
+                Loaded is emitted once every item exists.
+
+        Raises:
+            OSError, SerializeError: the file can't be read, the scene is left empty.
+        """
+        self._materialize_timer.stop()
+        self._deferred = None
+        self.graph.clear()
+        self.history.clear()
+
+        # a virtualized scene only creates items in view, so doesn't need deferring
+        lazy = lazy and not self.virtualized
+        if lazy:
+            self._deferred = collections.deque()
+        try:
+            serializer.load(path, self.graph)
+        except (OSError, serializer.SerializeError):
+            # nothing half loaded is left behind
+            self._deferred = None
+            self.graph.clear()
+            raise
+        self.filepath, self.filename = os.path.split(path)
+
+        if not lazy:
+            self.update_visible()
+            self.Loaded.emit()
+            return
+
+        views = self.views()
+        if views:
+            view = views[0]
+            centre = view.mapToScene(view.viewport().rect().center())
+            nodes = self.graph.nodes
+            self._deferred = collections.deque(sorted(
+                self._deferred, key=lambda i: math.hypot(nodes[i].x - centre.x(), nodes[i].y - centre.y())))
+        self._materialize_timer.start()
+
+    def _materialize_batch(self):
+        """Create items for the next batch of loaded nodes, and any edges between them."""
+        for _ in range(min(MATERIALIZE_BATCH, len(self._deferred))):
+            node = self.graph.nodes.get(self._deferred.popleft())
+            if node is None or node.id in self.node_items:
+                continue
+
+            self._add_node_item(node)
+            for edge in self.graph.incoming(node.id) + self.graph.outgoing(node.id):
+                if edge.source in self.node_items and edge.target in self.node_items:
+                    self._add_edge_item(edge)
+
+        if not self._deferred:
+            self._materialize_timer.stop()
+            self._deferred = None
+            self.Loaded.emit()
+
+    def set_virtualized(self, enabled, rect=None):
+        """Only create items for nodes near the visible rect.
+
+        The graph keeps every node, items are created as nodes come into view and
+        recycled once they leave it. Edges are shown when both their nodes have
+        items, and nodes connected to one in view get items too, so every edge
+        touching the view is drawn.
+
+        Args:
+            enabled: virtualize the scene.
+            rect: visible scene rect, taken from the first view if not given.
+        """
+        self.virtualized = enabled
+        if enabled:
+            self.update_visible(rect or self._view_rect())
+            return
+
+        self._pool.clear()
+        for node in self.graph.nodes.values():
+            if node.id not in self.node_items:
+                self._add_node_item(node)
+        for edge in self.graph.edges.values():
+            if edge.id not in self.edge_items:
+                self._add_edge_item(edge)
+
+    def _view_rect(self):
+        views = self.views()
+        if not views:
+            return None
+        return views[0].mapToScene(views[0].viewport().rect()).boundingRect()
+
+    def update_visible(self, rect=None):
+        """Create and recycle items to match the visible rect, when virtualized.
+
+        Called by views as they pan, zoom and resize.
+        """
+        if rect is not None:
+            self._visible_rect = QRectF(rect)
+        if not self.virtualized or self._visible_rect is None:
+            return
+
+        r = self._visible_rect.adjusted(-VIRTUAL_MARGIN, -VIRTUAL_MARGIN, VIRTUAL_MARGIN, VIRTUAL_MARGIN)
+        visible = self.index.query(r.x(), r.y(), r.width(), r.height())
+        wanted = set(visible)
+        for node_id in visible:
+            wanted.update(self.graph.upstream(node_id))
+            wanted.update(self.graph.downstream(node_id))
+
+        # selected items are kept so a selection can be moved or deleted as a whole
+        for node_id, item in list(self.node_items.items()):
+            if node_id not in wanted and not item.isSelected():
+                self._release_node_item(item)
+
+        for node_id in wanted:
+            if node_id not in self.node_items:
+                self._add_node_item(self.graph.nodes[node_id])
+                self._add_node_edge_items(node_id)
+
+    def nodes_rect(self, node_ids):
+        """Scene rect around nodes, from the index so nodes without items count too."""
+        rect = QRectF()
+        for node_id in node_ids:
+            if node_id in self.index:
+                rect = rect.united(QRectF(*self.index.rect(node_id)))
+        return rect
+
+    def select_nodes(self, node_ids):
+        """Select only these nodes, those without items are skipped."""
+        self.clearSelection()
+        for node_id in node_ids:
+            item = self.node_items.get(node_id)
+            if item is not None:
+                item.setSelected(True)
+
+    def _add_node_edge_items(self, node_id):
+        """Add items for the edges of a node whose other node has an item."""
+        for edge in self.graph.incoming(node_id) + self.graph.outgoing(node_id):
+            if edge.id not in self.edge_items and edge.source in self.node_items and edge.target in self.node_items:
+                self._add_edge_item(edge)
+
+    def _release_node_item(self, item):
+        """Remove an item that has left the view, without touching the graph, and pool it."""
+        for edge_item in list(item.edges):
+            if edge_item.model is not None:
+                self._remove_edge_item(edge_item)
+
+        self.node_items.pop(item.model.id, None)
+        self.nodes.discard(item)
+        self.removeItem(item)
+        item.model = None
+
+        pool = self._pool.setdefault((len(item.inputs), len(item.outputs)), [])
+        if len(pool) < POOL_SIZE:
+            pool.append(item)
+
+    def _pooled_node_item(self, node):
+        """Node item from the pool set up for a graph node, None if the pool is empty."""
+        pool = self._pool.get((len(node.inputs), len(node.outputs)))
+        if not pool:
+            return None
+
+        item = pool.pop()
+        item.set_name(node.name)
+        item.node_type = node.type
+        for socket, port in zip(item.inputs + item.outputs, node.inputs + node.outputs):
+            socket.name = port.name
+        item.setPos(node.x, node.y)
+        return item
+
+    def _graph_changed(self, event, item):
+        """Mirror changes to the graph."""
+        # the index is kept up to date even when items are deferred or virtualized
+        if event in (model.NODE_ADDED, model.NODE_MOVED):
+            self.index.move(item.id, (item.x, item.y, GraphicsNode.width, GraphicsNode.height))
+            self._index_sockets(item)
+        elif event == model.NODE_REMOVED:
+            self.index.remove(item.id)
+            self._index_sockets(item, remove=True)
+
+        if self.virtualized and self._pending_node is None and self._pending_edge is None:
+            # only nodes in view get items
+            if event == model.NODE_ADDED and not self._in_view(item):
+                return
+            if event == model.EDGE_ADDED and (item.source not in self.node_items or item.target not in self.node_items):
+                return
+
+        if self._deferred is not None and self._pending_node is None and self._pending_edge is None:
+            # while loading, items are created by _materialize_batch
+            if event == model.NODE_ADDED:
+                self._deferred.append(item.id)
+                return
+            if event == model.EDGE_ADDED and (item.source not in self.node_items or item.target not in self.node_items):
+                return
+
+        if event == model.NODE_ADDED:
+            self._add_node_item(item)
+
+        elif event == model.NODE_REMOVED:
+            node_item = self.node_items.get(item.id)
+            if node_item is not None:
+                self._remove_node_item(node_item)
+
+        elif event == model.NODE_MOVED:
+            node_item = self.node_items.get(item.id)
+            if node_item is not None and (node_item.pos().x(), node_item.pos().y()) != (item.x, item.y):
+                node_item.setPos(item.x, item.y)
+
+        elif event == model.NODE_RENAMED:
+            node_item = self.node_items.get(item.id)
+            if node_item is not None:
+                node_item.set_name(item.name)
+
+        elif event == model.EDGE_ADDED:
+            self._add_edge_item(item)
+
+        elif event == model.EDGE_REMOVED:
+            edge_item = self.edge_items.get(item.id)
+            if edge_item is not None:
+                self._remove_edge_item(edge_item)
+
+    def _index_sockets(self, node, remove=False):
+        for is_input, ports in ((True, node.inputs), (False, node.outputs)):
+            for i in range(len(ports)):
+                key = (node.id, is_input, i)
+                if remove:
+                    self.socket_index.remove(key)
+                    continue
+                x, y = GraphicsNode.socket_position(is_input, i)
+                self.socket_index.move(key, (node.x + x, node.y + y, 0.0, 0.0))
+
+    def nearest_socket(self, pos, radius, source=None):
+        """Closest socket item to a scene position.
+
+        Args:
+            pos: scene position.
+            radius: furthest distance in scene units.
+            source: socket an edge is being dragged from, only sockets it can
+                connect to are returned.
+
+        Returns:
+            socket, None if there isn't one in range.
+        """
+        source_node = source.node.model if source is not None else None
+        for node_id, is_input, index in self.socket_index.nearest(pos.x(), pos.y(), radius):
+            item = self.node_items.get(node_id)
+            if item is None:
+                continue
+
+            if source is not None:
+                if is_input == source.is_input or (source_node is not None and node_id == source_node.id):
+                    continue
+                if source_node is not None and not self._can_connect(source_node, source, node_id, is_input, index):
+                    continue
+
+            return (item.inputs if is_input else item.outputs)[index]
+        return None
+
+    def _can_connect(self, source_node, source, node_id, is_input, index):
+        node = self.graph.nodes[node_id]
+        if is_input:
+            out_port, in_port = source_node.outputs[source.index], node.inputs[index]
+            target = (node_id, index)
+        else:
+            out_port, in_port = node.outputs[index], source_node.inputs[source.index]
+            target = (source_node.id, source.index)
+        return model.compatible(out_port, in_port) and self.graph.input_edge(*target) is None
+
+    def _in_view(self, node):
+        if self._visible_rect is None:
+            return False
+        r = self._visible_rect.adjusted(-VIRTUAL_MARGIN, -VIRTUAL_MARGIN, VIRTUAL_MARGIN, VIRTUAL_MARGIN)
+        return r.intersects(QRectF(node.x, node.y, GraphicsNode.width, GraphicsNode.height))
+
+    def _add_node_item(self, node):
+        item = self._pending_node
+        if item is None:
+            item = self._pooled_node_item(node) or GraphicsNode.from_model(node, self)
+
+        item.model = node
+        item.scene = self
+        self.addItem(item)
+        self.nodes.add(item)
+        self.node_items[node.id] = item
+        self._update_status(item)
+
+    def _remove_node_item(self, item):
+        # scene() is shadowed by the scene attribute on items
+        if QGraphicsItem.scene(item) is not self:
+            return
+
+        if item.model is not None:
+            self.node_items.pop(item.model.id, None)
+
+        # graph edges are already gone, this catches edges still being drawn
+        for edge_item in list(item.edges):
+            self._remove_edge_item(edge_item)
+
+        item.UserDeleted.emit(True)
+        self.nodes.discard(item)
         self.removeItem(item)
 
+    def _add_edge_item(self, edge):
+        item = self._pending_edge
+        if item is None:
+            source = self.node_items[edge.source].outputs[edge.source_port]
+            target = self.node_items[edge.target].inputs[edge.target_port]
+            item = GraphicsEdgeBezier(self)
+            item.set_source(source.scenePos(), source)
+            item.set_destination(target.scenePos(), target)
+            self.add_edge(item)
+
+        item.model = edge
+        self.edge_items[edge.id] = item
+
+    def _remove_edge_item(self, item):
+        if QGraphicsItem.scene(item) is not self:
+            return
+
+        if item.model is not None:
+            self.edge_items.pop(item.model.id, None)
+        item.detach()
+        self.edges.discard(item)
+        self.removeItem(item)
+
+    def set_batched_edges(self, enabled):
+        """Draw connected, unselected edges together in a single layer item."""
+        if enabled and self.edge_layer is None:
+            self.edge_layer = EdgeLayer(QPen(QColor("#001000"), 2.0))
+            self.addItem(self.edge_layer)
+            for item in self.edges:
+                self.edge_layer.add(item)
+
+        elif not enabled and self.edge_layer is not None:
+            for item in self.edges:
+                if item.layer is not None:
+                    self.edge_layer.remove(item)
+                    item.update()
+            self.removeItem(self.edge_layer)
+            self.edge_layer = None
+
 
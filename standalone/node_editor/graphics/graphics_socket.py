@@ -2,11 +2,17 @@ from PySide2.QtWidgets import *
 from PySide2.QtCore import *
 from PySide2.QtGui import *
 from .meta import MetaNode
+from . import lod
 
 
 class GraphicsSocket(QObject, QGraphicsItem, MetaNode):
     UserDeleted = Signal(bool)
 
+    index = 0
+    """: position in the node's inputs or outputs"""
+
+    is_input = True
+
     def __init__(self, node, name, socket_type=1):
         QObject.__init__(self)
         QGraphicsItem.__init__(self)
@@ -32,17 +38,29 @@ class GraphicsSocket(QObject, QGraphicsItem, MetaNode):
 
         self._pen = QPen(self._color_outline)
         self._pen.setWidthF(self.outline_width)
+        self._pen_highlight = QPen(QColor("#FFFFA637"))
+        self._pen_highlight.setWidthF(self.outline_width)
+        self.highlighted = False
         self._brush = QBrush(self._color_background)
 
     def _removed(self):
         self.UserDeleted.emit(True)
 
     def paint(self, painter, QStyleOptionGraphicsWidget, widget=None):
+        if lod.get_lod(QStyleOptionGraphicsWidget, painter) != lod.FULL:
+            return
+
         # painter circle
         painter.setBrush(self._brush)
-        painter.setPen(self._pen)
+        painter.setPen(self._pen_highlight if self.highlighted else self._pen)
         painter.drawEllipse(-self.radius, -self.radius, 2 * self.radius, 2 * self.radius)
 
+    def set_highlighted(self, value):
+        """Outline the socket, eg. when a dragged edge will connect to it."""
+        if value != self.highlighted:
+            self.highlighted = value
+            self.update()
+
     def boundingRect(self):
         return QRectF(
             -self.radius - self.outline_width,
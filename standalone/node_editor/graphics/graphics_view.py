@@ -2,10 +2,29 @@
 from PySide2.QtWidgets import *
 from PySide2.QtCore import *
 from PySide2.QtGui import *
+import collections
+import time
 
 from .graphics_node import GraphicsNode
 from .graphics_edge import GraphicsEdgeDirect, GraphicsEdgeBezier
 from .graphics_socket import GraphicsSocket
+from .minimap import Minimap
+from .. import operators
+
+
+SNAP_RADIUS = 20.0
+""": pixels from the cursor that a dragged edge snaps to a socket"""
+
+PRESS_RADIUS = 7.0
+""": scene distance from a socket that a press starts an edge, the socket's radius and outline"""
+
+RENDER_MODES = {
+    'full': QGraphicsView.FullViewportUpdate,
+    'smart': QGraphicsView.SmartViewportUpdate,
+    'bounding': QGraphicsView.BoundingRectViewportUpdate,
+    'minimal': QGraphicsView.MinimalViewportUpdate,
+}
+""": viewport update modes, full repaints everything for every change"""
 
 
 class GraphicsView(QGraphicsView):
@@ -15,6 +34,7 @@ class GraphicsView(QGraphicsView):
     selected = None
     socket = None
     line_drag = None
+    snap_socket = None
     drag_start = None
     drag_end = None
 
@@ -23,7 +43,8 @@ class GraphicsView(QGraphicsView):
         self.setRenderHints(
             QPainter.Antialiasing | QPainter.HighQualityAntialiasing | QPainter.TextAntialiasing | QPainter.SmoothPixmapTransform)
 
-        self.setViewportUpdateMode(QGraphicsView.FullViewportUpdate)
+        self.render_mode = None
+        self.set_render_mode('smart')
 
         self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
@@ -37,6 +58,86 @@ class GraphicsView(QGraphicsView):
         self.mouse_in_view = False
         self.session = scene
 
+        # paint time overlay
+        self._paint_times = collections.deque(maxlen=60)
+        self._frame_stamps = collections.deque(maxlen=120)
+        self._stats_label = None
+        self._stats_timer = None
+        self.minimap = None
+
+        # a virtualized scene creates items for whatever is in view
+        self.horizontalScrollBar().valueChanged.connect(self.update_visible)
+        self.verticalScrollBar().valueChanged.connect(self.update_visible)
+
+    def set_render_mode(self, mode: str, batch_edges: bool = None) -> None:
+        """Change how the viewport is updated.
+
+        Args:
+            mode: one of RENDER_MODES.
+            batch_edges: draw unselected edges as a single layer, None leaves it unchanged.
+        """
+        self.setViewportUpdateMode(RENDER_MODES[mode])
+        self.render_mode = mode
+        if batch_edges is not None:
+            self.session.set_batched_edges(batch_edges)
+
+    def show_stats(self, visible: bool = True) -> None:
+        """Overlay frames per second and average paint time."""
+        if self._stats_label is None:
+            self._stats_label = QLabel(self.viewport())
+            self._stats_label.setAutoFillBackground(True)
+            self._stats_label.move(5, 5)
+            self._stats_timer = QTimer(self)
+            self._stats_timer.setInterval(500)
+            self._stats_timer.timeout.connect(self._update_stats)
+
+        self._stats_label.setVisible(visible)
+        if visible:
+            self._stats_timer.start()
+        else:
+            self._stats_timer.stop()
+
+    def show_minimap(self, visible: bool = True) -> None:
+        """Overview of the whole graph in the bottom right corner, click it to jump there."""
+        if self.minimap is None:
+            self.minimap = Minimap(self)
+            self._place_minimap()
+        self.minimap.setVisible(visible)
+
+    def _place_minimap(self):
+        margin = 10
+        self.minimap.move(self.width() - self.minimap.width() - margin, self.height() - self.minimap.height() - margin)
+
+    def stats(self) -> tuple[float, float]:
+        """Frames painted in the last second and average paint time in milliseconds."""
+        now = time.perf_counter()
+        fps = sum(1 for t in self._frame_stamps if now - t <= 1.0)
+        paint = sum(self._paint_times) / len(self._paint_times) if self._paint_times else 0.0
+        return fps, paint
+
+    def _update_stats(self):
+        # throttled so the overlay itself doesn't keep the viewport repainting
+        fps, paint = self.stats()
+        self._stats_label.setText(f"{self.render_mode} | {fps} fps | {paint:.2f} ms")
+        self._stats_label.adjustSize()
+
+    def update_visible(self, *args):
+        """Tell the scene which rect is in view."""
+        self.session.update_visible(self.mapToScene(self.viewport().rect()).boundingRect())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_visible()
+        if self.minimap is not None:
+            self._place_minimap()
+
+    def paintEvent(self, event):
+        start = time.perf_counter()
+        super().paintEvent(event)
+        end = time.perf_counter()
+        self._paint_times.append((end - start) * 1000.0)
+        self._frame_stamps.append(end)
+
     def wheelEvent(self, event):
 
         # calculate zoom factor
@@ -60,6 +161,20 @@ class GraphicsView(QGraphicsView):
 
         if not clamp:
             self.scale(zoom_factor, zoom_factor)
+            self.update_visible()
+
+    def frame(self, rect: QRectF) -> None:
+        """Centre the view on a scene rect, zooming out in wheel steps until it fits."""
+        if rect.isNull():
+            return
+        rect = rect.adjusted(-50, -50, 50, 50)
+        visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        while (rect.width() > visible.width() or rect.height() > visible.height()) and self.zoom > self.zoom_range[0]:
+            self.zoom -= self.zoom_step
+            self.scale(1 / self.zoom_in_factor, 1 / self.zoom_in_factor)
+            visible = self.mapToScene(self.viewport().rect()).boundingRect()
+        self.centerOn(rect.center())
+        self.update_visible()
 
     def mousePressEvent(self, event):
 
@@ -85,6 +200,8 @@ class GraphicsView(QGraphicsView):
         # create a line if we've clicked on a socket
         if event.button() == Qt.LeftButton and not self.is_dragging:
 
+            # sockets are often under the node's other items, so look them up by position
+            item = self._socket_near(event.pos(), radius=PRESS_RADIUS) or item
             if isinstance(item, GraphicsSocket):
                 self.socket = item
                 self.is_drawing_line = True
@@ -96,24 +213,26 @@ class GraphicsView(QGraphicsView):
 
         super(GraphicsView, self).mousePressEvent(event)
 
+        # dragging the selection is one undo step, the press may have changed the selection
+        if event.button() == Qt.LeftButton and not self.is_dragging:
+            self.session.begin_move(self.session.selectedItems())
+
     def mouseMoveEvent(self, event):
 
-        # update lines if drawing any
+        # update lines if drawing any, snapping to the nearest socket that can connect
         if self.is_drawing_line:
-            p = self._map_to_scene(event.pos())
-            offset = QPointF(p.x() - 10, p.y() - 10)
-            self.line_drag.set_destination(offset)
+            socket = self._socket_near(event.pos(), self.socket)
+            self._set_snap_socket(socket)
+            self.line_drag.set_destination(socket.scenePos() if socket else self._map_to_scene(event.pos()))
             return
 
         super(GraphicsView, self).mouseMoveEvent(event)
 
     def keyPressEvent(self, event):
 
-        # delete selected nodes
+        # delete selected nodes and edges
         if event.key() == Qt.Key.Key_Delete:
-            items = self.session.selectedItems()
-            for i in items:
-                self.session.delete_node(i)
+            self.session.delete_items(self.session.selectedItems())
             return
 
         super().keyPressEvent(event)
@@ -131,9 +250,13 @@ class GraphicsView(QGraphicsView):
 
         # check for socket under cursor and connect, else delete.
         if event.button() == Qt.LeftButton and self.is_drawing_line:
+            item = self._socket_near(event.pos(), self.socket)
+            self._set_snap_socket(None)
             if isinstance(item, GraphicsSocket):
                 self.is_drawing_line = False
                 self.line_drag.set_destination(item.scenePos(), item)
+                if self.session.connect_edge(self.line_drag) is None:
+                    self.session.delete_edge(self.line_drag)
                 self.line_drag = None
                 return
 
@@ -144,25 +267,54 @@ class GraphicsView(QGraphicsView):
 
         super(GraphicsView, self).mouseReleaseEvent(event)
 
+        if event.button() == Qt.LeftButton:
+            self.session.end_move()
+
     def mouseDoubleClickEvent(self, event: QEvent) -> None:
 
         # create node when user double clicks
         if event.button() == Qt.LeftButton:
             tt = self._map_to_scene(event.pos())
-            self.session.add_node(GraphicsNode('Example',
-                                               self.session,
-                                               position=[tt.x(), tt.y()],
-                                               inputs=['1', '2', '3'],
-                                               outputs=['1', '2', '3']))
+            node_type = self._node_type_menu(event.globalPos())
+            if node_type:
+                self.session.create_node(node_type, (tt.x(), tt.y()))
             return
 
         super(GraphicsView, self).mouseDoubleClickEvent(event)
 
+    def _node_type_menu(self, pos: QPoint) -> str:
+        """Let the user pick a registered node type, empty if they cancel."""
+        menu = QMenu(self)
+        for category, ops in operators.categories().items():
+            sub_menu = menu.addMenu(category or 'Other')
+            for op in ops:
+                sub_menu.addAction(op.name).setData(op.name)
+
+        action = menu.exec_(pos)
+        return action.data() if action else ''
+
+    def _socket_near(self, pos: QPoint, source: GraphicsSocket = None, radius: float = None) -> GraphicsSocket:
+        """Socket near a view position, see GraphicsScene.nearest_socket.
+
+        Args:
+            radius: furthest distance in scene units, SNAP_RADIUS pixels if not given.
+        """
+        if radius is None:
+            radius = SNAP_RADIUS / self.transform().m11()
+        return self.session.nearest_socket(self._map_to_scene(pos), radius, source)
+
+    def _set_snap_socket(self, socket: GraphicsSocket) -> None:
+        if socket is self.snap_socket:
+            return
+        if self.snap_socket is not None:
+            self.snap_socket.set_highlighted(False)
+        if socket is not None:
+            socket.set_highlighted(True)
+        self.snap_socket = socket
+
     def _map_to_scene(self, pos: QPointF) -> QPointF:
-        """Map position to QGraphicsView widget"""
-        gp = self.mapToGlobal(pos)  # relative to screen
-        rw = self.window().mapFromGlobal(gp)  # relative to window
-        return self.mapToScene(rw)  # relative to GraphicsView
+        """Map a mouse event position, which is relative to the viewport, to the scene"""
+        return self.mapToScene(pos)
 
     def _get_event_item(self, event: QEvent) -> QPoint:
         """Get widget under mouse cursor"""
@@ -0,0 +1,38 @@
+from PySide2.QtWidgets import *
+from PySide2.QtGui import *
+
+FULL = 0
+""": everything is drawn"""
+
+SIMPLE = 1
+""": plain shapes, no titles or sockets, straight edges"""
+
+MINIMAL = 2
+""": as SIMPLE with antialiasing turned off"""
+
+
+class Thresholds:
+    """Zoom levels where detail drops, compared to levelOfDetailFromTransform.
+
+    Change these to tune the editor, benchmark.lod_frame_times measures the
+    frame time at each zoom level.
+    """
+    full = 0.5
+    simple = 0.25
+
+
+def get_lod(option: QStyleOptionGraphicsItem, painter: QPainter) -> int:
+    """Detail tier for the item being painted.
+
+    Antialiasing is turned off on the painter for the MINIMAL tier, the painter
+    state is restored by the scene after each item.
+    """
+    lod = option.levelOfDetailFromTransform(painter.worldTransform())
+    if lod >= Thresholds.full:
+        return FULL
+
+    if lod >= Thresholds.simple:
+        return SIMPLE
+
+    painter.setRenderHint(QPainter.Antialiasing, False)
+    return MINIMAL
@@ -1,3 +1,5 @@
+import os
+
 
 class MetaNode:
 
@@ -41,7 +43,7 @@ class MetaNode:
     def serialise(self):
         raise NotImplementedError
 
-    def deserialise(self):
+    def deserialise(self, data):
         raise NotImplementedError
 
 
@@ -49,8 +51,8 @@ class MetaScene:
     def __init__(self):
         super(MetaScene, self).__init__()
         self.id = id(self)
-        self.filename = 'temp.json'
-        self.filepath = "D:/Ross/Documents/script_tools/NodeEditor/graphs//"
+        self.filename = ''
+        self.filepath = ''
 
         self.scene_name = None
         self.scene_width = 64000
@@ -58,4 +60,13 @@ class MetaScene:
 
         self.nodes = []
         self.edges = []
-        self.scene_data = None
\ No newline at end of file
+        self.scene_data = None
+
+    @property
+    def path(self) -> str:
+        """Full path of the file the scene was last saved to or loaded from."""
+        return os.path.join(self.filepath, self.filename) if self.filename else ''
+
+    @path.setter
+    def path(self, value: str):
+        self.filepath, self.filename = os.path.split(value)
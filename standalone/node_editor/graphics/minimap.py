@@ -0,0 +1,189 @@
+from PySide2.QtWidgets import *
+from PySide2.QtCore import *
+from PySide2.QtGui import *
+
+from .graphics_node import GraphicsNode
+from .. import model
+from .. import spatial
+
+MINIMAP_SIZE = QSize(240, 160)
+""": size of the minimap in pixels"""
+
+UPDATE_INTERVAL = 100
+""": milliseconds changes are gathered for before the image is redrawn"""
+
+BOUNDS_MARGIN = 0.25
+""": extra room around the graph, as a fraction of its size, so nodes can move without a full redraw"""
+
+
+class Minimap(QWidget):
+    """Overview of the whole graph in the corner of a view.
+
+    Nodes are drawn as plain rects into a cached image, straight from the graph
+    and its spatial index, so nodes without items are shown too. When nodes
+    change only the areas they left and moved to are redrawn, collected in a
+    DirtyRects until the next update. Painting the widget only draws the image
+    and the view's rect on top, so panning the view doesn't redraw anything.
+
+    Clicking or dragging on the minimap centres the view there.
+    """
+
+    def __init__(self, view, parent=None):
+        super().__init__(parent or view)
+        self.view = view
+        self.session = view.session
+        self.setFixedSize(MINIMAP_SIZE)
+        self.setCursor(Qt.PointingHandCursor)
+
+        self._background = QColor("#2b2b2b")
+        self._node_color = QColor("#8c8c8c")
+        self._view_pen = QPen(QColor("#FFFFA637"), 1)
+
+        self._image = QImage(MINIMAP_SIZE, QImage.Format_ARGB32_Premultiplied)
+        self._bounds = QRectF()
+        self._scale = 1.0
+        self._offset = QPointF()
+        self._drawn = {}
+        self._dirty = spatial.DirtyRects()
+        self._full = True
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(UPDATE_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+        graph = self.session.graph
+        callback = self._graph_changed
+        graph.subscribe(callback)
+        # children aren't closed with the view, the graph mustn't call into a deleted widget
+        self.destroyed.connect(lambda *args: graph.unsubscribe(callback))
+        self.session.Loaded.connect(self.invalidate)
+        view.horizontalScrollBar().valueChanged.connect(self.update)
+        view.verticalScrollBar().valueChanged.connect(self.update)
+        self.refresh()
+
+    def _graph_changed(self, event, item):
+        if event not in (model.NODE_ADDED, model.NODE_MOVED, model.NODE_REMOVED):
+            return
+
+        old = self._drawn.pop(item.id, None)
+        if old is not None:
+            self._dirty.add((old[0], old[1], GraphicsNode.width, GraphicsNode.height))
+        if event != model.NODE_REMOVED:
+            self._drawn[item.id] = (item.x, item.y)
+            self._dirty.add((item.x, item.y, GraphicsNode.width, GraphicsNode.height))
+
+        if not self._timer.isActive():
+            self._timer.start()
+
+    # mapping between scene and minimap
+
+    def _fit(self, bounds):
+        self._bounds = bounds
+        size = self._image.size()
+        self._scale = min(size.width() / max(bounds.width(), 1.0), size.height() / max(bounds.height(), 1.0))
+        self._offset = QPointF(
+            (size.width() - bounds.width() * self._scale) / 2.0 - bounds.left() * self._scale,
+            (size.height() - bounds.height() * self._scale) / 2.0 - bounds.top() * self._scale
+        )
+
+    def map_from_scene(self, rect):
+        return QRectF(
+            rect.left() * self._scale + self._offset.x(),
+            rect.top() * self._scale + self._offset.y(),
+            rect.width() * self._scale,
+            rect.height() * self._scale
+        )
+
+    def map_to_scene(self, pos):
+        return QPointF((pos.x() - self._offset.x()) / self._scale, (pos.y() - self._offset.y()) / self._scale)
+
+    # drawing
+
+    def _graph_bounds(self):
+        nodes = self.session.graph.nodes.values()
+        if not nodes:
+            return self.session.sceneRect()
+
+        left = min(n.x for n in nodes)
+        top = min(n.y for n in nodes)
+        right = max(n.x for n in nodes) + GraphicsNode.width
+        bottom = max(n.y for n in nodes) + GraphicsNode.height
+        margin = max(right - left, bottom - top) * BOUNDS_MARGIN
+        return QRectF(left, top, right - left, bottom - top).adjusted(-margin, -margin, margin, margin)
+
+    def refresh(self):
+        """Redraw the parts of the image that changed, or all of it when the graph outgrew it."""
+        rects = self._dirty.take()
+        if not self._full:
+            bounds = self._dirty_bounds(rects)
+            self._full = bounds is not None and not self._bounds.contains(bounds)
+
+        painter = QPainter(self._image)
+        try:
+            if self._full:
+                self._full = False
+                self._fit(self._graph_bounds())
+                self._drawn = {n.id: (n.x, n.y) for n in self.session.graph.nodes.values()}
+                self._image.fill(self._background)
+                self._draw_nodes(painter, self.session.graph.nodes)
+            else:
+                for x, y, w, h in rects:
+                    self._redraw(painter, QRectF(x, y, w, h))
+        finally:
+            painter.end()
+        self.update()
+
+    @staticmethod
+    def _dirty_bounds(rects):
+        if not rects:
+            return None
+        bounds = QRectF(*rects[0])
+        for rect in rects[1:]:
+            bounds = bounds.united(QRectF(*rect))
+        return bounds
+
+    def _redraw(self, painter, rect):
+        # whole pixels, so nodes partly inside the area are redrawn rather than left half cleared
+        area = self.map_from_scene(rect).toAlignedRect().adjusted(-1, -1, 1, 1)
+        painter.setClipRect(area)
+        painter.fillRect(area, self._background)
+        query = QRectF(self.map_to_scene(area.topLeft()), self.map_to_scene(area.bottomRight() + QPoint(1, 1)))
+        nodes = self.session.graph.nodes
+        ids = self.session.index.query(query.x(), query.y(), query.width(), query.height())
+        self._draw_nodes(painter, (nodes[i] for i in ids if i in nodes))
+        painter.setClipping(False)
+
+    def _draw_nodes(self, painter, nodes):
+        scale = self._scale
+        width = max(GraphicsNode.width * scale, 1.0)
+        height = max(GraphicsNode.height * scale, 1.0)
+        ox, oy = self._offset.x(), self._offset.y()
+        for node in nodes:
+            painter.fillRect(QRectF(node.x * scale + ox, node.y * scale + oy, width, height), self._node_color)
+
+    def invalidate(self):
+        """Redraw everything on the next update, called once a loaded graph has its items."""
+        self._full = True
+        self._timer.start()
+
+    # events
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawImage(0, 0, self._image)
+        visible = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        painter.setPen(self._view_pen)
+        painter.drawRect(self.map_from_scene(visible).intersected(QRectF(self.rect()).adjusted(0, 0, -1, -1)))
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.view.centerOn(self.map_to_scene(event.pos()))
+            return
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.view.centerOn(self.map_to_scene(event.pos()))
+            return
+        super().mouseMoveEvent(event)
@@ -0,0 +1,354 @@
+"""
+Undo history for graph edits.
+
+Edits are commands, in the style of QUndoStack, with redo applying them to a
+graph and undo reversing them. Commands hold only what they need to reverse an
+edit: a move keeps node ids and coordinates in flat arrays, a delete keeps the
+removed nodes and edges, never a snapshot of the graph.
+
+    history = History(graph)
+    history.push(MoveNodes(graph, [node.id], [(100.0, 0.0)]))
+    history.undo()
+
+Consecutive moves of the same nodes merge into one command, so dragging a
+selection around several times is undone in one step. The oldest commands are
+dropped once the history holds more than max_bytes.
+"""
+from __future__ import annotations
+import array
+import collections
+import contextlib
+import sys
+import typing
+
+from . import cache
+from . import model
+from .model import Graph, Node, Edge
+
+MAX_BYTES = 32 * 1024 * 1024
+""": default memory budget for the history"""
+
+MAX_COMMANDS = 1000
+""": default number of commands kept"""
+
+
+def _node_bytes(node: Node) -> int:
+    # ports are shared between nodes, so only the node and its own values count
+    return sys.getsizeof(node) + cache.sizeof(node.name) + cache.sizeof(node.params)
+
+
+class Command:
+    """An edit that can be undone."""
+
+    text = ''
+
+    @property
+    def size(self) -> int:
+        """Rough memory held by the command, in bytes."""
+        return sys.getsizeof(self)
+
+    def redo(self, graph: Graph) -> None:
+        raise NotImplementedError
+
+    def undo(self, graph: Graph) -> None:
+        raise NotImplementedError
+
+    def merge(self, other: Command) -> bool:
+        """Fold a command pushed straight after this one into it, returns False if it can't."""
+        return False
+
+    def is_obsolete(self) -> bool:
+        """Does the command no longer change anything, eg. moves that ended where they began."""
+        return False
+
+
+class AddNode(Command):
+    """A node added to the graph."""
+
+    text = 'Add Node'
+
+    def __init__(self, node: Node):
+        self.node = node
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self) + _node_bytes(self.node)
+
+    def redo(self, graph: Graph) -> None:
+        if self.node.id not in graph:
+            n = self.node
+            self.node = graph.add_node(n.name, n.type, (n.x, n.y), n.inputs, n.outputs, n.params, n.id)
+
+    def undo(self, graph: Graph) -> None:
+        self.node = graph.remove_node(self.node.id)
+
+
+class Connect(Command):
+    """An edge added to the graph."""
+
+    text = 'Connect'
+
+    def __init__(self, edge: Edge):
+        self.edge = edge
+
+    def redo(self, graph: Graph) -> None:
+        if self.edge.id not in graph.edges:
+            e = self.edge
+            self.edge = graph.connect(e.source, e.source_port, e.target, e.target_port, e.id)
+
+    def undo(self, graph: Graph) -> None:
+        self.edge = graph.disconnect(self.edge.id)
+
+
+class DeleteItems(Command):
+    """Nodes and edges removed in one go, edges connected to the nodes go with them."""
+
+    text = 'Delete'
+
+    def __init__(self, node_ids: typing.Iterable[int] = (), edge_ids: typing.Iterable[int] = ()):
+        self.node_ids = array.array('q', node_ids)
+        self.edge_ids = array.array('q', edge_ids)
+        self.nodes: list[Node] = []
+        self.edges: list[Edge] = []
+
+    @property
+    def size(self) -> int:
+        return (sys.getsizeof(self) + self.node_ids.itemsize * (len(self.node_ids) + len(self.edge_ids))
+                + sum(_node_bytes(n) for n in self.nodes) + sum(sys.getsizeof(e) for e in self.edges))
+
+    def redo(self, graph: Graph) -> None:
+        edge_ids = set(e for e in self.edge_ids if e in graph.edges)
+        for node_id in self.node_ids:
+            edge_ids.update(e.id for e in graph.incoming(node_id))
+            edge_ids.update(e.id for e in graph.outgoing(node_id))
+
+        self.edges = [graph.disconnect(e) for e in sorted(edge_ids)]
+        self.nodes = [graph.remove_node(n) for n in self.node_ids if n in graph]
+
+    def undo(self, graph: Graph) -> None:
+        for n in self.nodes:
+            graph.add_node(n.name, n.type, (n.x, n.y), n.inputs, n.outputs, n.params, n.id)
+        for e in self.edges:
+            graph.connect(e.source, e.source_port, e.target, e.target_port, e.id)
+        self.nodes = []
+        self.edges = []
+
+
+class MoveNodes(Command):
+    """Nodes moved together, eg. a dragged selection or a layout."""
+
+    text = 'Move'
+
+    def __init__(self, graph: Graph, node_ids: typing.Sequence[int], positions: typing.Iterable[tuple[float, float]],
+                 old_positions: typing.Iterable[tuple[float, float]] = None):
+        """
+        Args:
+            graph: graph the nodes are in, their current positions are the old ones if not given.
+            node_ids: nodes to move.
+            positions: x, y to move each node to.
+            old_positions: x, y to undo back to, for nodes that have already moved.
+        """
+        self.node_ids = array.array('q', node_ids)
+        self.new = array.array('d', (v for p in positions for v in p))
+        if old_positions is None:
+            old_positions = ((graph.nodes[n].x, graph.nodes[n].y) for n in node_ids)
+        self.old = array.array('d', (v for p in old_positions for v in p))
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self) + sum(a.itemsize * len(a) for a in (self.node_ids, self.new, self.old))
+
+    @staticmethod
+    def _apply(graph: Graph, node_ids: array.array, values: array.array) -> None:
+        for i, node_id in enumerate(node_ids):
+            graph.move_node(node_id, values[i * 2], values[i * 2 + 1])
+
+    def redo(self, graph: Graph) -> None:
+        self._apply(graph, self.node_ids, self.new)
+
+    def undo(self, graph: Graph) -> None:
+        self._apply(graph, self.node_ids, self.old)
+
+    def merge(self, other: Command) -> bool:
+        if not isinstance(other, MoveNodes) or other.node_ids != self.node_ids:
+            return False
+        self.new = other.new
+        return True
+
+    def is_obsolete(self) -> bool:
+        return self.new == self.old
+
+
+class Record(Command):
+    """Nodes and edges added and removed by an edit, replayed in order to redo it.
+
+    For edits made by code that works on the graph directly, eg. collapsing a
+    subgraph, captured as they happen:
+
+        with Record.capture(graph, 'Collapse') as command:
+            subgraph.collapse(graph, node_ids)
+        history.push(command, apply=False)
+    """
+
+    def __init__(self, text: str = 'Edit'):
+        self.text = text
+        self.changes: list[tuple[str, Node | Edge]] = []
+
+    @classmethod
+    @contextlib.contextmanager
+    def capture(cls, graph: Graph, text: str = 'Edit') -> typing.Iterator[Record]:
+        command = cls(text)
+
+        def changed(event, item):
+            if event in (model.NODE_ADDED, model.NODE_REMOVED, model.EDGE_ADDED, model.EDGE_REMOVED):
+                command.changes.append((event, item))
+
+        graph.subscribe(changed)
+        try:
+            yield command
+        finally:
+            graph.unsubscribe(changed)
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self.changes) + sum(
+            _node_bytes(item) if isinstance(item, Node) else sys.getsizeof(item) for _, item in self.changes)
+
+    @staticmethod
+    def _add(graph: Graph, item: Node | Edge) -> None:
+        if isinstance(item, Node):
+            graph.add_node(item.name, item.type, (item.x, item.y), item.inputs, item.outputs, item.params, item.id)
+        else:
+            graph.connect(item.source, item.source_port, item.target, item.target_port, item.id)
+
+    @staticmethod
+    def _remove(graph: Graph, item: Node | Edge) -> None:
+        if isinstance(item, Node):
+            graph.remove_node(item.id)
+        else:
+            graph.disconnect(item.id)
+
+    def redo(self, graph: Graph) -> None:
+        for event, item in self.changes:
+            if event in (model.NODE_ADDED, model.EDGE_ADDED):
+                self._add(graph, item)
+            else:
+                self._remove(graph, item)
+
+    def undo(self, graph: Graph) -> None:
+        for event, item in reversed(self.changes):
+            if event in (model.NODE_ADDED, model.EDGE_ADDED):
+                self._remove(graph, item)
+            else:
+                self._add(graph, item)
+
+    def is_obsolete(self) -> bool:
+        return not self.changes
+
+
+class History:
+    """Stack of commands applied to a graph, with undo and redo.
+
+    Commands are expected to be the only edits made to the graph between
+    pushes, or at least not to conflict with them.
+    """
+
+    def __init__(self, graph: Graph, max_bytes: int = MAX_BYTES, max_commands: int = MAX_COMMANDS):
+        """
+        Args:
+            graph: graph the commands edit.
+            max_bytes: memory budget, the oldest commands are dropped above it.
+            max_commands: most commands kept.
+        """
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.max_commands = max_commands
+        self._undo: collections.deque[tuple[Command, int]] = collections.deque()
+        self._redo: list[tuple[Command, int]] = []
+        self.bytes = 0
+        self._merging = True
+        self._observers = []
+
+    def __len__(self) -> int:
+        return len(self._undo) + len(self._redo)
+
+    def subscribe(self, callback: typing.Callable[[], None]) -> None:
+        """Call a function whenever commands are pushed, undone or redone."""
+        self._observers.append(callback)
+
+    def _changed(self) -> None:
+        for callback in self._observers:
+            callback()
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_text(self) -> str:
+        return self._undo[-1][0].text if self._undo else ''
+
+    def redo_text(self) -> str:
+        return self._redo[-1][0].text if self._redo else ''
+
+    def push(self, command: Command, apply: bool = True) -> None:
+        """Add a command, redoing it unless it has already been applied.
+
+        Commands that can be undone again are dropped, a command that merges
+        into the last one isn't added on its own.
+        """
+        if apply:
+            command.redo(self.graph)
+
+        for entry in self._redo:
+            self.bytes -= entry[1]
+        self._redo.clear()
+
+        if self._undo and self._merging and self._undo[-1][0].merge(command):
+            last, size = self._undo.pop()
+            self.bytes -= size
+            if not last.is_obsolete():
+                self._add(last)
+        elif not command.is_obsolete():
+            self._add(command)
+
+        self._merging = True
+        self._changed()
+
+    def _add(self, command: Command) -> None:
+        size = command.size
+        self._undo.append((command, size))
+        self.bytes += size
+        # always keep the latest command, even if it's over budget on its own
+        while len(self._undo) > 1 and (self.bytes > self.max_bytes or len(self._undo) > self.max_commands):
+            self.bytes -= self._undo.popleft()[1]
+
+    def undo(self) -> None:
+        if not self._undo:
+            return
+        command, size = self._undo.pop()
+        command.undo(self.graph)
+        self.bytes -= size
+        size = command.size
+        self._redo.append((command, size))
+        self.bytes += size
+        self._merging = False
+        self._changed()
+
+    def redo(self) -> None:
+        if not self._redo:
+            return
+        command, size = self._redo.pop()
+        command.redo(self.graph)
+        self.bytes -= size
+        self._add(command)
+        # a move after a redo is a new step, not part of the redone one
+        self._merging = False
+        self._changed()
+
+    def clear(self) -> None:
+        self._undo.clear()
+        self._redo.clear()
+        self.bytes = 0
+        self._changed()
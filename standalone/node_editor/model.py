@@ -0,0 +1,291 @@
+"""
+Graph data model for the node editor.
+
+Pure python, doesn't need Qt, so large graphs can be built, queried and edited
+headless. Records use __slots__ to keep memory per node low, and every lookup
+goes through a dictionary index so adding, removing and finding nodes and edges
+is O(1).
+
+The graphics layer subscribes to a Graph and mirrors its changes:
+
+    graph = Graph()
+    graph.subscribe(lambda event, item: print(event, item.id))
+    a = graph.add_node('a', outputs=['out'])
+    b = graph.add_node('b', inputs=['in'])
+    graph.connect(a.id, 0, b.id, 0)
+"""
+from __future__ import annotations
+import typing
+
+ANY = 'any'
+""": port type that is compatible with every other type"""
+
+NODE_ADDED = 'node_added'
+NODE_REMOVED = 'node_removed'
+NODE_RENAMED = 'node_renamed'
+NODE_MOVED = 'node_moved'
+PARAM_CHANGED = 'param_changed'
+EDGE_ADDED = 'edge_added'
+EDGE_REMOVED = 'edge_removed'
+
+
+class Port:
+    """Named, typed input or output on a node."""
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name: str, type: str = ANY):
+        self.name = name
+        self.type = type
+
+    def __repr__(self):
+        return f"Port({self.name!r}, {self.type!r})"
+
+
+class Node:
+    """Node record, ports are referenced by index into inputs and outputs."""
+    __slots__ = ('id', 'name', 'type', 'x', 'y', 'inputs', 'outputs', 'params')
+
+    def __init__(
+            self,
+            node_id: int,
+            name: str,
+            type: str = '',
+            x: float = 0.0,
+            y: float = 0.0,
+            inputs: list[Port] = None,
+            outputs: list[Port] = None,
+            params: dict = None
+            ):
+        self.id = node_id
+        self.name = name
+        self.type = type
+        self.x = x
+        self.y = y
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.params = params if params is not None else {}
+
+    def __repr__(self):
+        return f"Node({self.id}, {self.name!r})"
+
+
+class Edge:
+    """Connection from an output port to an input port, ports are indices."""
+    __slots__ = ('id', 'source', 'source_port', 'target', 'target_port')
+
+    def __init__(self, edge_id: int, source: int, source_port: int, target: int, target_port: int):
+        self.id = edge_id
+        self.source = source
+        self.source_port = source_port
+        self.target = target
+        self.target_port = target_port
+
+    def __repr__(self):
+        return f"Edge({self.id}, {self.source}:{self.source_port} -> {self.target}:{self.target_port})"
+
+
+def _make_ports(ports: typing.Iterable[str | tuple[str, str] | Port]) -> list[Port]:
+    result = []
+    for p in ports:
+        if isinstance(p, Port):
+            # ports are treated as values, so they can be shared between nodes
+            result.append(p)
+        elif isinstance(p, str):
+            result.append(Port(p))
+        else:
+            result.append(Port(*p))
+    return result
+
+
+def compatible(source: Port, target: Port) -> bool:
+    """Can an output of the source type connect to an input of the target type."""
+    return source.type == target.type or ANY in (source.type, target.type)
+
+
+class Graph:
+    """Nodes and edges with adjacency indices.
+
+    Inputs accept a single edge, outputs can feed any number of inputs.
+    Observers are called with (event, item) after every change.
+    """
+
+    def __init__(self):
+        self.nodes: dict[int, Node] = {}
+        self.edges: dict[int, Edge] = {}
+        self._incoming: dict[int, set[int]] = {}
+        self._outgoing: dict[int, set[int]] = {}
+        self._input_edge: dict[tuple[int, int], int] = {}
+        self._output_edges: dict[tuple[int, int], set[int]] = {}
+        self._next_node = 1
+        self._next_edge = 1
+        self._observers = []
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self.nodes
+
+    def subscribe(self, callback: typing.Callable[[str, Node | Edge], None]) -> None:
+        self._observers.append(callback)
+
+    def unsubscribe(self, callback: typing.Callable[[str, Node | Edge], None]) -> None:
+        self._observers.remove(callback)
+
+    def _notify(self, event: str, item: Node | Edge) -> None:
+        for callback in self._observers:
+            callback(event, item)
+
+    # nodes
+
+    def add_node(
+            self,
+            name: str,
+            type: str = '',
+            position: tuple[float, float] = (0.0, 0.0),
+            inputs: typing.Iterable = (),
+            outputs: typing.Iterable = (),
+            params: dict = None,
+            node_id: int = None
+            ) -> Node:
+        """Add a node.
+
+        Args:
+            name: display name.
+            type: node type, used to look up an operator when evaluating.
+            position: x, y in scene space.
+            inputs: port names, (name, type) tuples or Ports.
+            outputs: port names, (name, type) tuples or Ports.
+            params: values that aren't driven by connections.
+            node_id: restore a node with a known id, must be unused.
+        """
+        if node_id is None:
+            node_id = self._next_node
+        elif node_id in self.nodes:
+            raise ValueError(f"node id {node_id} already in use")
+        self._next_node = max(self._next_node, node_id + 1)
+
+        node = Node(node_id, name, type, position[0], position[1], _make_ports(inputs), _make_ports(outputs), params)
+        self.nodes[node_id] = node
+        self._notify(NODE_ADDED, node)
+        return node
+
+    def remove_node(self, node_id: int) -> Node:
+        """Remove a node and every edge connected to it."""
+        for edge_id in list(self._incoming.get(node_id, ())) + list(self._outgoing.get(node_id, ())):
+            self.disconnect(edge_id)
+
+        node = self.nodes.pop(node_id)
+        self._incoming.pop(node_id, None)
+        self._outgoing.pop(node_id, None)
+        self._notify(NODE_REMOVED, node)
+        return node
+
+    def rename_node(self, node_id: int, name: str) -> None:
+        node = self.nodes[node_id]
+        if node.name == name:
+            return
+        node.name = name
+        self._notify(NODE_RENAMED, node)
+
+    def move_node(self, node_id: int, x: float, y: float) -> None:
+        node = self.nodes[node_id]
+        if node.x == x and node.y == y:
+            return
+        node.x = x
+        node.y = y
+        self._notify(NODE_MOVED, node)
+
+    def set_param(self, node_id: int, name: str, value) -> None:
+        """Set a parameter, or the value of an unconnected input with the same name."""
+        node = self.nodes[node_id]
+        node.params[name] = value
+        self._notify(PARAM_CHANGED, node)
+
+    # edges
+
+    def connect(self, source: int, source_port: int, target: int, target_port: int, edge_id: int = None) -> Edge:
+        """Connect an output to an input.
+
+        Raises:
+            ValueError: nodes or ports don't exist, types don't match or the input is already connected.
+        """
+        for node_id in (source, target):
+            if node_id not in self.nodes:
+                raise ValueError(f"node {node_id} doesn't exist")
+        outputs = self.nodes[source].outputs
+        inputs = self.nodes[target].inputs
+        if not 0 <= source_port < len(outputs):
+            raise ValueError(f"node {source} has no output {source_port}")
+        if not 0 <= target_port < len(inputs):
+            raise ValueError(f"node {target} has no input {target_port}")
+
+        out_port = outputs[source_port]
+        in_port = inputs[target_port]
+        if source == target:
+            raise ValueError("can't connect a node to itself")
+        if not compatible(out_port, in_port):
+            raise ValueError(f"can't connect {out_port.type} to {in_port.type}")
+        if (target, target_port) in self._input_edge:
+            raise ValueError(f"input {in_port.name} on node {target} is already connected")
+
+        if edge_id is None:
+            edge_id = self._next_edge
+        elif edge_id in self.edges:
+            raise ValueError(f"edge id {edge_id} already in use")
+        self._next_edge = max(self._next_edge, edge_id + 1)
+
+        edge = Edge(edge_id, source, source_port, target, target_port)
+        self.edges[edge_id] = edge
+        # adjacency sets are only created for connected nodes to save memory
+        self._outgoing.setdefault(source, set()).add(edge_id)
+        self._incoming.setdefault(target, set()).add(edge_id)
+        self._input_edge[(target, target_port)] = edge_id
+        self._output_edges.setdefault((source, source_port), set()).add(edge_id)
+        self._notify(EDGE_ADDED, edge)
+        return edge
+
+    def disconnect(self, edge_id: int) -> Edge:
+        edge = self.edges.pop(edge_id)
+        self._outgoing[edge.source].discard(edge_id)
+        self._incoming[edge.target].discard(edge_id)
+        if not self._outgoing[edge.source]:
+            del self._outgoing[edge.source]
+        if not self._incoming[edge.target]:
+            del self._incoming[edge.target]
+        del self._input_edge[(edge.target, edge.target_port)]
+        outputs = self._output_edges[(edge.source, edge.source_port)]
+        outputs.discard(edge_id)
+        if not outputs:
+            del self._output_edges[(edge.source, edge.source_port)]
+        self._notify(EDGE_REMOVED, edge)
+        return edge
+
+    # queries
+
+    def incoming(self, node_id: int) -> list[Edge]:
+        return [self.edges[i] for i in self._incoming.get(node_id, ())]
+
+    def outgoing(self, node_id: int) -> list[Edge]:
+        return [self.edges[i] for i in self._outgoing.get(node_id, ())]
+
+    def input_edge(self, node_id: int, port: int) -> Edge | None:
+        """Edge connected to an input, if any."""
+        edge_id = self._input_edge.get((node_id, port))
+        return None if edge_id is None else self.edges[edge_id]
+
+    def output_edges(self, node_id: int, port: int) -> list[Edge]:
+        return [self.edges[i] for i in self._output_edges.get((node_id, port), ())]
+
+    def upstream(self, node_id: int) -> set[int]:
+        """Ids of nodes feeding into a node."""
+        return {self.edges[i].source for i in self._incoming.get(node_id, ())}
+
+    def downstream(self, node_id: int) -> set[int]:
+        """Ids of nodes fed by a node."""
+        return {self.edges[i].target for i in self._outgoing.get(node_id, ())}
+
+    def clear(self) -> None:
+        """Remove every node and edge."""
+        for node_id in list(self.nodes):
+            self.remove_node(node_id)
@@ -0,0 +1,203 @@
+"""
+Registry of node types that can be evaluated.
+
+An operator is a plain function, its inputs are passed positionally and its
+parameters as keyword arguments. It returns one value per output, or a single
+value when it has one output:
+
+    @register('Add', inputs=[('a', 'float', 0.0), ('b', 'float', 0.0)], category='Maths')
+    def add(a, b):
+        return a + b
+
+Unconnected inputs take their value from the node's params, falling back to the
+default given when the operator was registered.
+"""
+from __future__ import annotations
+import math
+import typing
+
+from .model import Graph, Node, Port
+
+FLOAT = 'float'
+STRING = 'string'
+
+INLINE = 'inline'
+THREAD = 'thread'
+PROCESS = 'process'
+""": where the scheduler runs an operator, cheap operators run inline on the calling thread,
+operators that release the GIL suit threads, pure python heavy lifting suits processes"""
+
+
+class Operator:
+    """A node type and the function that computes its outputs."""
+
+    def __init__(
+            self,
+            name: str,
+            func: typing.Callable,
+            inputs: typing.Sequence[tuple[str, str, typing.Any]] = (),
+            outputs: typing.Sequence[tuple[str, str]] = (('out', FLOAT),),
+            params: dict = None,
+            category: str = '',
+            executor: str = INLINE,
+            cached: bool = False
+            ):
+        self.name = name
+        self.func = func
+        self.inputs = [Port(n, t) for n, t, _ in inputs]
+        self.outputs = [Port(n, t) for n, t in outputs]
+        self.defaults = {n: d for n, _, d in inputs}
+        self.params = params or {}
+        self.category = category
+        self.executor = executor
+        self.cached = cached
+
+    def __repr__(self):
+        return f"Operator({self.name!r})"
+
+    def kwargs(self, params: dict) -> dict:
+        """Keyword arguments for the function from a node's params."""
+        return {k: params.get(k, v) for k, v in self.params.items()}
+
+    def wrap(self, result) -> tuple:
+        """Function result as a tuple with one value per output."""
+        return (result,) if len(self.outputs) == 1 else tuple(result)
+
+    def compute(self, inputs: list, params: dict) -> tuple:
+        """Call the function, always returns a tuple with one value per output."""
+        return self.wrap(self.func(*inputs, **self.kwargs(params)))
+
+    def create(self, graph: Graph, position: tuple[float, float] = (0.0, 0.0), name: str = None) -> Node:
+        """Add a node of this type to a graph."""
+        params = dict(self.defaults)
+        params.update(self.params)
+        return graph.add_node(name or self.name, self.name, position, self.inputs, self.outputs, params)
+
+
+REGISTRY: dict[str, Operator] = {}
+""": operators by name"""
+
+
+def register(
+        name: str,
+        inputs: typing.Sequence[tuple[str, str, typing.Any]] = (),
+        outputs: typing.Sequence[tuple[str, str]] = (('out', FLOAT),),
+        params: dict = None,
+        category: str = '',
+        executor: str = INLINE,
+        cached: bool = False
+        ) -> typing.Callable:
+    """Decorator adding a function to the registry as an operator.
+
+    Args:
+        name: node type name, must be unique.
+        inputs: (name, type, default) for each input.
+        outputs: (name, type) for each output.
+        params: names and defaults of values that can't be connected.
+        category: used to group operators in menus.
+        executor: INLINE, THREAD or PROCESS, where the scheduler runs it.
+        cached: keep outputs in the evaluator's output cache, for expensive operators.
+    """
+    def decorator(func):
+        if name in REGISTRY:
+            raise ValueError(f"operator {name} is already registered")
+        REGISTRY[name] = Operator(name, func, inputs, outputs, params, category, executor, cached)
+        return func
+    return decorator
+
+
+def get(name: str) -> Operator:
+    return REGISTRY[name]
+
+
+def categories() -> dict[str, list[Operator]]:
+    """Operators grouped by category, sorted by name."""
+    result = {}
+    for op in sorted(REGISTRY.values(), key=lambda o: (o.category, o.name)):
+        result.setdefault(op.category, []).append(op)
+    return result
+
+
+# built in operators
+
+_AB = [('a', FLOAT, 0.0), ('b', FLOAT, 0.0)]
+
+
+@register('Value', params={'value': 0.0}, category='Input')
+def value(value):
+    return value
+
+
+@register('Text', outputs=[('out', STRING)], params={'value': ''}, category='Input')
+def text(value):
+    return value
+
+
+@register('Add', inputs=_AB, category='Maths')
+def add(a, b):
+    return a + b
+
+
+@register('Subtract', inputs=_AB, category='Maths')
+def subtract(a, b):
+    return a - b
+
+
+@register('Multiply', inputs=[('a', FLOAT, 1.0), ('b', FLOAT, 1.0)], category='Maths')
+def multiply(a, b):
+    return a * b
+
+
+@register('Divide', inputs=[('a', FLOAT, 1.0), ('b', FLOAT, 1.0)], category='Maths')
+def divide(a, b):
+    return a / b if b else 0.0
+
+
+@register('Power', inputs=[('base', FLOAT, 1.0), ('exponent', FLOAT, 1.0)], category='Maths')
+def power(base, exponent):
+    return base ** exponent
+
+
+@register('Negate', inputs=[('x', FLOAT, 0.0)], category='Maths')
+def negate(x):
+    return -x
+
+
+@register('Clamp', inputs=[('x', FLOAT, 0.0), ('min', FLOAT, 0.0), ('max', FLOAT, 1.0)], category='Maths')
+def clamp(x, min_value, max_value):
+    return max(min_value, min(max_value, x))
+
+
+@register('Lerp', inputs=[('a', FLOAT, 0.0), ('b', FLOAT, 1.0), ('t', FLOAT, 0.5)], category='Maths')
+def lerp(a, b, t):
+    return a + (b - a) * t
+
+
+@register('Sin', inputs=[('x', FLOAT, 0.0)], category='Trigonometry')
+def sin(x):
+    return math.sin(x)
+
+
+@register('Cos', inputs=[('x', FLOAT, 0.0)], category='Trigonometry')
+def cos(x):
+    return math.cos(x)
+
+
+@register('Degrees', inputs=[('radians', FLOAT, 0.0)], category='Trigonometry')
+def degrees(radians):
+    return math.degrees(radians)
+
+
+@register('Radians', inputs=[('degrees', FLOAT, 0.0)], category='Trigonometry')
+def radians(degrees):
+    return math.radians(degrees)
+
+
+@register('Concat', inputs=[('a', STRING, ''), ('b', STRING, '')], outputs=[('out', STRING)], category='Text')
+def concat(a, b):
+    return f'{a}{b}'
+
+
+@register('Format', inputs=[('x', FLOAT, 0.0)], outputs=[('out', STRING)], params={'pattern': '{:.3f}'}, category='Text')
+def format_value(x, pattern):
+    return pattern.format(x)
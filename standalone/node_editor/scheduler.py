@@ -0,0 +1,260 @@
+"""
+Run independent branches of a graph in parallel.
+
+The scheduler works through the same schedule as the Evaluator, but instead of
+computing nodes one after another it dispatches every node whose inputs are
+resolved. Where a node runs depends on its operator's executor hint:
+
+    INLINE: on the calling thread, for cheap operators.
+    THREAD: on a thread pool, for operators that release the GIL.
+    PROCESS: on a process pool, for pure python heavy lifting.
+
+Ready nodes are started in order of the longest chain of work they hold up, so
+the critical path isn't left waiting behind short branches. At most
+max_pending nodes are in flight at once.
+
+Large numpy arrays passed to process nodes go through shared memory rather
+than being pickled, workers get a view onto the block without copying it.
+
+    scheduler = Scheduler(evaluator, max_workers=4)
+    scheduler.run(node.id)
+"""
+from __future__ import annotations
+import concurrent.futures
+import heapq
+import os
+import threading
+import time
+import typing
+from multiprocessing import shared_memory
+
+from . import operators
+from .evaluate import Evaluator, EvaluationError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SHARED_MEMORY_MIN_BYTES = 1 << 20
+""": arrays at least this big are passed to processes through shared memory"""
+
+POLL_INTERVAL = 0.05
+""": seconds between checks for cancellation while waiting on workers"""
+
+COST_SMOOTHING = 0.3
+""": weight of the latest timing in an operator's running cost estimate"""
+
+
+class Cancelled(Exception):
+    """Scheduler.cancel was called while running."""
+
+
+class _SharedArray:
+    """Picklable description of an array in a shared memory block."""
+    __slots__ = ('name', 'shape', 'dtype')
+
+    def __init__(self, name: str, shape: tuple, dtype: str):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+
+def _share(value, blocks: list[shared_memory.SharedMemory]):
+    """Copy a large array into shared memory, other values are returned as they are."""
+    if np is None or not isinstance(value, np.ndarray) or value.nbytes < SHARED_MEMORY_MIN_BYTES:
+        return value
+
+    block = shared_memory.SharedMemory(create=True, size=value.nbytes)
+    blocks.append(block)
+    np.ndarray(value.shape, value.dtype, buffer=block.buf)[...] = value
+    return _SharedArray(block.name, value.shape, value.dtype.str)
+
+
+def _release(blocks: list[shared_memory.SharedMemory]) -> None:
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _run_in_process(func: typing.Callable, args: list, kwargs: dict):
+    """Entry point in a worker process, maps shared arrays back to numpy views."""
+    blocks = []
+    values = []
+    for value in args:
+        if isinstance(value, _SharedArray):
+            block = shared_memory.SharedMemory(name=value.name)
+            blocks.append(block)
+            value = np.ndarray(value.shape, np.dtype(value.dtype), buffer=block.buf)
+        values.append(value)
+
+    try:
+        result = func(*values, **kwargs)
+        # results are pickled after the blocks close, so they can't be views onto them
+        if blocks and isinstance(result, np.ndarray) and any(np.may_share_memory(result, v) for v in values):
+            result = result.copy()
+        return result
+    finally:
+        del values
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # the operator kept a view, the block is freed when the worker exits
+                pass
+
+
+class Scheduler:
+    """Evaluates a node's upstream graph on thread and process pools.
+
+    Pools are created the first time they're needed and kept until shutdown.
+    """
+
+    def __init__(self, evaluator: Evaluator, max_workers: int = None, max_pending: int = None):
+        """
+        Args:
+            evaluator: holds the graph and the computed values.
+            max_workers: workers in each pool, defaults to the number of CPUs.
+            max_pending: nodes in flight at once, defaults to max_workers.
+        """
+        self.evaluator = evaluator
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers
+        self.costs: dict[str, float] = {}
+        self._pools: dict[str, concurrent.futures.Executor] = {}
+        self._cancel = threading.Event()
+
+    def _pool(self, executor: str) -> concurrent.futures.Executor:
+        pool = self._pools.get(executor)
+        if pool is None:
+            if executor == operators.PROCESS:
+                pool = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+            else:
+                pool = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix='NodeEditor')
+            self._pools[executor] = pool
+        return pool
+
+    def shutdown(self) -> None:
+        """Stop the worker pools."""
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+    def cancel(self) -> None:
+        """Stop a run in progress, safe to call from another thread.
+
+        Nodes that already finished keep their values, running workers finish
+        but their results are dropped.
+        """
+        self._cancel.set()
+
+    def cost(self, node_id: int) -> float:
+        """Estimated seconds to compute a node, from previous runs of its type."""
+        return self.costs.get(self.evaluator.graph.nodes[node_id].type, 0.001)
+
+    def priorities(self, order: list[int]) -> dict[int, float]:
+        """Length of the most expensive chain from each node to the end of the schedule."""
+        scheduled = set(order)
+        result = {}
+        for n in reversed(order):
+            tail = [result[t] for t in self.evaluator.graph.downstream(n) if t in scheduled]
+            result[n] = self.cost(n) + max(tail, default=0.0)
+        return result
+
+    def _record(self, node_id: int, seconds: float) -> None:
+        node_type = self.evaluator.graph.nodes[node_id].type
+        old = self.costs.get(node_type)
+        self.costs[node_type] = seconds if old is None else old + (seconds - old) * COST_SMOOTHING
+
+    def run(self, node_id: int, port: int = 0) -> typing.Any:
+        """Value of an output, computing what's out of date upstream in parallel.
+
+        Raises:
+            CycleError: the node depends on itself.
+            EvaluationError: an operator raised.
+            Cancelled: cancel was called.
+        """
+        ev = self.evaluator
+        if not ev.is_dirty(node_id, port):
+            return ev.value(node_id, port)
+
+        self._cancel.clear()
+        order = ev.schedule(node_id)
+        scheduled = set(order)
+        waiting = {n: len(ev.graph.upstream(n) & scheduled) for n in order}
+        priority = self.priorities(order)
+        ready = [(-priority[n], n) for n in order if not waiting[n]]
+        heapq.heapify(ready)
+        running = {}
+
+        def finished(n):
+            for target in ev.graph.downstream(n):
+                if target in waiting:
+                    waiting[target] -= 1
+                    if not waiting[target]:
+                        heapq.heappush(ready, (-priority[target], target))
+
+        try:
+            while ready or running:
+                if self._cancel.is_set():
+                    raise Cancelled()
+
+                while ready and len(running) < self.max_pending:
+                    _, n = heapq.heappop(ready)
+                    inputs, key = ev.gather(n)
+                    if not ev.needs_compute(n, key):
+                        ev.mark_clean(n)
+                        finished(n)
+                        continue
+
+                    op = ev.operator(n)
+                    start = time.perf_counter()
+                    if op.executor == operators.INLINE:
+                        ev.store(n, key, ev.compute(n, inputs))
+                        self._record(n, time.perf_counter() - start)
+                        finished(n)
+                        continue
+
+                    cache_key, outputs = ev.lookup(n, inputs)
+                    if outputs is not None:
+                        ev.store(n, key, outputs)
+                        finished(n)
+                        continue
+
+                    blocks = []
+                    kwargs = op.kwargs(ev.graph.nodes[n].params)
+                    if op.executor == operators.PROCESS:
+                        args = [_share(v, blocks) for v in inputs]
+                        future = self._pool(op.executor).submit(_run_in_process, op.func, args, kwargs)
+                    else:
+                        future = self._pool(op.executor).submit(op.func, *inputs, **kwargs)
+                    running[future] = (n, key, cache_key, start, blocks)
+
+                if not running:
+                    continue
+
+                done, _ = concurrent.futures.wait(
+                    running, timeout=POLL_INTERVAL, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    n, key, cache_key, start, blocks = running.pop(future)
+                    _release(blocks)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        raise EvaluationError(n, e) from e
+                    outputs = ev.operator(n).wrap(result)
+                    seconds = time.perf_counter() - start
+                    ev.finish(n, cache_key, outputs, seconds)
+                    ev.store(n, key, outputs)
+                    self._record(n, seconds)
+                    finished(n)
+
+        finally:
+            # blocks are freed once workers that already started are done with them
+            for future, (_, _, _, _, blocks) in running.items():
+                if not future.cancel():
+                    future.add_done_callback(lambda f, b=blocks: _release(b))
+                else:
+                    _release(blocks)
+
+        return ev.value(node_id, port)
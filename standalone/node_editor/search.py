@@ -0,0 +1,189 @@
+"""
+Find nodes by name, type and port name as the user types.
+
+Names are indexed by trigram: each lower case name is padded with two spaces
+at the front, so its first one and two characters are trigrams too. A term of
+three or more characters looks up the nodes holding all of its trigrams and
+checks the few left for the substring. Shorter terms match the start of names,
+or anywhere in them when other terms have already narrowed the search.
+
+Types and port names have few distinct values, each maps to the nodes using it.
+
+The index follows graph events, so it's updated as nodes are added, renamed
+and removed rather than rebuilt:
+
+    index = SearchIndex(graph)
+    index.query('add')               # names containing 'add'
+    index.query('type:multiply x')   # Multiply nodes with 'x' in their name
+    index.query('port:radians')      # nodes with a port called radians
+"""
+from __future__ import annotations
+
+from . import model
+from .model import Graph, Node
+
+PAD = '  '
+""": prefix on names so short terms match their start"""
+
+TYPE_PREFIX = 'type:'
+PORT_PREFIX = 'port:'
+
+
+def trigrams(text: str) -> set[str]:
+    text = PAD + text
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over node names, with type and port name indices."""
+
+    def __init__(self, graph: Graph = None):
+        self._names: dict[int, str] = {}
+        self._trigrams: dict[str, set[int]] = {}
+        self._types: dict[str, set[int]] = {}
+        self._ports: dict[str, set[int]] = {}
+        self._node_keys: dict[int, tuple[str, tuple[str, ...]]] = {}
+        self.graph = graph
+        if graph is not None:
+            for node in graph.nodes.values():
+                self.add(node)
+            graph.subscribe(self._graph_changed)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def close(self) -> None:
+        """Stop following changes to the graph."""
+        if self.graph is not None:
+            self.graph.unsubscribe(self._graph_changed)
+
+    def _graph_changed(self, event: str, item: Node) -> None:
+        if event == model.NODE_ADDED:
+            self.add(item)
+        elif event == model.NODE_REMOVED:
+            self.remove(item.id)
+        elif event == model.NODE_RENAMED:
+            self.rename(item.id, item.name)
+
+    @staticmethod
+    def _link(index: dict[str, set[int]], key: str, node_id: int) -> None:
+        index.setdefault(key, set()).add(node_id)
+
+    @staticmethod
+    def _unlink(index: dict[str, set[int]], key: str, node_id: int) -> None:
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(node_id)
+            if not ids:
+                del index[key]
+
+    def add(self, node: Node) -> None:
+        self.rename(node.id, node.name)
+        node_type = node.type.lower()
+        ports = tuple({p.name.lower() for p in node.inputs} | {p.name.lower() for p in node.outputs})
+        self._node_keys[node.id] = (node_type, ports)
+        self._link(self._types, node_type, node.id)
+        for port in ports:
+            self._link(self._ports, port, node.id)
+
+    def rename(self, node_id: int, name: str) -> None:
+        """Reindex a node's name, only trigrams that changed are touched."""
+        name = name.lower()
+        old = self._names.get(node_id)
+        old_grams = trigrams(old) if old is not None else set()
+        new_grams = trigrams(name)
+        for gram in old_grams - new_grams:
+            self._unlink(self._trigrams, gram, node_id)
+        for gram in new_grams - old_grams:
+            self._link(self._trigrams, gram, node_id)
+        self._names[node_id] = name
+
+    def remove(self, node_id: int) -> None:
+        name = self._names.pop(node_id, None)
+        if name is None:
+            return
+        for gram in trigrams(name):
+            self._unlink(self._trigrams, gram, node_id)
+        node_type, ports = self._node_keys.pop(node_id)
+        self._unlink(self._types, node_type, node_id)
+        for port in ports:
+            self._unlink(self._ports, port, node_id)
+
+    def clear(self) -> None:
+        self._names.clear()
+        self._trigrams.clear()
+        self._types.clear()
+        self._ports.clear()
+        self._node_keys.clear()
+
+    def _match_name(self, term: str) -> set[int]:
+        if len(term) < 3:
+            return set(self._trigrams.get((PAD + term)[-3:], ()))
+
+        # smallest sets first, so the intersection shrinks quickly
+        grams = sorted((self._trigrams.get(term[i:i + 3], set()) for i in range(len(term) - 2)), key=len)
+        ids = set(grams[0])
+        for other in grams[1:]:
+            if not ids:
+                break
+            ids &= other
+        if len(term) > 3:
+            # trigrams can all be present without being next to each other
+            ids = {i for i in ids if term in self._names[i]}
+        return ids
+
+    @staticmethod
+    def _match_key(index: dict[str, set[int]], term: str) -> set[int]:
+        """Nodes under every key starting with the term, there are only a few keys."""
+        ids = set()
+        for key, key_ids in index.items():
+            if key.startswith(term):
+                ids |= key_ids
+        return ids
+
+    def query(self, text: str, limit: int = None) -> list[int]:
+        """Ids of nodes matching every term in the text, best matches first.
+
+        Terms are separated by spaces and matched without case. 'type:name'
+        matches node types and 'port:name' port names, by their start. Other
+        terms match anywhere in node names, except that a lone term of one or
+        two characters only matches the start of names.
+
+        Args:
+            text: search terms.
+            limit: most results to return.
+        """
+        terms = text.lower().split()
+        if not terms:
+            return []
+
+        ids = None
+        name_terms = []
+        # rarest looking terms first, so later ones only narrow a small set
+        for term in sorted(terms, key=len, reverse=True):
+            if term.startswith(TYPE_PREFIX):
+                found = self._match_key(self._types, term[len(TYPE_PREFIX):])
+            elif term.startswith(PORT_PREFIX):
+                found = self._match_key(self._ports, term[len(PORT_PREFIX):])
+            elif len(term) < 3 and ids is not None:
+                # the longer terms already narrowed the search, so look anywhere in the names left
+                found = {i for i in ids if term in self._names[i]}
+                name_terms.append(term)
+            else:
+                found = self._match_name(term)
+                name_terms.append(term)
+            ids = found if ids is None else ids & found
+            if not ids:
+                return []
+
+        names = self._names
+
+        def rank(node_id):
+            name = names[node_id]
+            # exact names first, then names starting with a term, then the rest
+            exact = any(name == t for t in name_terms)
+            prefix = any(name.startswith(t) for t in name_terms)
+            return not exact, not prefix, len(name), name, node_id
+
+        result = sorted(ids, key=rank)
+        return result if limit is None else result[:limit]
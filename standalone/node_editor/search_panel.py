@@ -0,0 +1,80 @@
+from PySide2.QtWidgets import *
+from PySide2.QtCore import *
+
+from . import search
+
+MAX_RESULTS = 200
+""": results listed, and highlighted, at once"""
+
+
+class SearchPanel(QWidget):
+    """Find nodes as you type, selects and frames the matches.
+
+    Results come from a SearchIndex that follows the scene's graph. Picking a
+    result frames that node, pressing return frames every listed match.
+    """
+
+    def __init__(self, scene, view, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.view = view
+        self.index = search.SearchIndex(scene.graph)
+        self.setFixedWidth(250)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText('name, type:Add, port:x')
+        self.search_edit.setClearButtonEnabled(True)
+        self.count_label = QLabel()
+        self.results = QListWidget()
+        self.results.setUniformItemSizes(True)
+
+        lyt = QVBoxLayout()
+        lyt.setContentsMargins(0, 0, 0, 0)
+        lyt.addWidget(self.search_edit)
+        lyt.addWidget(self.count_label)
+        lyt.addWidget(self.results)
+        self.setLayout(lyt)
+
+        self.search_edit.textChanged.connect(self.run_query)
+        self.search_edit.returnPressed.connect(self.frame_results)
+        self.results.currentItemChanged.connect(self._result_changed)
+
+    def focus(self):
+        self.search_edit.setFocus()
+        self.search_edit.selectAll()
+
+    def result_ids(self):
+        return [self.results.item(i).data(Qt.UserRole) for i in range(self.results.count())]
+
+    def run_query(self, text=None):
+        text = self.search_edit.text() if text is None else text
+        ids = self.index.query(text)
+        nodes = self.scene.graph.nodes
+
+        self.results.blockSignals(True)
+        self.results.clear()
+        for node_id in ids[:MAX_RESULTS]:
+            node = nodes[node_id]
+            item = QListWidgetItem(f'{node.name}  ({node.type})' if node.type else node.name)
+            item.setData(Qt.UserRole, node_id)
+            self.results.addItem(item)
+        self.results.blockSignals(False)
+
+        shown = min(len(ids), MAX_RESULTS)
+        self.count_label.setText(f'{len(ids)} found' + (f', showing {shown}' if shown < len(ids) else ''))
+        self.scene.select_nodes(ids[:MAX_RESULTS])
+
+    def frame_results(self):
+        ids = self.result_ids()
+        if ids:
+            self.view.frame(self.scene.nodes_rect(ids))
+            # framing can create items for nodes that had none
+            self.scene.select_nodes(ids)
+
+    def _result_changed(self, item, previous=None):
+        if item is None:
+            return
+        node_id = item.data(Qt.UserRole)
+        if node_id in self.scene.graph:
+            self.view.frame(self.scene.nodes_rect([node_id]))
+            self.scene.select_nodes([node_id])
@@ -0,0 +1,371 @@
+"""
+Save and load graphs.
+
+Two formats are supported:
+
+    binary: columnar blocks of up to BLOCK_SIZE rows. Each column is written
+        with a single array.tobytes call, and blocks are decoded one at a
+        time so large graphs stream in without building the whole file in
+        memory.
+    json: one node or edge per line, sorted by id, so files diff cleanly.
+        The whole file is parsed before the first block is yielded, it
+        doesn't stream.
+
+The format is picked from the file extension when saving and from the first
+bytes of the file when loading:
+
+    save(graph, 'rig.graph')
+    graph = load('rig.graph')
+"""
+from __future__ import annotations
+import array
+import json
+import struct
+import sys
+import typing
+
+from .model import Graph, Node, Edge, Port
+
+MAGIC = b'GZGR'
+VERSION = 1
+
+EXTENSION = '.graph'
+""": default extension for binary files"""
+
+BLOCK_SIZE = 4096
+""": maximum rows in a block, also the batch size when streaming"""
+
+NODES = 'nodes'
+EDGES = 'edges'
+
+_BLOCK_NODES = 1
+_BLOCK_EDGES = 2
+_HEADER = struct.Struct('<4sHII')
+_BLOCK = struct.Struct('<BI')
+_SWAP = sys.byteorder != 'little'
+
+
+class SerializeError(Exception):
+    """File isn't a graph, is truncated or corrupt, or was written by a newer version."""
+
+
+# binary helpers, every column is stored little endian
+
+def _write_array(f: typing.BinaryIO, typecode: str, values: typing.Iterable) -> None:
+    a = array.array(typecode, values)
+    if _SWAP:
+        a.byteswap()
+    f.write(a.tobytes())
+
+
+def _read(f: typing.BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise SerializeError("unexpected end of file")
+    return data
+
+
+def _read_array(f: typing.BinaryIO, typecode: str, count: int) -> array.array:
+    a = array.array(typecode)
+    a.frombytes(_read(f, count * a.itemsize))
+    if _SWAP:
+        a.byteswap()
+    return a
+
+
+def _write_strings(f: typing.BinaryIO, strings: list[str]) -> None:
+    encoded = [s.encode('utf-8') for s in strings]
+    f.write(struct.pack('<I', len(encoded)))
+    _write_array(f, 'I', (len(s) for s in encoded))
+    f.write(b''.join(encoded))
+
+
+def _read_strings(f: typing.BinaryIO) -> list[str]:
+    count, = struct.unpack('<I', _read(f, 4))
+    lengths = _read_array(f, 'I', count)
+    data = _read(f, sum(lengths))
+    strings = []
+    offset = 0
+    try:
+        for length in lengths:
+            strings.append(data[offset:offset + length].decode('utf-8'))
+            offset += length
+    except UnicodeDecodeError as e:
+        raise SerializeError(f"corrupt string table: {e}") from None
+    return strings
+
+
+class _StringTable:
+    """Interns strings so repeated names and types are stored once per block."""
+
+    def __init__(self):
+        self.strings: list[str] = []
+        self._index: dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        i = self._index.get(value)
+        if i is None:
+            i = self._index[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+
+def _write_node_block(f: typing.BinaryIO, nodes: list[Node]) -> None:
+    table = _StringTable()
+    names = [table(n.name) for n in nodes]
+    types = [table(n.type) for n in nodes]
+    port_names = []
+    port_types = []
+    for n in nodes:
+        for p in n.inputs:
+            port_names.append(table(p.name))
+            port_types.append(table(p.type))
+        for p in n.outputs:
+            port_names.append(table(p.name))
+            port_types.append(table(p.type))
+
+    # params are rare and free form, they're kept as json, empty means none
+    params = [json.dumps(n.params, separators=(',', ':')) if n.params else '' for n in nodes]
+    params = [table(p) for p in params]
+
+    f.write(_BLOCK.pack(_BLOCK_NODES, len(nodes)))
+    _write_strings(f, table.strings)
+    _write_array(f, 'q', (n.id for n in nodes))
+    _write_array(f, 'I', names)
+    _write_array(f, 'I', types)
+    _write_array(f, 'd', (n.x for n in nodes))
+    _write_array(f, 'd', (n.y for n in nodes))
+    _write_array(f, 'I', (len(n.inputs) for n in nodes))
+    _write_array(f, 'I', (len(n.outputs) for n in nodes))
+    _write_array(f, 'I', params)
+    f.write(struct.pack('<I', len(port_names)))
+    _write_array(f, 'I', port_names)
+    _write_array(f, 'I', port_types)
+
+
+def _read_node_block(f: typing.BinaryIO, count: int) -> list[Node]:
+    strings = _read_strings(f)
+    ids = _read_array(f, 'q', count)
+    names = _read_array(f, 'I', count)
+    types = _read_array(f, 'I', count)
+    xs = _read_array(f, 'd', count)
+    ys = _read_array(f, 'd', count)
+    input_counts = _read_array(f, 'I', count)
+    output_counts = _read_array(f, 'I', count)
+    params = _read_array(f, 'I', count)
+    port_count, = struct.unpack('<I', _read(f, 4))
+    port_names = _read_array(f, 'I', port_count)
+    port_types = _read_array(f, 'I', port_count)
+    if sum(input_counts) + sum(output_counts) != port_count:
+        raise SerializeError("corrupt node block, port counts don't add up")
+
+    try:
+        # nodes of the same type share their port records
+        ports = {}
+        for key in zip(port_names, port_types):
+            if key not in ports:
+                ports[key] = Port(strings[key[0]], strings[key[1]])
+        ports = [ports[key] for key in zip(port_names, port_types)]
+
+        nodes = []
+        p = 0
+        for i in range(count):
+            inputs = ports[p:p + input_counts[i]]
+            p += input_counts[i]
+            outputs = ports[p:p + output_counts[i]]
+            p += output_counts[i]
+            param = strings[params[i]]
+            nodes.append(Node(
+                ids[i],
+                strings[names[i]],
+                strings[types[i]],
+                xs[i],
+                ys[i],
+                inputs,
+                outputs,
+                json.loads(param) if param else None
+            ))
+    except (IndexError, ValueError) as e:
+        # string indices out of range or params that aren't json
+        raise SerializeError(f"corrupt node block: {e}") from None
+    return nodes
+
+
+def _write_edge_block(f: typing.BinaryIO, edges: list[Edge]) -> None:
+    f.write(_BLOCK.pack(_BLOCK_EDGES, len(edges)))
+    _write_array(f, 'q', (e.id for e in edges))
+    _write_array(f, 'q', (e.source for e in edges))
+    _write_array(f, 'I', (e.source_port for e in edges))
+    _write_array(f, 'q', (e.target for e in edges))
+    _write_array(f, 'I', (e.target_port for e in edges))
+
+
+def _read_edge_block(f: typing.BinaryIO, count: int) -> list[Edge]:
+    columns = (
+        _read_array(f, 'q', count),
+        _read_array(f, 'q', count),
+        _read_array(f, 'I', count),
+        _read_array(f, 'q', count),
+        _read_array(f, 'I', count)
+    )
+    return [Edge(*row) for row in zip(*columns)]
+
+
+def _blocks(items: list, size: int) -> typing.Iterator[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def save_binary(graph: Graph, f: typing.BinaryIO, block_size: int = BLOCK_SIZE) -> None:
+    """Write a graph to an open binary file."""
+    nodes = list(graph.nodes.values())
+    edges = list(graph.edges.values())
+    f.write(_HEADER.pack(MAGIC, VERSION, len(nodes), len(edges)))
+    for block in _blocks(nodes, block_size):
+        _write_node_block(f, block)
+    for block in _blocks(edges, block_size):
+        _write_edge_block(f, block)
+
+
+def iter_binary(f: typing.BinaryIO) -> typing.Iterator[tuple[str, list[Node] | list[Edge]]]:
+    """Decode a binary file one block at a time.
+
+    Yields:
+        (NODES, nodes) or (EDGES, edges), every node is yielded before any edge.
+    """
+    magic, version, _, _ = _HEADER.unpack(_read(f, _HEADER.size))
+    if magic != MAGIC:
+        raise SerializeError("not a graph file")
+    if version > VERSION:
+        raise SerializeError(f"unsupported version {version}")
+
+    while True:
+        data = f.read(1)
+        if not data:
+            return
+        kind, count = _BLOCK.unpack(data + _read(f, _BLOCK.size - 1))
+        if kind == _BLOCK_NODES:
+            yield NODES, _read_node_block(f, count)
+        elif kind == _BLOCK_EDGES:
+            yield EDGES, _read_edge_block(f, count)
+        else:
+            raise SerializeError(f"unknown block {kind}")
+
+
+# json
+
+def node_to_list(node: Node) -> list:
+    return [
+        node.id,
+        node.name,
+        node.type,
+        node.x,
+        node.y,
+        [[p.name, p.type] for p in node.inputs],
+        [[p.name, p.type] for p in node.outputs],
+        node.params
+    ]
+
+
+def node_from_list(data: list) -> Node:
+    node_id, name, type, x, y, inputs, outputs, params = data
+    return Node(node_id, name, type, x, y, [Port(*p) for p in inputs], [Port(*p) for p in outputs], params or None)
+
+
+def save_json(graph: Graph, f: typing.TextIO) -> None:
+    """Write a graph as json, one row per line."""
+    def rows(items):
+        return ',\n'.join('    ' + json.dumps(i, separators=(', ', ': ')) for i in items)
+
+    nodes = [node_to_list(graph.nodes[i]) for i in sorted(graph.nodes)]
+    edges = [[e.id, e.source, e.source_port, e.target, e.target_port] for e in
+             (graph.edges[i] for i in sorted(graph.edges))]
+
+    f.write('{\n')
+    f.write(f'  "version": {VERSION},\n')
+    f.write('  "nodes": [\n' + rows(nodes) + '\n  ],\n')
+    f.write('  "edges": [\n' + rows(edges) + '\n  ]\n')
+    f.write('}\n')
+
+
+def iter_json(f: typing.TextIO, block_size: int = BLOCK_SIZE) -> typing.Iterator[tuple[str, list[Node] | list[Edge]]]:
+    """Decode a json file, yielded in blocks like iter_binary.
+
+    The whole file is parsed up front, only decoding rows into nodes and edges
+    is spread across the blocks.
+    """
+    try:
+        data = json.load(f)
+        version = data.get('version', 0)
+        nodes = data['nodes']
+        edges = data['edges']
+    except (ValueError, KeyError, AttributeError) as e:
+        raise SerializeError(f"not a graph file: {e}") from None
+    if version > VERSION:
+        raise SerializeError(f"unsupported version {version}")
+
+    try:
+        for block in _blocks(nodes, block_size):
+            yield NODES, [node_from_list(n) for n in block]
+        for block in _blocks(edges, block_size):
+            yield EDGES, [Edge(*e) for e in block]
+    except (ValueError, TypeError) as e:
+        raise SerializeError(f"corrupt row: {e}") from None
+
+
+# files
+
+def is_json(path: str) -> bool:
+    return path.lower().endswith('.json')
+
+
+def save(graph: Graph, path: str, block_size: int = BLOCK_SIZE) -> None:
+    """Save a graph, as json if the path ends with .json, otherwise binary."""
+    if is_json(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            save_json(graph, f)
+    else:
+        with open(path, 'wb') as f:
+            save_binary(graph, f, block_size)
+
+
+def iter_load(path: str) -> typing.Iterator[tuple[str, list[Node] | list[Edge]]]:
+    """Stream a file in blocks, see iter_binary."""
+    with open(path, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+
+    if binary:
+        with open(path, 'rb') as f:
+            yield from iter_binary(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            yield from iter_json(f)
+
+
+def load(path: str, graph: Graph = None) -> Graph:
+    """Load a file into a graph, keeping node and edge ids.
+
+    Args:
+        path: file to read.
+        graph: graph to add to, a new one is created if not given.
+
+    Raises:
+        SerializeError: the file isn't a graph, or is truncated or corrupt.
+            What was read before the error is left in the graph.
+    """
+    if graph is None:
+        graph = Graph()
+
+    for kind, items in iter_load(path):
+        try:
+            if kind == NODES:
+                for n in items:
+                    graph.add_node(n.name, n.type, (n.x, n.y), n.inputs, n.outputs, n.params, node_id=n.id)
+            else:
+                for e in items:
+                    graph.connect(e.source, e.source_port, e.target, e.target_port, edge_id=e.id)
+        except ValueError as e:
+            # duplicate ids, or edges to nodes and ports that don't exist
+            raise SerializeError(f"corrupt {kind}: {e}") from None
+
+    return graph
@@ -0,0 +1,163 @@
+"""
+Spatial index for node bounds.
+
+A uniform grid: each key is stored in every cell its rectangle overlaps, so
+inserting, moving and querying a rect only touches the cells under it. Nodes
+are all a similar size, which suits a grid better than a tree.
+
+    index = GridIndex(cell_size=500)
+    index.insert(node.id, (node.x, node.y, 180, 240))
+    visible = index.query(0, 0, 1920, 1080)
+
+Points, like socket positions, are stored as rects with no size.
+
+DirtyRects collects the areas that changed between redraws of a cached image.
+"""
+from __future__ import annotations
+import math
+import typing
+
+CELL_SIZE = 512.0
+""": default grid cell size in scene units, a few nodes across"""
+
+Rect = typing.Tuple[float, float, float, float]
+
+
+class GridIndex:
+    """Uniform grid of cells, each holding the keys whose rect overlaps it."""
+
+    def __init__(self, cell_size: float = CELL_SIZE):
+        self.cell_size = cell_size
+        self._cells: dict[tuple[int, int], set] = {}
+        self._rects: dict[typing.Hashable, Rect] = {}
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, key: typing.Hashable) -> bool:
+        return key in self._rects
+
+    def _cell_bounds(self, x: float, y: float, w: float, h: float) -> tuple[int, int, int, int]:
+        size = self.cell_size
+        return math.floor(x / size), math.floor((x + w) / size), math.floor(y / size), math.floor((y + h) / size)
+
+    def _cell_range(self, x: float, y: float, w: float, h: float) -> typing.Iterator[tuple[int, int]]:
+        left, right, top, bottom = self._cell_bounds(x, y, w, h)
+        for i in range(left, right + 1):
+            for j in range(top, bottom + 1):
+                yield i, j
+
+    def insert(self, key: typing.Hashable, rect: Rect) -> None:
+        """Add a key with bounds (x, y, width, height), replacing its bounds if it exists."""
+        if key in self._rects:
+            self.remove(key)
+        self._rects[key] = rect
+        for cell in self._cell_range(*rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: typing.Hashable) -> None:
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cell_range(*rect):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def move(self, key: typing.Hashable, rect: Rect) -> None:
+        """Update the bounds of a key, cheap when it stays in the same cells."""
+        old = self._rects.get(key)
+        if old is None or self._cell_bounds(*old) != self._cell_bounds(*rect):
+            self.insert(key, rect)
+        else:
+            self._rects[key] = rect
+
+    def rect(self, key: typing.Hashable) -> Rect:
+        return self._rects[key]
+
+    def query(self, x: float, y: float, w: float, h: float) -> set:
+        """Keys whose bounds intersect the rect."""
+        right = x + w
+        bottom = y + h
+        result = set()
+        for cell in self._cell_range(x, y, w, h):
+            for key in self._cells.get(cell, ()):
+                if key in result:
+                    continue
+                kx, ky, kw, kh = self._rects[key]
+                if kx <= right and kx + kw >= x and ky <= bottom and ky + kh >= y:
+                    result.add(key)
+        return result
+
+    def nearest(self, x: float, y: float, radius: float) -> list:
+        """Keys whose bounds centre is within radius of a point, closest first."""
+        found = []
+        for key in self.query(x - radius, y - radius, 2 * radius, 2 * radius):
+            kx, ky, kw, kh = self._rects[key]
+            distance = math.hypot(kx + kw / 2 - x, ky + kh / 2 - y)
+            if distance <= radius:
+                found.append((distance, key))
+        found.sort(key=lambda f: f[0])
+        return [key for _, key in found]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._rects.clear()
+
+
+class DirtyRects:
+    """Collects areas that need redrawing, merging ones that overlap.
+
+    Past max_rects the areas collapse into their bounding rect, so a burst of
+    changes costs one large redraw rather than many small ones.
+
+        dirty = DirtyRects()
+        dirty.add((0, 0, 180, 240))
+        for rect in dirty.take():
+            redraw(rect)
+    """
+
+    def __init__(self, max_rects: int = 16):
+        self.max_rects = max_rects
+        self._rects: list[Rect] = []
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def add(self, rect: Rect) -> None:
+        x, y, w, h = rect
+        right, bottom = x + w, y + h
+        merged = True
+        while merged:
+            merged = False
+            for i, (kx, ky, kw, kh) in enumerate(self._rects):
+                if kx <= right and kx + kw >= x and ky <= bottom and ky + kh >= y:
+                    # the union can overlap rects it didn't before, so check again
+                    del self._rects[i]
+                    x, y, right, bottom = min(x, kx), min(y, ky), max(right, kx + kw), max(bottom, ky + kh)
+                    merged = True
+                    break
+        self._rects.append((x, y, right - x, bottom - y))
+
+        if len(self._rects) > self.max_rects:
+            self._rects = [self.bounds()]
+
+    def bounds(self) -> Rect | None:
+        """Rect around every area, None if there aren't any."""
+        if not self._rects:
+            return None
+        x = min(r[0] for r in self._rects)
+        y = min(r[1] for r in self._rects)
+        right = max(r[0] + r[2] for r in self._rects)
+        bottom = max(r[1] + r[3] for r in self._rects)
+        return x, y, right - x, bottom - y
+
+    def take(self) -> list[Rect]:
+        """Every area, emptying the collection."""
+        rects = self._rects
+        self._rects = []
+        return rects
+
+    def clear(self) -> None:
+        self._rects.clear()
@@ -0,0 +1,203 @@
+"""
+Compound nodes, a selection of nodes collapsed into one.
+
+The interior is stored as plain data in the compound node's params, so it's
+saved with the graph and never gets graphics items. Edges crossing the
+selection become promoted ports on the compound node: one input for every
+interior input fed from outside, and one output for every interior output
+feeding something outside.
+
+    node = collapse(graph, node_ids)
+    expand(graph, node.id)
+
+When evaluated, the interior is built into its own Graph with its own
+Evaluator and output cache, kept by the outer evaluator between runs. Promoted
+inputs are set as params on the interior nodes, so only what they feed
+recomputes.
+"""
+from __future__ import annotations
+import typing
+
+from . import operators
+from . import serializer
+from .model import Graph, Node, Port
+
+COMPOUND = 'Subgraph'
+""": node type of compound nodes"""
+
+SUBGRAPH_PARAM = 'subgraph'
+""": param holding a compound node's interior"""
+
+CACHE_BYTES = 64 * 1024 * 1024
+""": output cache budget of each compound node's interior"""
+
+OPERATOR = operators.Operator(COMPOUND, None, category='Graph')
+""": operator for compound nodes, evaluated by Compound rather than a function, it isn't registered"""
+
+
+def is_compound(node: Node) -> bool:
+    return node.type == COMPOUND and SUBGRAPH_PARAM in node.params
+
+
+def _unique(name: str, taken: set[str]) -> str:
+    result = name
+    i = 1
+    while result in taken:
+        result = f'{name}{i}'
+        i += 1
+    taken.add(result)
+    return result
+
+
+def collapse(graph: Graph, node_ids: typing.Iterable[int], name: str = COMPOUND) -> Node:
+    """Replace nodes with a compound node holding them.
+
+    Raises:
+        ValueError: no nodes are given, or a path leaves the nodes and comes
+            back, which would make the compound node feed itself.
+    """
+    inside = set(node_ids)
+    if not inside:
+        raise ValueError("no nodes to collapse")
+
+    incoming = [e for n in inside for e in graph.incoming(n) if e.source not in inside]
+    outgoing = [e for n in inside for e in graph.outgoing(n) if e.target not in inside]
+    interior = [e for n in inside for e in graph.outgoing(n) if e.target in inside]
+
+    # nodes downstream of the selection mustn't lead back into it
+    stack = [e.target for e in outgoing]
+    seen = set(stack)
+    while stack:
+        for n in graph.downstream(stack.pop()):
+            if n in inside:
+                raise ValueError("nodes can't be collapsed, a path leaves them and comes back")
+            if n not in seen:
+                seen.add(n)
+                stack.append(n)
+
+    taken = {SUBGRAPH_PARAM}
+    incoming.sort(key=lambda e: (graph.nodes[e.target].y, e.target, e.target_port))
+    inputs = []
+    for e in incoming:
+        port = graph.nodes[e.target].inputs[e.target_port]
+        inputs.append(Port(_unique(port.name, taken), port.type))
+
+    bindings = {}
+    for e in sorted(outgoing, key=lambda e: (graph.nodes[e.source].y, e.source, e.source_port)):
+        bindings.setdefault((e.source, e.source_port), []).append(e)
+    outputs = []
+    for source, source_port in bindings:
+        port = graph.nodes[source].outputs[source_port]
+        outputs.append(Port(_unique(port.name, set(p.name for p in outputs)), port.type))
+
+    nodes = [graph.nodes[n] for n in sorted(inside)]
+    x = sum(n.x for n in nodes) / len(nodes)
+    y = sum(n.y for n in nodes) / len(nodes)
+    data = {
+        'origin': [x, y],
+        'nodes': [serializer.node_to_list(n) for n in nodes],
+        'edges': [[e.id, e.source, e.source_port, e.target, e.target_port] for e in sorted(interior, key=lambda e: e.id)],
+        'inputs': [[e.target, e.target_port] for e in incoming],
+        'outputs': [list(b) for b in bindings],
+    }
+
+    # remove the interior before adding the compound, so edges are never doubled up on an input
+    for n in nodes:
+        graph.remove_node(n.id)
+    compound = graph.add_node(name, COMPOUND, (x, y), inputs, outputs, {SUBGRAPH_PARAM: data})
+    for port, e in enumerate(incoming):
+        graph.connect(e.source, e.source_port, compound.id, port)
+    for port, edges in enumerate(bindings.values()):
+        for e in edges:
+            graph.connect(compound.id, port, e.target, e.target_port)
+    return compound
+
+
+def expand(graph: Graph, node_id: int) -> list[int]:
+    """Replace a compound node with the nodes it holds, keeping their ids where they're free.
+
+    Returns:
+        ids of the restored nodes.
+    """
+    compound = graph.nodes[node_id]
+    if not is_compound(compound):
+        raise ValueError(f"node {node_id} isn't a compound node")
+
+    data = compound.params[SUBGRAPH_PARAM]
+    incoming = [(e.target_port, e.source, e.source_port) for e in graph.incoming(node_id)]
+    outgoing = [(e.source_port, e.target, e.target_port) for e in graph.outgoing(node_id)]
+    graph.remove_node(node_id)
+
+    # nodes keep their place relative to the compound node, which may have moved
+    dx = compound.x - data['origin'][0]
+    dy = compound.y - data['origin'][1]
+    ids = {}
+    for row in data['nodes']:
+        n = serializer.node_from_list(row)
+        restored = graph.add_node(
+            n.name, n.type, (n.x + dx, n.y + dy), n.inputs, n.outputs, dict(n.params),
+            n.id if n.id not in graph else None)
+        ids[n.id] = restored.id
+
+    for _, source, source_port, target, target_port in data['edges']:
+        graph.connect(ids[source], source_port, ids[target], target_port)
+    for port, source, source_port in incoming:
+        target, target_port = data['inputs'][port]
+        graph.connect(source, source_port, ids[target], target_port)
+    for port, target, target_port in outgoing:
+        source, source_port = data['outputs'][port]
+        graph.connect(ids[source], source_port, target, target_port)
+    return list(ids.values())
+
+
+class Compound:
+    """A compound node's interior, built for evaluation.
+
+    The outer Evaluator gives it an evaluator of its own, see Evaluator.compound.
+    """
+
+    def __init__(self, data: dict):
+        """
+        Args:
+            data: the compound node's SUBGRAPH_PARAM.
+        """
+        self.data = data
+        self.graph = Graph()
+        for row in data['nodes']:
+            n = serializer.node_from_list(row)
+            # params are copied, promoted inputs are set on them
+            self.graph.add_node(n.name, n.type, (n.x, n.y), n.inputs, n.outputs, dict(n.params), n.id)
+        for edge_id, source, source_port, target, target_port in data['edges']:
+            self.graph.connect(source, source_port, target, target_port, edge_id)
+        self.inputs = [tuple(b) for b in data['inputs']]
+        self.outputs = [tuple(b) for b in data['outputs']]
+        self.evaluator = None
+
+    def set_inputs(self, inputs: list) -> None:
+        """Set the compound node's input values on the interior nodes they feed.
+
+        Unchanged values are skipped, so the interior keeps what it computed from them.
+        """
+        for (node_id, port), value in zip(self.inputs, inputs):
+            if value is None:
+                # an unconnected promoted input, the interior keeps its own value
+                continue
+            node = self.graph.nodes[node_id]
+            name = node.inputs[port].name
+            if name in node.params:
+                old = node.params[name]
+                try:
+                    if old is value or not bool(old != value):
+                        continue
+                except (TypeError, ValueError):
+                    pass
+            self.graph.set_param(node_id, name, value)
+
+    def compute(self, inputs: list) -> tuple:
+        """Outputs of the interior for the compound node's input values.
+
+        Raises:
+            CycleError, EvaluationError: from the interior evaluator.
+        """
+        self.set_inputs(inputs)
+        return tuple(self.evaluator.value(node_id, port) for node_id, port in self.outputs)